@@ -0,0 +1,3 @@
+@echo off
+cd /d C:\SchedulerService
+C:\SchedulerService\venv\Scripts\python.exe C:\SchedulerService\source\dashboard_server.py %*
\ No newline at end of file
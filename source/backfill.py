@@ -0,0 +1,169 @@
+# SchedulerService/backfill.py
+"""
+Backfills: run a script task once per logical date in a range.
+Jobs and their per-date progress live in backfill_jobs / backfill_items, so
+a job created from the CLI or the dashboard is picked up on the next poll
+and resumes after a restart: dates left running by a stopped scheduler go
+back in the queue, and dates that already succeeded are not run again.
+Backfill runs give way to live work. No date of a task starts while that task
+has a scheduled run in progress, and scheduled runs in this process count
+against the engine's max_workers.
+"""
+
+import os
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillEngine:
+    """Claims backfill jobs and runs their dates on a bounded pool of the scheduler's child runs."""
+
+    def __init__(self, scheduler, poll_seconds: float = 5, max_workers: int = 4,
+                 lease_seconds: float = 300, max_attempts: int = 2, env_var: str = 'LOGICAL_DATE'):
+        self.scheduler = scheduler
+        self.backfills = scheduler.run_manager.backfills
+        self.node_name = scheduler.health_manager.machine_name
+        self.poll_seconds = poll_seconds
+        self.max_workers = max_workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.env_var = env_var
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='BackfillRun')
+        self.adopted = set()        # backfill_ids this node has recovered
+        self.in_flight = {}         # (backfill_id, logical_date) -> run_id (None until created)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='BackfillEngine', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop starting dates; with wait, also wait for the running ones (the scheduler terminates their processes)."""
+        self._stop.set()
+        self._wake.set()
+        if not wait:
+            return
+        if self._thread:
+            self._thread.join(timeout=self.poll_seconds + 5)
+        self.pool.shutdown(wait=True)
+
+    def wake(self):
+        """Poll now, e.g. after a job was created in this process."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Backfill poll failed: {e}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def poll(self):
+        """Heartbeat our jobs, then start as many pending dates as the throttle allows."""
+        jobs = self.backfills.claim_jobs(self.node_name, self.lease_seconds)
+        if not jobs:
+            return
+
+        with self._lock:
+            busy = len(self.in_flight)
+            own_runs = set(self.in_flight.values())
+        # Tasks with a live run anywhere wait; live runs in this process use up workers
+        live_tasks = {r['task_id'] for r in self.scheduler.run_manager.get_running_tasks()
+                      if r['triggered_by'] != 'backfill'}
+        with self.scheduler.process_lock:
+            local_live = sum(1 for run_id in self.scheduler.running_runs if run_id not in own_runs)
+        free = self.max_workers - busy - local_live
+
+        for job in jobs:
+            backfill_id = job['backfill_id']
+            if backfill_id not in self.adopted:
+                requeued = self.backfills.requeue_interrupted(backfill_id)
+                if requeued:
+                    logger.info(f"Backfill {backfill_id}: requeued {requeued} interrupted dates")
+                self.adopted.add(backfill_id)
+
+            if self.backfills.finish_job_if_done(backfill_id):
+                self._job_finished(backfill_id)
+                continue
+            if free <= 0 or job['task_id'] in live_tasks or self._stop.is_set():
+                continue
+
+            with self._lock:
+                running = sum(1 for key in self.in_flight if key[0] == backfill_id)
+            limit = min(free, job['max_parallel'] - running)
+            if limit <= 0:
+                continue
+            task = self.scheduler.task_manager.get_task(task_id=job['task_id'])
+            if not task:
+                continue
+            for item in self.backfills.claim_items(backfill_id, limit):
+                key = (backfill_id, item['logical_date'])
+                with self._lock:
+                    self.in_flight[key] = None
+                self.pool.submit(self.run_date, job, task, item['logical_date'])
+                free -= 1
+
+    def run_date(self, job: Dict, task: Dict, logical_date):
+        """Run the task for one date as its own run and record the outcome on the item."""
+        backfill_id = job['backfill_id']
+        key = (backfill_id, logical_date)
+        status = 'failed'
+        try:
+            run_id = self.scheduler.run_manager.create_run(
+                task['task_id'], triggered_by='backfill', process_id=os.getpid(), logical_date=logical_date
+            )
+            with self._lock:
+                self.in_flight[key] = run_id
+            self.backfills.set_item_run(backfill_id, logical_date, run_id)
+
+            date_text = logical_date.isoformat()
+            env = dict(self.scheduler.create_clean_environment(), BACKFILL_ID=str(backfill_id))
+            env[self.env_var] = date_text
+            argv = [date_text] if job['pass_as'] == 'argv' else []
+            script = task['script_path']
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            archive_log_file = os.path.join(
+                os.path.dirname(script), f"{task['task_name']}_logs",
+                f"{task['task_name']}_backfill_{date_text}_{timestamp}.log"
+            )
+            status = self.scheduler.run_script_child(
+                task, run_id, script, env, argv, archive_log_file, f"backfill {date_text}",
+                f"Backfill of {date_text}", [f"Run ID: {run_id} (backfill {backfill_id})", f"Logical date: {date_text}"],
+                task.get('timeout_seconds') or 3600
+            )
+        except Exception as e:
+            logger.error(f"Backfill {backfill_id} date {logical_date} could not run: {e}")
+        finally:
+            # A date killed by shutdown stays running; the next start requeues it
+            if status == 'success' or not self._stop.is_set():
+                try:
+                    outcome = self.backfills.finish_item(backfill_id, logical_date, status, self.max_attempts)
+                    logger.info(f"Backfill {backfill_id} date {logical_date}: {status}"
+                                + (" (will retry)" if outcome == 'pending' else ""))
+                except Exception as e:
+                    logger.error(f"Failed to record backfill {backfill_id} date {logical_date}: {e}")
+            with self._lock:
+                self.in_flight.pop(key, None)
+            self._wake.set()
+
+    def _job_finished(self, backfill_id: int):
+        self.adopted.discard(backfill_id)
+        job = (self.backfills.get_jobs(limit=1, backfill_id=backfill_id) or [{}])[0]
+        logger.info(f"Backfill {backfill_id} of task {job.get('task_name')} {job.get('status')}: "
+                    f"{job.get('succeeded')} succeeded, {job.get('skipped')} skipped, {job.get('failed')} failed")
+        if job.get('status') == 'failed':
+            self.scheduler.alert_manager.create_alert(
+                'backfill_failed', 'warning',
+                f"Backfill {backfill_id} of task {job.get('task_name')} finished with {job.get('failed')} failed dates",
+                task_id=job.get('task_id')
+            )
@@ -0,0 +1,234 @@
+# SchedulerService/callable_pool.py
+"""
+Process pool for 'callable' tasks (script_path = 'package.module:function').
+Pool workers are started once and import task modules on first use, so a
+short function costs a few milliseconds instead of an interpreter start.
+Workers are replaced after max_tasks_per_child calls, and the whole pool is
+replaced once a worker grows past max_memory_mb; both also pick up changed
+task code. A call that times out retires its pool: the other calls on it
+finish, then its remaining workers are killed.
+"""
+
+import os
+import sys
+import time
+import logging
+import importlib
+import threading
+import traceback
+import multiprocessing
+from multiprocessing import context as mp_context, spawn
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout, redirect_stderr
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ProcessPoolExecutor recycles workers itself from Python 3.11
+NATIVE_MAX_TASKS = sys.version_info >= (3, 11)
+
+# spawn only has a process-wide executable; it is swapped just while a pool worker launches
+_launch_lock = threading.Lock()
+
+
+class _PoolProcess(mp_context.SpawnProcess):
+    python = None
+
+    @staticmethod
+    def _Popen(process_obj):
+        with _launch_lock:
+            previous = spawn.get_executable()
+            spawn.set_executable(process_obj.python)
+            try:
+                return mp_context.SpawnProcess._Popen(process_obj)
+            finally:
+                spawn.set_executable(previous)
+
+
+class _PoolContext(mp_context.SpawnContext):
+    """A spawn context whose processes start under its own interpreter."""
+
+    def __init__(self, python: str):
+        self.python = python
+
+    def Process(self, *args, **kwargs):
+        process = _PoolProcess(*args, **kwargs)
+        process.python = self.python
+        return process
+
+
+def _pool_context(python: Optional[str]):
+    if not python or python == spawn.get_executable():
+        return multiprocessing.get_context('spawn')
+    return _PoolContext(python)
+
+
+def _init_worker(sys_path: List[str]):
+    for path in reversed(sys_path):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+        # Peak rather than current size, in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return None
+
+
+def run_callable(target: str, args, log_file: str) -> Tuple[bool, Optional[str], Optional[int]]:
+    """Call target in a pool worker with its output appended to log_file.
+
+    args is a list (positional) or a dict (keyword arguments). Returns
+    (succeeded, error, worker RSS in bytes after the call).
+    """
+    module_name, _, function_name = target.partition(':')
+    started = time.perf_counter()
+    with open(log_file, 'a', encoding='utf-8', errors='replace') as flog, \
+            redirect_stdout(flog), redirect_stderr(flog):
+        try:
+            function = getattr(importlib.import_module(module_name), function_name)
+            if isinstance(args, dict):
+                result = function(**args)
+            elif isinstance(args, list):
+                result = function(*args)
+            else:
+                result = function()
+            if result is not None:
+                print(f"Result: {result!r}")
+            succeeded, error = True, None
+        except SystemExit as e:
+            succeeded = e.code in (None, 0)
+            error = None if succeeded else f"SystemExit: {e.code}"
+        except BaseException as e:
+            traceback.print_exc()
+            succeeded, error = False, f"{type(e).__name__}: {e}"
+        print(f"\n=== Callable finished in {time.perf_counter() - started:.3f}s (worker PID {os.getpid()}) ===")
+    return succeeded, error, _rss_bytes()
+
+
+class CallablePool:
+    """A ProcessPoolExecutor that is replaced when its workers age or bloat."""
+
+    def __init__(self, workers: int = 4, max_tasks_per_child: int = 100, max_memory_mb: int = 512,
+                 python: str = None, sys_path: List[str] = (), kill_grace_seconds: float = 300):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+        self.python = python                # interpreter for the workers (None: this one)
+        self.sys_path = list(sys_path)
+        self.kill_grace_seconds = kill_grace_seconds
+        self.recycled = 0
+        self._executor = None
+        self._calls = 0                     # calls on the current executor
+        self._futures = {}                  # executor -> futures not yet done
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if (self._executor is not None and not NATIVE_MAX_TASKS
+                    and self._calls >= self.max_tasks_per_child * self.workers):
+                self._retire_locked(self._executor, 'task limit')
+            if self._executor is None:
+                context = _pool_context(self.python)
+                kwargs = {'max_tasks_per_child': self.max_tasks_per_child} if NATIVE_MAX_TASKS else {}
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context,
+                    initializer=_init_worker, initargs=(self.sys_path,), **kwargs
+                )
+                self._calls = 0
+                self._futures[self._executor] = set()
+            self._calls += 1
+            return self._executor
+
+    def run(self, target: str, args, log_file: str, timeout: float) -> Tuple[bool, Optional[str]]:
+        """Run one call; returns (succeeded, error). Raises TimeoutError after timeout seconds."""
+        executor = self._get_executor()
+        try:
+            future = executor.submit(run_callable, target, args, log_file)
+        except (BrokenProcessPool, RuntimeError):
+            self.retire(executor, 'broken')
+            executor = self._get_executor()
+            future = executor.submit(run_callable, target, args, log_file)
+        with self._lock:
+            pending = self._futures.get(executor)
+            if pending is not None:
+                pending.add(future)
+        future.add_done_callback(lambda f: self._forget(executor, f))
+
+        try:
+            succeeded, error, rss = future.result(timeout=timeout)
+        except FutureTimeout:
+            self.retire(executor, 'timeout', stuck=future)
+            raise TimeoutError(f"Callable {target} timed out after {timeout} seconds")
+        except BrokenProcessPool:
+            self.retire(executor, 'broken')
+            return False, "Pool worker process died during the call"
+
+        if self.max_memory_bytes and rss and rss > self.max_memory_bytes:
+            self.retire(executor, f"worker at {rss // (1024 * 1024)} MB")
+        return succeeded, error
+
+    def _forget(self, executor, future):
+        with self._lock:
+            pending = self._futures.get(executor)
+            if pending is not None:
+                pending.discard(future)
+                if not pending and executor is not self._executor:
+                    del self._futures[executor]
+
+    def retire(self, executor: ProcessPoolExecutor, reason: str, stuck=None):
+        """Stop sending calls to executor; with a stuck future, end its workers once the other calls finish."""
+        with self._lock:
+            workers = self._retire_locked(executor, reason)
+        if stuck is not None:
+            threading.Thread(target=self._kill_when_idle, args=(executor, stuck, workers),
+                             name='CallablePoolReaper', daemon=True).start()
+
+    def _retire_locked(self, executor, reason: str) -> list:
+        """Shut executor down without waiting; returns its worker processes."""
+        if self._executor is executor:
+            self._executor = None
+            self.recycled += 1
+            logger.info(f"Recycling callable worker pool ({reason})")
+        # ProcessPoolExecutor has no public way to end a busy worker before 3.14,
+        # and drops its process handles on shutdown
+        workers = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False)
+        if not self._futures.get(executor):
+            self._futures.pop(executor, None)
+        return workers
+
+    def _kill_when_idle(self, executor, stuck, workers):
+        with self._lock:
+            others = [f for f in self._futures.get(executor, ()) if f is not stuck]
+        wait(others, timeout=self.kill_grace_seconds)
+        self._terminate(workers)
+        with self._lock:
+            self._futures.pop(executor, None)
+
+    @staticmethod
+    def _terminate(workers):
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+
+    def shutdown(self):
+        """Kill the workers; calls still running fail."""
+        with self._lock:
+            executor = self._executor
+            if executor is None:
+                return
+            self._executor = None
+            workers = list((getattr(executor, '_processes', None) or {}).values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._futures.pop(executor, None)
+        self._terminate(workers)
@@ -0,0 +1,98 @@
+# dashboard_server.py
+"""
+Standalone dashboard process for DASHBOARD_CONFIG['mode'] = 'standalone'.
+Serves monitoring_dashboard under a production WSGI server, reading state from
+the database and the scheduler's read-only status channel instead of sharing
+the scheduler's process.
+
+    python dashboard_server.py                 # waitress (Windows) or gunicorn (POSIX)
+    gunicorn -w 4 --threads 16 dashboard_server:app
+"""
+import os
+import sys
+import shutil
+import logging
+import argparse
+import subprocess
+from pathlib import Path
+
+# Setup local paths
+LOCAL_ROOT = Path(r"C:\SchedulerService")
+sys.path.insert(0, str(LOCAL_ROOT / "source"))
+
+# Import local config and components
+import production_config_local as production_config
+sys.modules['production_config'] = production_config
+
+from monitoring_dashboard import app
+from status_channel import StatusChannelClient, SchedulerClient
+
+from logging.handlers import RotatingFileHandler
+
+def setup_logging():
+    log_dir = LOCAL_ROOT / "logs"
+    log_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            RotatingFileHandler(log_dir / "dashboard.log", maxBytes=10*1024*1024, backupCount=5),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    return logging.getLogger('DashboardServer')
+
+logger = setup_logging()
+
+# Each worker process gets its own DB pool and channel connections
+channel_config = production_config.STATUS_CHANNEL_CONFIG
+app.config['SCHEDULER'] = SchedulerClient(StatusChannelClient(
+    channel_config['host'],
+    channel_config['port'],
+    channel_config['authkey'],
+    timeout_seconds=channel_config['timeout_seconds'],
+    authkey_file=channel_config.get('authkey_file')
+))
+
+
+def serve(host: str, port: int, workers: int, threads: int):
+    """Run under gunicorn where available (POSIX), otherwise waitress."""
+    gunicorn = shutil.which('gunicorn')
+    if os.name != 'nt' and gunicorn:
+        logger.info(f"Starting gunicorn on {host}:{port} with {workers} workers x {threads} threads")
+        cmd = [
+            gunicorn, '--workers', str(workers), '--threads', str(threads),
+            '--bind', f"{host}:{port}", '--timeout', '0',  # /api/events streams stay open
+            '--chdir', os.path.dirname(os.path.abspath(__file__)),
+            'dashboard_server:app'
+        ]
+        sys.exit(subprocess.call(cmd))
+
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        logger.error("Neither gunicorn nor waitress is installed; run: pip install waitress")
+        sys.exit(1)
+
+    # waitress is single-process; scale with threads instead of workers
+    logger.info(f"Starting waitress on {host}:{port} with {threads} threads")
+    waitress_serve(app, host=host, port=port, threads=threads)
+
+
+def main():
+    config = production_config.DASHBOARD_CONFIG
+    parser = argparse.ArgumentParser(description='Standalone scheduler dashboard')
+    parser.add_argument('--host', default=config['host'])
+    parser.add_argument('--port', type=int, default=config['port'])
+    parser.add_argument('--workers', type=int, default=config.get('workers', 4))
+    parser.add_argument('--threads', type=int, default=config.get('threads', 16))
+    args = parser.parse_args()
+
+    if config.get('mode') != 'standalone':
+        logger.warning("DASHBOARD_CONFIG['mode'] is not 'standalone'; the scheduler service "
+                       "will also start its embedded dashboard on the same port")
+
+    serve(args.host, args.port, args.workers, args.threads)
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,66 @@
 # SchedulerService/db_models.py
 import os
 import json
+import uuid
 import logging
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from contextlib import contextmanager
 from typing import List, Dict, Optional, Any
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2.pool import SimpleConnectionPool
 from production_config import DATABASE_CONFIG as DB_CONFIG, DATABASE_SCHEMA as SCHEMA_NAME
+from production_config import DURATION_STATS_CONFIG, RUN_EXPORT_CONFIG
+from duration_stats import DurationStats, DurationSketch
+from event_bus import event_bus
+
+# Runs started for a part of a task run or for a backfill date; they are not
+# the task's own runs for dependencies, "latest run" or analytics
+DERIVED_RUN_TRIGGERS = ['fanout', 'gather', 'backfill']
 
 logger = logging.getLogger(__name__)
 
+
+class StreamLimitError(Exception):
+    """All streaming export slots are in use."""
+
+
+class RowStream:
+    """Rows of a server-side cursor on a dedicated connection.
+    
+    Exhausting or closing the stream closes the connection and frees its slot.
+    """
+    
+    def __init__(self, conn, cursor, release):
+        self._conn = conn
+        self._cursor = cursor
+        self._release = release
+    
+    def __iter__(self):
+        try:
+            for row in self._cursor:
+                yield row
+        finally:
+            # Also runs when the consumer stops early (e.g. client disconnect)
+            self.close()
+    
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            self._cursor.close()
+        except Exception:
+            pass
+        try:
+            conn.close()
+        finally:
+            self._release()
+    
+    def __del__(self):
+        self.close()
+
 # # Database configuration
 # DB_CONFIG = {
 #     'host': '10.0.10.126',
@@ -31,6 +80,8 @@ class DatabaseManager:
             **DB_CONFIG
         )
         self.schema = SCHEMA_NAME
+        # Exports stream over their own connections, never the shared pool's
+        self._stream_slots = threading.BoundedSemaphore(RUN_EXPORT_CONFIG['max_concurrent'])
     
     @contextmanager
     def get_cursor(self, dict_cursor=True):
@@ -55,6 +106,32 @@ class DatabaseManager:
             cursor.execute(query, params)
             return cursor.fetchall()
     
+    def stream_query(self, query: str, params: tuple = None, batch_size: int = 1000) -> RowStream:
+        """Run query on a dedicated connection and stream its rows batch_size at a time.
+        
+        Raises StreamLimitError when RUN_EXPORT_CONFIG['max_concurrent'] streams
+        are already open. The server ends a stream whose reader stalls for
+        idle_timeout_seconds.
+        """
+        if not self._stream_slots.acquire(blocking=False):
+            raise StreamLimitError(f"{RUN_EXPORT_CONFIG['max_concurrent']} exports already running")
+        conn = None
+        try:
+            options = (f"-c statement_timeout={RUN_EXPORT_CONFIG['statement_timeout_seconds'] * 1000} "
+                       f"-c idle_in_transaction_session_timeout={RUN_EXPORT_CONFIG['idle_timeout_seconds'] * 1000}")
+            conn = psycopg2.connect(options=options, **DB_CONFIG)
+            conn.set_session(readonly=True)
+            # Named cursors stay on the server; only one batch is held in memory
+            cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+            cursor.itersize = batch_size
+            cursor.execute(query, params)
+            return RowStream(conn, cursor, self._stream_slots.release)
+        except Exception:
+            if conn is not None:
+                conn.close()
+            self._stream_slots.release()
+            raise
+    
     def execute_update(self, query: str, params: tuple = None) -> int:
         """Execute an INSERT/UPDATE/DELETE query and return affected rows."""
         with self.get_cursor() as cursor:
@@ -103,20 +180,85 @@ class DatabaseManager:
 class TaskManager:
     """Manages task operations in the database."""
     
+    UPDATABLE_FIELDS = ['task_name', 'script_path', 'description', 'is_active',
+                        'max_retries', 'retry_delay_seconds', 'timeout_seconds',
+                        'adaptive_timeout', 'adaptive_timeout_factor', 'profile_mode',
+                        'max_output_mb', 'task_type', 'callable_args', 'fanout_config']
+    JSON_FIELDS = ('callable_args', 'fanout_config')
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.schema = SCHEMA_NAME
+        self.forecasts = ForecastManager(db_manager)
+        self.fire_claims = FireClaimManager(db_manager)
+    
+    def ensure_schema(self):
+        """Add task columns introduced after the original schema."""
+        query = f"""
+            ALTER TABLE {self.schema}.scheduler_tasks
+                ADD COLUMN IF NOT EXISTS adaptive_timeout BOOLEAN NOT NULL DEFAULT false,
+                ADD COLUMN IF NOT EXISTS adaptive_timeout_factor NUMERIC(6, 2),
+                ADD COLUMN IF NOT EXISTS profile_mode VARCHAR(20),
+                ADD COLUMN IF NOT EXISTS max_output_mb INTEGER,
+                ADD COLUMN IF NOT EXISTS task_type VARCHAR(20) NOT NULL DEFAULT 'script',
+                ADD COLUMN IF NOT EXISTS callable_args JSONB,
+                ADD COLUMN IF NOT EXISTS fanout_config JSONB
+        """
+        self.db.execute_update(query)
+        
+        # Single-row counter bumped on every task change, so a scheduler in another
+        # process (or a standalone dashboard's writes) can detect that it must reload
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.scheduler_config_version (
+                id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            INSERT INTO {self.schema}.scheduler_config_version (id, version)
+            VALUES (1, 0) ON CONFLICT (id) DO NOTHING
+        """
+        self.db.execute_update(query)
+        
+        query = f"""
+            CREATE INDEX IF NOT EXISTS idx_task_schedules_next_run
+                ON {self.schema}.task_schedules (next_run_time)
+                WHERE is_active AND next_run_time IS NOT NULL
+        """
+        self.db.execute_update(query)
+    
+    def get_config_version(self) -> int:
+        """Current task configuration version."""
+        query = f"SELECT version FROM {self.schema}.scheduler_config_version WHERE id = 1"
+        results = self.db.execute_query(query)
+        return results[0]['version'] if results else 0
+    
+    def bump_config_version(self) -> int:
+        """Record that task configuration changed."""
+        query = f"""
+            UPDATE {self.schema}.scheduler_config_version
+            SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1
+            RETURNING version
+        """
+        return self.db.execute_insert(query)
     
     def create_task(self, task_name: str, script_path: str, description: str = None,
-                   max_retries: int = 3, timeout_seconds: int = 3600) -> int:
-        """Create a new task."""
+                   max_retries: int = 3, timeout_seconds: int = 3600,
+                   task_type: str = 'script', callable_args=None, fanout_config: Dict = None) -> int:
+        """Create a new task; for task_type 'callable' script_path is 'module:function'."""
         query = f"""
             INSERT INTO {self.schema}.scheduler_tasks 
-            (task_name, script_path, description, max_retries, timeout_seconds)
-            VALUES (%s, %s, %s, %s, %s)
+            (task_name, script_path, description, max_retries, timeout_seconds, task_type,
+             callable_args, fanout_config)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING task_id
         """
-        return self.db.execute_insert(query, (task_name, script_path, description, max_retries, timeout_seconds))
+        args_json = json.dumps(callable_args) if callable_args is not None else None
+        fanout_json = json.dumps(fanout_config) if fanout_config is not None else None
+        task_id = self.db.execute_insert(query, (task_name, script_path, description, max_retries,
+                                                 timeout_seconds, task_type, args_json, fanout_json))
+        self.bump_config_version()
+        return task_id
     
     def get_task(self, task_id: int = None, task_name: str = None) -> Optional[Dict]:
         """Get task by ID or name."""
@@ -140,15 +282,65 @@ class TaskManager:
         """
         return self.db.execute_query(query)
     
+    def set_next_run_times(self, next_runs: Dict[int, Optional[datetime]], clear_others: bool = False):
+        """Record each task's next fire time in one statement.
+        
+        clear_others also nulls it for every task not in next_runs, e.g. tasks
+        that were unscheduled while the scheduler was down.
+        """
+        with self.db.get_cursor() as cursor:
+            if next_runs:
+                execute_values(cursor, f"""
+                    UPDATE {self.schema}.task_schedules s
+                    SET next_run_time = v.next_run_time
+                    FROM (VALUES %s) AS v(task_id, next_run_time)
+                    WHERE s.task_id = v.task_id AND s.is_active
+                      AND s.next_run_time IS DISTINCT FROM v.next_run_time
+                """, list(next_runs.items()), template='(%s::integer, %s::timestamp)', page_size=1000)
+            if clear_others:
+                cursor.execute(f"""
+                    UPDATE {self.schema}.task_schedules
+                    SET next_run_time = NULL
+                    WHERE next_run_time IS NOT NULL AND NOT (task_id = ANY(%s))
+                """, (list(next_runs),))
+    
+    def get_next_runs(self, limit: int = 20, task_id: int = None) -> List[Dict]:
+        """Soonest upcoming scheduled runs (indexed on next_run_time)."""
+        query = f"""
+            SELECT s.next_run_time, t.task_id, t.task_name, s.schedule_type, s.schedule_config
+            FROM {self.schema}.task_schedules s
+            JOIN {self.schema}.scheduler_tasks t ON s.task_id = t.task_id
+            WHERE s.is_active AND s.next_run_time IS NOT NULL AND t.is_active
+        """
+        params = []
+        if task_id:
+            query += " AND s.task_id = %s"
+            params.append(task_id)
+        query += " ORDER BY s.next_run_time LIMIT %s"
+        params.append(limit)
+        return self.db.execute_query(query, tuple(params))
+    
+    def get_all_tasks(self) -> List[Dict]:
+        """Get every task, active or not."""
+        query = f"SELECT * FROM {self.schema}.scheduler_tasks ORDER BY task_name"
+        return self.db.execute_query(query)
+    
+    def get_task_ids_with_runs(self) -> List[int]:
+        """Tasks with run history (deleting one only archives it)."""
+        query = f"""
+            SELECT t.task_id FROM {self.schema}.scheduler_tasks t
+            WHERE EXISTS (SELECT 1 FROM {self.schema}.task_runs r WHERE r.task_id = t.task_id)
+        """
+        return [row['task_id'] for row in self.db.execute_query(query)]
+    
     def update_task(self, task_id: int, **kwargs) -> bool:
         """Update task properties."""
-        allowed_fields = ['task_name', 'script_path', 'description', 'is_active', 
-                         'max_retries', 'retry_delay_seconds', 'timeout_seconds']
-        
         updates = []
         values = []
         for field, value in kwargs.items():
-            if field in allowed_fields:
+            if field in self.UPDATABLE_FIELDS:
+                if field in self.JSON_FIELDS and value is not None and not isinstance(value, str):
+                    value = json.dumps(value)
                 updates.append(f"{field} = %s")
                 values.append(value)
         
@@ -157,17 +349,30 @@ class TaskManager:
         
         values.append(task_id)
         query = f"UPDATE {self.schema}.scheduler_tasks SET {', '.join(updates)} WHERE task_id = %s"
-        return self.db.execute_update(query, tuple(values)) > 0
+        updated = self.db.execute_update(query, tuple(values)) > 0
+        if updated:
+            self.bump_config_version()
+        return updated
     
-    def add_schedule(self, task_id: int, schedule_type: str, schedule_config: Dict) -> int:
-        """Add a schedule to a task."""
-        query = f"""
+    def add_schedule(self, task_id: int, schedule_type: str, schedule_config: Dict,
+                     replace: bool = False) -> int:
+        """Add a schedule to a task; replace=True drops its existing schedules first."""
+        with self.db.get_cursor() as cursor:
+            schedule_id = self._add_schedule(cursor, task_id, schedule_type, schedule_config, replace)
+        self.bump_config_version()
+        return schedule_id
+    
+    def _add_schedule(self, cursor, task_id: int, schedule_type: str, schedule_config: Dict,
+                      replace: bool = False) -> int:
+        if replace:
+            cursor.execute(f"DELETE FROM {self.schema}.task_schedules WHERE task_id = %s", (task_id,))
+        cursor.execute(f"""
             INSERT INTO {self.schema}.task_schedules 
             (task_id, schedule_type, schedule_config)
             VALUES (%s, %s, %s)
             RETURNING schedule_id
-        """
-        return self.db.execute_insert(query, (task_id, schedule_type, json.dumps(schedule_config)))
+        """, (task_id, schedule_type, json.dumps(schedule_config)))
+        return cursor.fetchone()['schedule_id']
     
     def add_dependency(self, task_id: int, depends_on_task_id: int, 
                       dependency_type: str = 'success') -> bool:
@@ -179,7 +384,9 @@ class TaskManager:
             ON CONFLICT (task_id, depends_on_task_id) DO UPDATE
             SET dependency_type = EXCLUDED.dependency_type
         """
-        return self.db.execute_update(query, (task_id, depends_on_task_id, dependency_type)) > 0
+        added = self.db.execute_update(query, (task_id, depends_on_task_id, dependency_type)) > 0
+        self.bump_config_version()
+        return added
     
     def get_dependencies(self, task_id: int) -> List[Dict]:
         """Get all dependencies for a task."""
@@ -191,28 +398,180 @@ class TaskManager:
         """
         return self.db.execute_query(query, (task_id,))
 
+    def get_all_dependencies(self) -> List[Dict]:
+        """Get dependencies for all tasks in one query."""
+        query = f"""
+            SELECT d.*, t.task_name as depends_on_task_name
+            FROM {self.schema}.task_dependencies d
+            JOIN {self.schema}.scheduler_tasks t ON d.depends_on_task_id = t.task_id
+        """
+        return self.db.execute_query(query)
+    
+    def apply_operations(self, operations: List[Dict]) -> List[Dict]:
+        """Apply operations from task_operations.validate_operations in one transaction.
+        
+        Any failure rolls back the whole batch. The config version is bumped once,
+        so other processes reload a single time. Deleting a task that has run
+        history archives it instead: it is deactivated and loses its schedules
+        and dependencies, but its runs are kept.
+        """
+        results = []
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"SELECT task_id, task_name FROM {self.schema}.scheduler_tasks")
+            task_ids = {row['task_name']: row['task_id'] for row in cursor.fetchall()}
+            
+            for op in operations:
+                name = op['task_name']
+                fields = op['fields']
+                result = 'updated'
+                
+                if op['op'] == 'create':
+                    columns = ['task_name'] + list(fields)
+                    cursor.execute(f"""
+                        INSERT INTO {self.schema}.scheduler_tasks ({', '.join(columns)})
+                        VALUES ({', '.join(['%s'] * len(columns))})
+                        RETURNING task_id
+                    """, [name] + list(fields.values()))
+                    task_id = task_ids[name] = cursor.fetchone()['task_id']
+                    result = 'created'
+                else:
+                    task_id = task_ids[name]
+                
+                if op['op'] == 'update' and fields:
+                    cursor.execute(f"""
+                        UPDATE {self.schema}.scheduler_tasks
+                        SET {', '.join(f"{field} = %s" for field in fields)},
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE task_id = %s
+                    """, list(fields.values()) + [task_id])
+                    if fields.get('task_name', name) != name:
+                        task_ids[fields['task_name']] = task_ids.pop(name)
+                elif op['op'] in ('enable', 'disable'):
+                    cursor.execute(f"""
+                        UPDATE {self.schema}.scheduler_tasks
+                        SET is_active = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE task_id = %s
+                    """, (op['op'] == 'enable', task_id))
+                    result = f"{op['op']}d"
+                elif op['op'] == 'delete':
+                    result = self._delete_task(cursor, task_id)
+                    task_ids.pop(name)
+                
+                if op['schedule']:
+                    schedule_type, schedule_config = op['schedule']
+                    self._add_schedule(cursor, task_id, schedule_type, schedule_config, replace=True)
+                if op['op'] in ('create', 'update') and op['depends_on'] is not None:
+                    cursor.execute(f"DELETE FROM {self.schema}.task_dependencies WHERE task_id = %s", (task_id,))
+                    for dep_name in op['depends_on']:
+                        cursor.execute(f"""
+                            INSERT INTO {self.schema}.task_dependencies (task_id, depends_on_task_id)
+                            VALUES (%s, %s)
+                            ON CONFLICT (task_id, depends_on_task_id) DO NOTHING
+                        """, (task_id, task_ids[dep_name]))
+                
+                results.append({'index': op['index'], 'op': op['op'], 'task_name': name,
+                                'task_id': task_id, 'result': result})
+            
+            cursor.execute(f"""
+                UPDATE {self.schema}.scheduler_config_version
+                SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = 1
+            """)
+        return results
+    
+    def _delete_task(self, cursor, task_id: int) -> str:
+        cursor.execute(f"DELETE FROM {self.schema}.task_schedules WHERE task_id = %s", (task_id,))
+        cursor.execute(f"""
+            DELETE FROM {self.schema}.task_dependencies
+            WHERE task_id = %s OR depends_on_task_id = %s
+        """, (task_id, task_id))
+        cursor.execute(f"SELECT 1 FROM {self.schema}.task_runs WHERE task_id = %s LIMIT 1", (task_id,))
+        if cursor.fetchone():
+            cursor.execute(f"""
+                UPDATE {self.schema}.scheduler_tasks
+                SET is_active = false, updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = %s
+            """, (task_id,))
+            return 'archived'
+        cursor.execute(f"DELETE FROM {self.schema}.scheduler_tasks WHERE task_id = %s", (task_id,))
+        return 'deleted'
+
 class RunManager:
     """Manages task run operations."""
     
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.schema = SCHEMA_NAME
+        self.duration_stats = DurationStatsManager(db_manager)
+        self.rollups = RunRollupManager(db_manager)
+        self.queue = RunQueueManager(db_manager)
+        self.backfills = BackfillManager(db_manager)
+    
+    def ensure_schema(self):
+        """Add run columns introduced after the original schema."""
+        query = f"""
+            ALTER TABLE {self.schema}.task_runs
+                ADD COLUMN IF NOT EXISTS profile_path TEXT,
+                ADD COLUMN IF NOT EXISTS logical_date DATE
+        """
+        self.db.execute_update(query)
+        
+        # Keyset pagination order for run history
+        query = f"""
+            CREATE INDEX IF NOT EXISTS idx_task_runs_started_run
+                ON {self.schema}.task_runs (started_at DESC, run_id DESC);
+            CREATE INDEX IF NOT EXISTS idx_task_runs_task_started_run
+                ON {self.schema}.task_runs (task_id, started_at DESC, run_id DESC)
+        """
+        self.db.execute_update(query)
+        
+        # Finished runs whose log still has to be compressed
+        query = f"""
+            CREATE INDEX IF NOT EXISTS idx_task_runs_uncompressed_log
+                ON {self.schema}.task_runs (completed_at)
+                WHERE log_file_path IS NOT NULL AND log_file_path NOT LIKE '%.gz'
+        """
+        self.db.execute_update(query)
+        
+        # Runs for a logical date (backfills)
+        query = f"""
+            CREATE INDEX IF NOT EXISTS idx_task_runs_task_logical_date
+                ON {self.schema}.task_runs (task_id, logical_date)
+                WHERE logical_date IS NOT NULL
+        """
+        self.db.execute_update(query)
+        
+        # Child runs of a fan-out run
+        query = f"""
+            CREATE INDEX IF NOT EXISTS idx_run_dependencies_run
+                ON {self.schema}.run_dependencies (run_id)
+        """
+        self.db.execute_update(query)
+        
+        # Completion order, for the log indexer
+        query = f"""
+            CREATE INDEX IF NOT EXISTS idx_task_runs_completed_run
+                ON {self.schema}.task_runs (completed_at, run_id)
+                WHERE completed_at IS NOT NULL
+        """
+        self.db.execute_update(query)
     
     def create_run(self, task_id: int, triggered_by: str = 'schedule',
-                  machine_name: str = None, process_id: int = None) -> int:
+                  machine_name: str = None, process_id: int = None, logical_date=None) -> int:
         """Create a new task run."""
         machine_name = machine_name or os.environ.get('COMPUTERNAME', 'unknown')
         query = f"""
             INSERT INTO {self.schema}.task_runs 
-            (task_id, status, started_at, triggered_by, machine_name, process_id)
-            VALUES (%s, 'pending', CURRENT_TIMESTAMP, %s, %s, %s)
+            (task_id, status, started_at, triggered_by, machine_name, process_id, logical_date)
+            VALUES (%s, 'pending', CURRENT_TIMESTAMP, %s, %s, %s, %s)
             RETURNING run_id
         """
-        return self.db.execute_insert(query, (task_id, triggered_by, machine_name, process_id))
+        return self.db.execute_insert(query, (task_id, triggered_by, machine_name, process_id, logical_date))
     
     def update_run_status(self, run_id: int, status: str, exit_code: int = None,
-                         error_message: str = None, log_file_path: str = None):
-        """Update run status."""
+                         error_message: str = None, log_file_path: str = None,
+                         record_duration: bool = True):
+        """Update run status; record_duration=False keeps it out of the task's duration stats."""
         query = f"""
             UPDATE {self.schema}.task_runs 
             SET status = %s, 
@@ -223,9 +582,115 @@ class RunManager:
                 error_message = %s,
                 log_file_path = COALESCE(%s, log_file_path)
             WHERE run_id = %s
+            RETURNING task_id, duration_seconds
         """
         params = (status, status, status, exit_code, error_message, log_file_path, run_id)
-        return self.db.execute_update(query, params) > 0
+        results = self.db.execute_query(query, params)
+        if not results:
+            return False
+        
+        duration = results[0]['duration_seconds']
+        event_bus.publish('run_status', {
+            'run_id': run_id,
+            'task_id': results[0]['task_id'],
+            'status': status,
+            'exit_code': exit_code,
+            'duration_seconds': float(duration) if duration is not None else None,
+            'error_message': error_message
+        })
+        
+        # Only successful runs feed the learned duration envelope
+        if record_duration and status == 'success' and results[0]['duration_seconds'] is not None:
+            try:
+                self.duration_stats.record_duration(
+                    results[0]['task_id'], float(results[0]['duration_seconds']))
+            except Exception as e:
+                logger.error(f"Failed to update duration stats for run {run_id}: {e}")
+        
+        if status in RunRollupManager.FINAL_STATUSES:
+            try:
+                self.rollups.record_run(run_id)
+            except Exception as e:
+                logger.error(f"Failed to update run rollups for run {run_id}: {e}")
+        
+        return True
+    
+    def set_log_file_path(self, run_id: int, log_file_path: str) -> bool:
+        """Record a run's log file as soon as it exists, so it can be followed live."""
+        query = f"UPDATE {self.schema}.task_runs SET log_file_path = %s WHERE run_id = %s"
+        return self.db.execute_update(query, (log_file_path, run_id)) > 0
+    
+    def set_profile_path(self, run_id: int, profile_path: str) -> bool:
+        """Link a profile artifact to a run."""
+        query = f"UPDATE {self.schema}.task_runs SET profile_path = %s WHERE run_id = %s"
+        return self.db.execute_update(query, (profile_path, run_id)) > 0
+    
+    def get_runs_to_compress(self, older_than_minutes: int, limit: int = 50,
+                             skip_prefix: str = None) -> List[Dict]:
+        """Runs finished a while ago whose log is still uncompressed, oldest first.
+        
+        Logs under skip_prefix (e.g. the spool, whose files are compressed on
+        shipping) are left out.
+        """
+        query = f"""
+            SELECT run_id, log_file_path
+            FROM {self.schema}.task_runs
+            WHERE log_file_path IS NOT NULL AND log_file_path NOT LIKE '%%.gz'
+              AND completed_at < LOCALTIMESTAMP - make_interval(mins => %s)
+        """
+        params = [older_than_minutes]
+        if skip_prefix:
+            query += " AND left(log_file_path, length(%s)) <> %s"
+            params += [skip_prefix, skip_prefix]
+        query += " ORDER BY completed_at LIMIT %s"
+        params.append(limit)
+        return self.db.execute_query(query, tuple(params))
+    
+    def get_runs_with_logs_before(self, older_than_days: int, limit: int = 500) -> List[Dict]:
+        """Runs older than the log retention window that still reference files."""
+        query = f"""
+            SELECT run_id, log_file_path, profile_path
+            FROM {self.schema}.task_runs
+            WHERE started_at < LOCALTIMESTAMP - make_interval(days => %s)
+              AND (log_file_path IS NOT NULL OR profile_path IS NOT NULL)
+            ORDER BY started_at
+            LIMIT %s
+        """
+        return self.db.execute_query(query, (older_than_days, limit))
+    
+    def get_runs_to_index(self, after_completed_at: datetime, after_run_id: int,
+                          limit: int = 200) -> List[Dict]:
+        """Finished runs with a log, in (completed_at, run_id) order after the given point."""
+        query = f"""
+            SELECT r.run_id, r.task_id, t.task_name, r.started_at, r.completed_at, r.log_file_path
+            FROM {self.schema}.task_runs r
+            JOIN {self.schema}.scheduler_tasks t ON r.task_id = t.task_id
+            WHERE r.completed_at IS NOT NULL AND r.log_file_path IS NOT NULL
+              AND (r.completed_at, r.run_id) > (%s, %s)
+            ORDER BY r.completed_at, r.run_id
+            LIMIT %s
+        """
+        return self.db.execute_query(query, (after_completed_at, after_run_id, limit))
+    
+    def clear_log_paths(self, run_ids: List[int]) -> int:
+        """Forget the log and profile files of runs whose files were removed."""
+        query = f"""
+            UPDATE {self.schema}.task_runs
+            SET log_file_path = NULL, profile_path = NULL
+            WHERE run_id = ANY(%s)
+        """
+        return self.db.execute_update(query, (list(run_ids),))
+    
+    def get_run(self, run_id: int) -> Optional[Dict]:
+        """Get a single run by ID."""
+        query = f"""
+            SELECT r.*, t.task_name
+            FROM {self.schema}.task_runs r
+            JOIN {self.schema}.scheduler_tasks t ON r.task_id = t.task_id
+            WHERE r.run_id = %s
+        """
+        results = self.db.execute_query(query, (run_id,))
+        return results[0] if results else None
     
     def get_recent_runs(self, task_id: int = None, limit: int = 100) -> List[Dict]:
         """Get recent task runs."""
@@ -251,6 +716,66 @@ class RunManager:
         
         return self.db.execute_query(query, params)
     
+    def _run_history_query(self, task_id: int = None, statuses: List[str] = None,
+                           triggered_by: str = None, since: datetime = None,
+                           until: datetime = None, after: tuple = None):
+        """Build the filtered run history query, newest first."""
+        conditions = ["r.started_at IS NOT NULL"]
+        params = []
+        if task_id:
+            conditions.append("r.task_id = %s")
+            params.append(task_id)
+        if statuses:
+            conditions.append("r.status = ANY(%s)")
+            params.append(list(statuses))
+        if triggered_by:
+            conditions.append("r.triggered_by = %s")
+            params.append(triggered_by)
+        if since:
+            conditions.append("r.started_at >= %s")
+            params.append(since)
+        if until:
+            conditions.append("r.started_at < %s")
+            params.append(until)
+        if after:
+            # Keyset: continue strictly after the last (started_at, run_id) seen
+            conditions.append("(r.started_at, r.run_id) < (%s, %s)")
+            params.extend(after)
+        
+        query = f"""
+            SELECT r.run_id, r.task_id, t.task_name, r.status, r.triggered_by,
+                   r.started_at, r.completed_at, r.duration_seconds, r.exit_code,
+                   r.error_message, r.log_file_path, r.machine_name, r.process_id
+            FROM {self.schema}.task_runs r
+            JOIN {self.schema}.scheduler_tasks t ON r.task_id = t.task_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY r.started_at DESC, r.run_id DESC
+        """
+        return query, params
+    
+    def get_run_history(self, limit: int = 100, **filters) -> List[Dict]:
+        """One page of run history; pass after=(started_at, run_id) for the next page."""
+        query, params = self._run_history_query(**filters)
+        return self.db.execute_query(query + " LIMIT %s", tuple(params + [limit]))
+    
+    def stream_run_history(self, limit: int = None, **filters):
+        """Iterate over all matching runs without loading them into memory."""
+        query, params = self._run_history_query(**filters)
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        return self.db.stream_query(query, tuple(params))
+    
+    def get_latest_runs(self) -> List[Dict]:
+        """Get the most recent run of every task."""
+        query = f"""
+            SELECT DISTINCT ON (r.task_id) r.*
+            FROM {self.schema}.task_runs r
+            WHERE COALESCE(r.triggered_by, '') <> ALL(%s)
+            ORDER BY r.task_id, r.started_at DESC
+        """
+        return self.db.execute_query(query, (DERIVED_RUN_TRIGGERS,))
+    
     def get_running_tasks(self) -> List[Dict]:
         """Get currently running tasks."""
         query = f"""
@@ -272,6 +797,7 @@ class RunManager:
                 SELECT 1 FROM {self.schema}.task_runs r
                 WHERE r.task_id = d.depends_on_task_id
                 AND r.started_at >= CURRENT_DATE
+                AND COALESCE(r.triggered_by, '') <> ALL(%s)
                 AND (
                     (d.dependency_type = 'success' AND r.status = 'success')
                     OR (d.dependency_type = 'completion' AND r.status IN ('success', 'failed'))
@@ -279,7 +805,7 @@ class RunManager:
                 )
             )
         """
-        result = self.db.execute_query(query, (task_id,))
+        result = self.db.execute_query(query, (task_id, DERIVED_RUN_TRIGGERS))
         return result[0]['unsatisfied_count'] == 0
     
     def create_run_dependency(self, run_id: int, depends_on_run_id: int):
@@ -290,15 +816,840 @@ class RunManager:
             VALUES (%s, %s)
         """
         return self.db.execute_update(query, (run_id, depends_on_run_id)) > 0
+    
+    def get_child_runs(self, run_id: int) -> List[Dict]:
+        """Runs a run depends on, e.g. the partition and gather runs of a fan-out run."""
+        query = f"""
+            SELECT r.run_id, r.status, r.triggered_by, r.started_at, r.completed_at,
+                   r.duration_seconds, r.exit_code, r.error_message, r.log_file_path
+            FROM {self.schema}.run_dependencies d
+            JOIN {self.schema}.task_runs r ON r.run_id = d.depends_on_run_id
+            WHERE d.run_id = %s
+            ORDER BY r.run_id
+        """
+        return self.db.execute_query(query, (run_id,))
+
+class DurationStatsManager:
+    """Maintains rolling per-task duration statistics."""
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.schema = SCHEMA_NAME
+        self.config = DURATION_STATS_CONFIG
+    
+    def ensure_schema(self):
+        """Create the duration stats table if it does not exist."""
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.task_duration_stats (
+                task_id INTEGER PRIMARY KEY
+                    REFERENCES {self.schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+                run_count INTEGER NOT NULL DEFAULT 0,
+                ewma_seconds DOUBLE PRECISION,
+                p50_seconds DOUBLE PRECISION,
+                p95_seconds DOUBLE PRECISION,
+                p99_seconds DOUBLE PRECISION,
+                stats JSONB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        self.db.execute_update(query)
+    
+    def new_stats(self) -> DurationStats:
+        return DurationStats(
+            ewma_alpha=self.config['ewma_alpha'],
+            relative_accuracy=self.config['sketch_relative_accuracy'],
+            window_runs=self.config['window_runs']
+        )
+    
+    def record_duration(self, task_id: int, duration_seconds: float) -> DurationStats:
+        """Fold a completed run into the task's stats under a row lock."""
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT stats FROM {self.schema}.task_duration_stats
+                WHERE task_id = %s
+                FOR UPDATE
+            """, (task_id,))
+            row = cursor.fetchone()
+            stats = DurationStats.from_dict(row['stats']) if row else self.new_stats()
+            stats.update(duration_seconds)
+            
+            summary = stats.summary()
+            cursor.execute(f"""
+                INSERT INTO {self.schema}.task_duration_stats
+                (task_id, run_count, ewma_seconds, p50_seconds, p95_seconds, p99_seconds, stats, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (task_id) DO UPDATE
+                SET run_count = EXCLUDED.run_count,
+                    ewma_seconds = EXCLUDED.ewma_seconds,
+                    p50_seconds = EXCLUDED.p50_seconds,
+                    p95_seconds = EXCLUDED.p95_seconds,
+                    p99_seconds = EXCLUDED.p99_seconds,
+                    stats = EXCLUDED.stats,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (task_id, summary['run_count'], summary['ewma_seconds'],
+                  summary['p50_seconds'], summary['p95_seconds'], summary['p99_seconds'],
+                  json.dumps(stats.to_dict())))
+        return stats
+    
+    def get_stats(self, task_id: int) -> Optional[DurationStats]:
+        """Get the learned duration stats for a task."""
+        query = f"SELECT stats FROM {self.schema}.task_duration_stats WHERE task_id = %s"
+        results = self.db.execute_query(query, (task_id,))
+        return DurationStats.from_dict(results[0]['stats']) if results else None
+    
+    def get_all_stats(self) -> List[Dict]:
+        """Get the summary columns for every task with recorded runs."""
+        query = f"""
+            SELECT s.task_id, t.task_name, s.run_count, s.ewma_seconds,
+                   s.p50_seconds, s.p95_seconds, s.p99_seconds, s.updated_at
+            FROM {self.schema}.task_duration_stats s
+            JOIN {self.schema}.scheduler_tasks t ON s.task_id = t.task_id
+            ORDER BY t.task_name
+        """
+        return self.db.execute_query(query)
+
+class ForecastManager:
+    """Stores the forecast of upcoming task fires for range queries."""
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.schema = SCHEMA_NAME
+    
+    def ensure_schema(self):
+        """Create the fire forecast table if it does not exist."""
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.task_fire_forecast (
+                task_id INTEGER NOT NULL
+                    REFERENCES {self.schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+                fire_time TIMESTAMP NOT NULL,
+                PRIMARY KEY (task_id, fire_time)
+            );
+            CREATE INDEX IF NOT EXISTS idx_task_fire_forecast_time
+                ON {self.schema}.task_fire_forecast (fire_time)
+        """
+        self.db.execute_update(query)
+    
+    def clear(self):
+        """Drop the whole forecast (rebuilt when the scheduler starts)."""
+        self.db.execute_update(f"DELETE FROM {self.schema}.task_fire_forecast")
+    
+    def replace_task(self, task_id: int, fire_times: List[datetime]):
+        """Replace a task's forecast in one transaction."""
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.schema}.task_fire_forecast WHERE task_id = %s", (task_id,))
+            self._insert(cursor, task_id, fire_times)
+    
+    def add_fires(self, task_id: int, fire_times: List[datetime]):
+        """Append fires when the horizon moves forward."""
+        if fire_times:
+            with self.db.get_cursor() as cursor:
+                self._insert(cursor, task_id, fire_times)
+    
+    def _insert(self, cursor, task_id: int, fire_times: List[datetime]):
+        execute_values(cursor, f"""
+            INSERT INTO {self.schema}.task_fire_forecast (task_id, fire_time)
+            VALUES %s
+            ON CONFLICT (task_id, fire_time) DO NOTHING
+        """, [(task_id, fire_time) for fire_time in fire_times], page_size=1000)
+    
+    def delete_tasks(self, task_ids: List[int]):
+        """Forget the forecast of unscheduled tasks."""
+        query = f"DELETE FROM {self.schema}.task_fire_forecast WHERE task_id = ANY(%s)"
+        self.db.execute_update(query, (list(task_ids),))
+    
+    def prune(self, before: datetime) -> int:
+        """Remove fires that are already in the past."""
+        query = f"DELETE FROM {self.schema}.task_fire_forecast WHERE fire_time < %s"
+        return self.db.execute_update(query, (before,))
+    
+    def get_timeline(self, start: datetime, end: datetime, task_id: int = None,
+                     default_seconds: float = 60) -> List[Dict]:
+        """Forecast fires between start and end with each task's expected duration (p50)."""
+        query = f"""
+            SELECT f.task_id, t.task_name, f.fire_time,
+                   COALESCE(s.p50_seconds, %s) AS expected_seconds
+            FROM {self.schema}.task_fire_forecast f
+            JOIN {self.schema}.scheduler_tasks t ON f.task_id = t.task_id
+            LEFT JOIN {self.schema}.task_duration_stats s ON f.task_id = s.task_id
+            WHERE f.fire_time >= %s AND f.fire_time < %s
+        """
+        params = [default_seconds, start, end]
+        if task_id:
+            query += " AND f.task_id = %s"
+            params.append(task_id)
+        query += " ORDER BY f.fire_time, t.task_name"
+        return self.db.execute_query(query, tuple(params))
+    
+    def get_max_expected_seconds(self, default_seconds: float = 60) -> float:
+        """Longest expected duration, i.e. how far back a run can still be in progress."""
+        query = f"SELECT MAX(p50_seconds) AS seconds FROM {self.schema}.task_duration_stats"
+        results = self.db.execute_query(query)
+        seconds = results[0]['seconds'] if results else None
+        return max(seconds or 0, default_seconds)
+
+class RunRollupManager:
+    """Maintains hourly per-task run rollups for analytics.
+    
+    Each finished run is folded into the bucket of the hour it started in,
+    exactly once (guarded by task_runs.rolled_up). Window queries read the
+    whole-hour buckets and scan only the partial hour at the window's start.
+    """
+    
+    FINAL_STATUSES = ('success', 'failed', 'timeout', 'skipped')
+    COUNTERS = ('total_runs', 'success_count', 'failed_count', 'timeout_count',
+                'skipped_count', 'retry_count', 'duration_count')
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.schema = SCHEMA_NAME
+        self.relative_accuracy = DURATION_STATS_CONFIG['sketch_relative_accuracy']
+    
+    def ensure_schema(self):
+        """Create the rollup table and the run flag that makes rollups idempotent."""
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.task_run_rollups (
+                task_id INTEGER NOT NULL
+                    REFERENCES {self.schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+                bucket_start TIMESTAMP NOT NULL,
+                total_runs INTEGER NOT NULL DEFAULT 0,
+                success_count INTEGER NOT NULL DEFAULT 0,
+                failed_count INTEGER NOT NULL DEFAULT 0,
+                timeout_count INTEGER NOT NULL DEFAULT 0,
+                skipped_count INTEGER NOT NULL DEFAULT 0,
+                retry_count INTEGER NOT NULL DEFAULT 0,
+                duration_count INTEGER NOT NULL DEFAULT 0,
+                duration_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+                duration_max DOUBLE PRECISION,
+                duration_sketch JSONB,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (task_id, bucket_start)
+            );
+            CREATE INDEX IF NOT EXISTS idx_task_run_rollups_bucket
+                ON {self.schema}.task_run_rollups (bucket_start);
+            ALTER TABLE {self.schema}.task_runs
+                ADD COLUMN IF NOT EXISTS rolled_up BOOLEAN NOT NULL DEFAULT false;
+            CREATE INDEX IF NOT EXISTS idx_task_runs_not_rolled_up
+                ON {self.schema}.task_runs (run_id) WHERE NOT rolled_up
+        """
+        self.db.execute_update(query)
+    
+    def new_bucket(self) -> Dict:
+        bucket = {name: 0 for name in self.COUNTERS}
+        bucket.update(duration_sum=0.0, duration_max=None,
+                      sketch=DurationSketch(self.relative_accuracy))
+        return bucket
+    
+    @staticmethod
+    def fold_run(bucket: Dict, status: str, triggered_by: str, duration_seconds):
+        """Add one finished run to an in-memory bucket."""
+        bucket['total_runs'] += 1
+        bucket[f'{status}_count'] += 1
+        if triggered_by == 'retry':
+            bucket['retry_count'] += 1
+        # Duration percentiles describe successful runs, like the duration envelope
+        if status == 'success' and duration_seconds is not None:
+            duration = float(duration_seconds)
+            bucket['duration_count'] += 1
+            bucket['duration_sum'] += duration
+            bucket['duration_max'] = max(bucket['duration_max'] or 0.0, duration)
+            bucket['sketch'].add(duration)
+    
+    def _load_bucket(self, row: Optional[Dict]) -> Dict:
+        bucket = self.new_bucket()
+        if row:
+            for name in self.COUNTERS:
+                bucket[name] = row[name]
+            bucket['duration_sum'] = row['duration_sum']
+            bucket['duration_max'] = row['duration_max']
+            if row['duration_sketch']:
+                bucket['sketch'] = DurationSketch.from_dict(row['duration_sketch'])
+        return bucket
+    
+    def _save_bucket(self, cursor, task_id: int, bucket_start: datetime, bucket: Dict):
+        cursor.execute(f"""
+            INSERT INTO {self.schema}.task_run_rollups
+            (task_id, bucket_start, total_runs, success_count, failed_count, timeout_count,
+             skipped_count, retry_count, duration_count, duration_sum, duration_max,
+             duration_sketch, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (task_id, bucket_start) DO UPDATE
+            SET total_runs = EXCLUDED.total_runs,
+                success_count = EXCLUDED.success_count,
+                failed_count = EXCLUDED.failed_count,
+                timeout_count = EXCLUDED.timeout_count,
+                skipped_count = EXCLUDED.skipped_count,
+                retry_count = EXCLUDED.retry_count,
+                duration_count = EXCLUDED.duration_count,
+                duration_sum = EXCLUDED.duration_sum,
+                duration_max = EXCLUDED.duration_max,
+                duration_sketch = EXCLUDED.duration_sketch,
+                updated_at = CURRENT_TIMESTAMP
+        """, (task_id, bucket_start, *(bucket[name] for name in self.COUNTERS),
+              bucket['duration_sum'], bucket['duration_max'],
+              json.dumps(bucket['sketch'].to_dict())))
+    
+    def record_run(self, run_id: int) -> bool:
+        """Fold a finished run into its hourly bucket; a no-op if already counted."""
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {self.schema}.task_runs
+                SET rolled_up = true
+                WHERE run_id = %s AND NOT rolled_up
+                  AND status = ANY(%s) AND started_at IS NOT NULL
+                  AND COALESCE(triggered_by, '') <> ALL(%s)
+                RETURNING task_id, status, triggered_by, duration_seconds,
+                          date_trunc('hour', started_at) AS bucket_start
+            """, (run_id, list(self.FINAL_STATUSES), DERIVED_RUN_TRIGGERS))
+            run = cursor.fetchone()
+            if not run:
+                return False
+            
+            cursor.execute(f"""
+                SELECT * FROM {self.schema}.task_run_rollups
+                WHERE task_id = %s AND bucket_start = %s
+                FOR UPDATE
+            """, (run['task_id'], run['bucket_start']))
+            bucket = self._load_bucket(cursor.fetchone())
+            self.fold_run(bucket, run['status'], run['triggered_by'], run['duration_seconds'])
+            self._save_bucket(cursor, run['task_id'], run['bucket_start'], bucket)
+        return True
+    
+    def rebuild(self, task_id: int = None) -> int:
+        """Recompute rollups from task_runs, one task per transaction; returns runs folded."""
+        if task_id:
+            task_ids = [task_id]
+        else:
+            rows = self.db.execute_query(f"SELECT task_id FROM {self.schema}.scheduler_tasks")
+            task_ids = [row['task_id'] for row in rows]
+        
+        folded = 0
+        for tid in task_ids:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.schema}.task_run_rollups WHERE task_id = %s", (tid,))
+                # Marking the runs locks them, so a concurrent record_run waits and then skips
+                cursor.execute(f"""
+                    UPDATE {self.schema}.task_runs
+                    SET rolled_up = (status = ANY(%s) AND started_at IS NOT NULL
+                                     AND COALESCE(triggered_by, '') <> ALL(%s))
+                    WHERE task_id = %s
+                    RETURNING rolled_up, status, triggered_by, duration_seconds,
+                              date_trunc('hour', started_at) AS bucket_start
+                """, (list(self.FINAL_STATUSES), DERIVED_RUN_TRIGGERS, tid))
+                buckets = {}
+                for run in cursor.fetchall():
+                    if not run['rolled_up']:
+                        continue
+                    bucket = buckets.setdefault(run['bucket_start'], self.new_bucket())
+                    self.fold_run(bucket, run['status'], run['triggered_by'], run['duration_seconds'])
+                    folded += 1
+                for bucket_start, bucket in buckets.items():
+                    self._save_bucket(cursor, tid, bucket_start, bucket)
+        return folded
+    
+    def backfill(self) -> int:
+        """Bring rollups up to date at startup: a full rebuild the first time, then
+        only finished runs that were missed (e.g. the scheduler stopped mid-update)."""
+        if not self.db.execute_query(f"SELECT 1 FROM {self.schema}.task_run_rollups LIMIT 1"):
+            return self.rebuild()
+        
+        rows = self.db.execute_query(f"""
+            SELECT run_id FROM {self.schema}.task_runs
+            WHERE NOT rolled_up AND status = ANY(%s)
+              AND COALESCE(triggered_by, '') <> ALL(%s)
+            ORDER BY run_id
+        """, (list(self.FINAL_STATUSES), DERIVED_RUN_TRIGGERS))
+        return sum(1 for row in rows if self.record_run(row['run_id']))
+    
+    def get_task_analytics(self, window_hours: int, task_id: int = None,
+                           now: datetime = None) -> List[Dict]:
+        """Per-task run analytics for the last window_hours, read from the rollups."""
+        if now is None:
+            # Run timestamps come from the database clock
+            now = self.db.execute_query("SELECT LOCALTIMESTAMP AS now")[0]['now']
+        window_start = now - timedelta(hours=window_hours)
+        # Whole buckets from the first full hour; the partial hour before it is scanned
+        first_full_hour = window_start.replace(minute=0, second=0, microsecond=0)
+        if first_full_hour < window_start:
+            first_full_hour += timedelta(hours=1)
+        
+        task_filter = "AND r.task_id = %s" if task_id else ""
+        task_params = (task_id,) if task_id else ()
+        
+        rollups = self.db.execute_query(f"""
+            SELECT r.* FROM {self.schema}.task_run_rollups r
+            WHERE r.bucket_start >= %s {task_filter}
+        """, (first_full_hour,) + task_params)
+        edge_runs = self.db.execute_query(f"""
+            SELECT r.task_id, r.status, r.triggered_by, r.duration_seconds
+            FROM {self.schema}.task_runs r
+            WHERE r.started_at >= %s AND r.started_at < %s AND r.rolled_up {task_filter}
+        """, (window_start, first_full_hour) + task_params)
+        
+        totals = {}
+        for row in rollups:
+            bucket = totals.setdefault(row['task_id'], self.new_bucket())
+            loaded = self._load_bucket(row)
+            for name in self.COUNTERS:
+                bucket[name] += loaded[name]
+            bucket['duration_sum'] += loaded['duration_sum']
+            if loaded['duration_max'] is not None:
+                bucket['duration_max'] = max(bucket['duration_max'] or 0.0, loaded['duration_max'])
+            bucket['sketch'].merge(loaded['sketch'])
+        for run in edge_runs:
+            bucket = totals.setdefault(run['task_id'], self.new_bucket())
+            self.fold_run(bucket, run['status'], run['triggered_by'], run['duration_seconds'])
+        
+        names = {}
+        if totals:
+            rows = self.db.execute_query(
+                f"SELECT task_id, task_name FROM {self.schema}.scheduler_tasks WHERE task_id = ANY(%s)",
+                (list(totals),))
+            names = {row['task_id']: row['task_name'] for row in rows}
+        
+        results = []
+        for tid, bucket in totals.items():
+            finished = bucket['success_count'] + bucket['failed_count'] + bucket['timeout_count']
+            sketch = bucket['sketch']
+            results.append({
+                'task_id': tid,
+                'task_name': names.get(tid),
+                'total_runs': bucket['total_runs'],
+                'success_count': bucket['success_count'],
+                'failed_count': bucket['failed_count'],
+                'timeout_count': bucket['timeout_count'],
+                'skipped_count': bucket['skipped_count'],
+                'retry_count': bucket['retry_count'],
+                'success_rate': round(bucket['success_count'] / finished, 4) if finished else None,
+                'mean_seconds': round(bucket['duration_sum'] / bucket['duration_count'], 3)
+                    if bucket['duration_count'] else None,
+                'p50_seconds': sketch.quantile(0.5),
+                'p95_seconds': sketch.quantile(0.95),
+                'p99_seconds': sketch.quantile(0.99),
+                'max_seconds': bucket['duration_max'],
+            })
+        results.sort(key=lambda r: r['task_name'] or '')
+        return results
+
+class RunQueueManager:
+    """Queue of runs waiting for a worker agent (dispatch mode).
+    
+    Workers claim items with FOR UPDATE SKIP LOCKED, so any number of them
+    can poll the same queue without handing one item out twice. A claimed
+    item stays in the table, with a heartbeat, until its run has finished.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.schema = SCHEMA_NAME
+    
+    def ensure_schema(self):
+        """Create the run queue table."""
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.run_queue (
+                queue_id BIGSERIAL PRIMARY KEY,
+                task_id INTEGER NOT NULL
+                    REFERENCES {self.schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+                retry_count INTEGER NOT NULL DEFAULT 0,
+                profile_mode VARCHAR(20),
+                triggered_by VARCHAR(50),
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                enqueued_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+                not_before TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+                claimed_by VARCHAR(200),
+                claimed_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                run_id INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_run_queue_pending
+                ON {self.schema}.run_queue (not_before, queue_id) WHERE status = 'pending';
+            CREATE INDEX IF NOT EXISTS idx_run_queue_task
+                ON {self.schema}.run_queue (task_id)
+        """
+        self.db.execute_update(query)
+    
+    def enqueue(self, task_id: int, retry_count: int = 0, profile_mode: str = None,
+                triggered_by: str = None, delay_seconds: float = 0,
+                skip_if_queued: bool = False) -> Optional[int]:
+        """Queue a run; returns its queue_id.
+        
+        With skip_if_queued nothing is queued (None is returned) while the task
+        already has a pending or running item, like max_instances=1 for a job.
+        """
+        query = f"""
+            INSERT INTO {self.schema}.run_queue
+                (task_id, retry_count, profile_mode, triggered_by, not_before)
+            SELECT %s, %s, %s, %s, LOCALTIMESTAMP + make_interval(secs => %s)
+        """
+        params = [task_id, retry_count, profile_mode, triggered_by, delay_seconds]
+        if skip_if_queued:
+            query += f" WHERE NOT EXISTS (SELECT 1 FROM {self.schema}.run_queue WHERE task_id = %s)"
+            params.append(task_id)
+        query += " RETURNING queue_id"
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            return row['queue_id'] if row else None
+    
+    def claim(self, worker: str, limit: int = 1) -> List[Dict]:
+        """Claim up to limit due items for worker, oldest first."""
+        query = f"""
+            UPDATE {self.schema}.run_queue q
+            SET status = 'claimed', claimed_by = %s,
+                claimed_at = LOCALTIMESTAMP, heartbeat_at = LOCALTIMESTAMP
+            WHERE q.queue_id IN (
+                SELECT queue_id FROM {self.schema}.run_queue
+                WHERE status = 'pending' AND not_before <= LOCALTIMESTAMP
+                ORDER BY not_before, queue_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING q.*
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, (worker, limit))
+            return sorted(cursor.fetchall(), key=lambda row: row['queue_id'])
+    
+    def set_run(self, queue_id: int, run_id: int):
+        """Record the run a claimed item turned into."""
+        query = f"UPDATE {self.schema}.run_queue SET run_id = %s WHERE queue_id = %s"
+        self.db.execute_update(query, (run_id, queue_id))
+    
+    def heartbeat(self, worker: str, queue_ids: List[int]) -> int:
+        """Extend the lease of the items worker is running."""
+        query = f"""
+            UPDATE {self.schema}.run_queue
+            SET heartbeat_at = LOCALTIMESTAMP
+            WHERE queue_id = ANY(%s) AND claimed_by = %s
+        """
+        return self.db.execute_update(query, (list(queue_ids), worker))
+    
+    def complete(self, queue_id: int):
+        """Remove a finished item; its outcome is in task_runs."""
+        self.db.execute_update(f"DELETE FROM {self.schema}.run_queue WHERE queue_id = %s", (queue_id,))
+    
+    def reclaim_expired(self, lease_seconds: int) -> List[Dict]:
+        """Remove and return claimed items whose worker stopped heartbeating."""
+        query = f"""
+            DELETE FROM {self.schema}.run_queue
+            WHERE queue_id IN (
+                SELECT queue_id FROM {self.schema}.run_queue
+                WHERE status = 'claimed'
+                  AND heartbeat_at < LOCALTIMESTAMP - make_interval(secs => %s)
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, (lease_seconds,))
+            return cursor.fetchall()
+    
+    def get_queue(self) -> List[Dict]:
+        """Queued and running items with their task names."""
+        query = f"""
+            SELECT q.*, t.task_name
+            FROM {self.schema}.run_queue q
+            JOIN {self.schema}.scheduler_tasks t ON q.task_id = t.task_id
+            ORDER BY q.status = 'pending', q.not_before, q.queue_id
+        """
+        return self.db.execute_query(query)
+
+class FireClaimManager:
+    """First-writer-wins claims on scheduled fires (sharded scheduling).
+    
+    While scheduler nodes briefly disagree about who owns a task, two of them
+    may fire it; only the node whose claim is inserted first runs it.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.schema = SCHEMA_NAME
+    
+    def ensure_schema(self):
+        """Create the fire claim table."""
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.task_fire_claims (
+                task_id INTEGER NOT NULL
+                    REFERENCES {self.schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+                fire_time TIMESTAMP NOT NULL,
+                node VARCHAR(200) NOT NULL,
+                claimed_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+                PRIMARY KEY (task_id, fire_time)
+            );
+            CREATE INDEX IF NOT EXISTS idx_task_fire_claims_claimed_at
+                ON {self.schema}.task_fire_claims (claimed_at)
+        """
+        self.db.execute_update(query)
+    
+    def claim(self, task_id: int, fire_time: datetime, node: str) -> bool:
+        """Claim one fire of a task for node; False if another node claimed it first."""
+        query = f"""
+            INSERT INTO {self.schema}.task_fire_claims (task_id, fire_time, node)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (task_id, fire_time) DO NOTHING
+            RETURNING node
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, (task_id, fire_time, node))
+            return cursor.fetchone() is not None
+    
+    def prune(self, older_than_days: int) -> int:
+        """Delete claims older than older_than_days."""
+        query = f"""
+            DELETE FROM {self.schema}.task_fire_claims
+            WHERE claimed_at < LOCALTIMESTAMP - make_interval(days => %s)
+        """
+        return self.db.execute_update(query, (older_than_days,))
+
+class BackfillManager:
+    """Backfill jobs: one run of a task per logical date in a range.
+    
+    Progress lives in backfill_items, so a job resumes after a restart. A
+    job is run by one scheduler node at a time, which holds it with a
+    heartbeat; another node adopts it once the heartbeat is older than the
+    lease.
+    """
+    
+    ACTIVE_STATUSES = ('pending', 'running')
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.schema = SCHEMA_NAME
+    
+    def ensure_schema(self):
+        """Create the backfill tables."""
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.backfill_jobs (
+                backfill_id BIGSERIAL PRIMARY KEY,
+                task_id INTEGER NOT NULL
+                    REFERENCES {self.schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+                start_date DATE NOT NULL,
+                end_date DATE NOT NULL,
+                max_parallel INTEGER NOT NULL DEFAULT 1,
+                pass_as VARCHAR(10) NOT NULL DEFAULT 'env',
+                skip_succeeded BOOLEAN NOT NULL DEFAULT true,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                requested_by VARCHAR(100),
+                created_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+                started_at TIMESTAMP,
+                completed_at TIMESTAMP,
+                claimed_by VARCHAR(200),
+                heartbeat_at TIMESTAMP,
+                error_message TEXT
+            );
+            CREATE TABLE IF NOT EXISTS {self.schema}.backfill_items (
+                backfill_id BIGINT NOT NULL
+                    REFERENCES {self.schema}.backfill_jobs(backfill_id) ON DELETE CASCADE,
+                logical_date DATE NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_id INTEGER,
+                updated_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+                PRIMARY KEY (backfill_id, logical_date)
+            );
+            CREATE INDEX IF NOT EXISTS idx_backfill_jobs_active
+                ON {self.schema}.backfill_jobs (backfill_id) WHERE status IN ('pending', 'running');
+            CREATE INDEX IF NOT EXISTS idx_backfill_items_pending
+                ON {self.schema}.backfill_items (backfill_id, logical_date) WHERE status = 'pending'
+        """
+        self.db.execute_update(query)
+    
+    def create_job(self, task_id: int, start_date, end_date, max_parallel: int = 1,
+                   pass_as: str = 'env', skip_succeeded: bool = True, requested_by: str = None) -> int:
+        """Create a job with one pending item per date from start_date to end_date."""
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {self.schema}.backfill_jobs
+                    (task_id, start_date, end_date, max_parallel, pass_as, skip_succeeded, requested_by)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING backfill_id
+            """, (task_id, start_date, end_date, max_parallel, pass_as, skip_succeeded, requested_by))
+            backfill_id = cursor.fetchone()['backfill_id']
+            cursor.execute(f"""
+                INSERT INTO {self.schema}.backfill_items (backfill_id, logical_date)
+                SELECT %s, d::date FROM generate_series(%s::date, %s::date, INTERVAL '1 day') AS d
+            """, (backfill_id, start_date, end_date))
+            if skip_succeeded:
+                self.skip_succeeded(backfill_id, cursor)
+        return backfill_id
+    
+    def skip_succeeded(self, backfill_id: int, cursor=None) -> int:
+        """Mark pending dates the task already has a successful run for as skipped.
+        
+        A backfill run counts for its logical date; the task's own runs count
+        for the day they started.
+        """
+        query = f"""
+            UPDATE {self.schema}.backfill_items i
+            SET status = 'skipped', updated_at = LOCALTIMESTAMP
+            FROM {self.schema}.backfill_jobs j
+            WHERE i.backfill_id = %s AND j.backfill_id = i.backfill_id AND i.status = 'pending'
+              AND EXISTS (
+                  SELECT 1 FROM {self.schema}.task_runs r
+                  WHERE r.task_id = j.task_id AND r.status = 'success'
+                    AND (r.logical_date = i.logical_date
+                         OR (r.logical_date IS NULL AND r.started_at::date = i.logical_date
+                             AND COALESCE(r.triggered_by, '') <> ALL(%s)))
+              )
+        """
+        params = (backfill_id, DERIVED_RUN_TRIGGERS)
+        if cursor is not None:
+            cursor.execute(query, params)
+            return cursor.rowcount
+        return self.db.execute_update(query, params)
+    
+    def claim_jobs(self, node: str, lease_seconds: int) -> List[Dict]:
+        """Take (or keep) the active jobs that are free, ours, or whose node stopped heartbeating."""
+        query = f"""
+            UPDATE {self.schema}.backfill_jobs j
+            SET claimed_by = %s, heartbeat_at = LOCALTIMESTAMP, status = 'running',
+                started_at = COALESCE(j.started_at, LOCALTIMESTAMP)
+            WHERE j.backfill_id IN (
+                SELECT backfill_id FROM {self.schema}.backfill_jobs
+                WHERE status IN ('pending', 'running')
+                  AND (claimed_by IS NULL OR claimed_by = %s
+                       OR heartbeat_at < LOCALTIMESTAMP - make_interval(secs => %s))
+                ORDER BY backfill_id
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING j.*
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, (node, node, lease_seconds))
+            return sorted(cursor.fetchall(), key=lambda row: row['backfill_id'])
+    
+    def requeue_interrupted(self, backfill_id: int) -> int:
+        """Put dates left running by a stopped node back in the queue and fail their runs."""
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {self.schema}.task_runs
+                SET status = 'failed', completed_at = CURRENT_TIMESTAMP,
+                    error_message = 'Interrupted: the scheduler running this backfill stopped'
+                WHERE status IN ('pending', 'running') AND run_id IN (
+                    SELECT run_id FROM {self.schema}.backfill_items
+                    WHERE backfill_id = %s AND status = 'running'
+                )
+            """, (backfill_id,))
+            cursor.execute(f"""
+                UPDATE {self.schema}.backfill_items
+                SET status = 'pending', run_id = NULL, updated_at = LOCALTIMESTAMP
+                WHERE backfill_id = %s AND status = 'running'
+            """, (backfill_id,))
+            return cursor.rowcount
+    
+    def claim_items(self, backfill_id: int, limit: int) -> List[Dict]:
+        """Mark up to limit pending dates as running, oldest first."""
+        query = f"""
+            UPDATE {self.schema}.backfill_items i
+            SET status = 'running', attempts = i.attempts + 1, updated_at = LOCALTIMESTAMP
+            WHERE i.backfill_id = %s AND i.logical_date IN (
+                SELECT logical_date FROM {self.schema}.backfill_items
+                WHERE backfill_id = %s AND status = 'pending'
+                ORDER BY logical_date
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING i.*
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, (backfill_id, backfill_id, limit))
+            return sorted(cursor.fetchall(), key=lambda row: row['logical_date'])
+    
+    def set_item_run(self, backfill_id: int, logical_date, run_id: int):
+        """Record the run started for a date."""
+        query = f"""
+            UPDATE {self.schema}.backfill_items SET run_id = %s, updated_at = LOCALTIMESTAMP
+            WHERE backfill_id = %s AND logical_date = %s
+        """
+        self.db.execute_update(query, (run_id, backfill_id, logical_date))
+    
+    def finish_item(self, backfill_id: int, logical_date, status: str, max_attempts: int) -> str:
+        """Record a date's outcome; a failed date goes back in the queue until max_attempts. Returns its new status."""
+        query = f"""
+            UPDATE {self.schema}.backfill_items
+            SET status = CASE WHEN %s = 'success' THEN 'success'
+                              WHEN attempts < %s THEN 'pending'
+                              ELSE 'failed' END,
+                updated_at = LOCALTIMESTAMP
+            WHERE backfill_id = %s AND logical_date = %s
+            RETURNING status
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, (status, max_attempts, backfill_id, logical_date))
+            row = cursor.fetchone()
+            return row['status'] if row else None
+    
+    def finish_job_if_done(self, backfill_id: int) -> Optional[str]:
+        """Complete a job with no pending or running dates left; returns its final status."""
+        query = f"""
+            UPDATE {self.schema}.backfill_jobs j
+            SET status = CASE WHEN EXISTS (
+                    SELECT 1 FROM {self.schema}.backfill_items
+                    WHERE backfill_id = j.backfill_id AND status = 'failed'
+                ) THEN 'failed' ELSE 'completed' END,
+                completed_at = LOCALTIMESTAMP, claimed_by = NULL
+            WHERE j.backfill_id = %s AND j.status = 'running'
+              AND NOT EXISTS (
+                  SELECT 1 FROM {self.schema}.backfill_items
+                  WHERE backfill_id = j.backfill_id AND status IN ('pending', 'running')
+              )
+            RETURNING j.status
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, (backfill_id,))
+            row = cursor.fetchone()
+            return row['status'] if row else None
+    
+    def cancel_job(self, backfill_id: int) -> bool:
+        """Stop starting dates for a job; dates already running finish."""
+        query = f"""
+            UPDATE {self.schema}.backfill_jobs
+            SET status = 'cancelled', completed_at = LOCALTIMESTAMP, claimed_by = NULL
+            WHERE backfill_id = %s AND status IN ('pending', 'running')
+        """
+        return self.db.execute_update(query, (backfill_id,)) > 0
+    
+    def get_jobs(self, limit: int = 50, backfill_id: int = None) -> List[Dict]:
+        """Jobs, newest first, with their task name and a count of dates per status."""
+        query = f"""
+            SELECT j.*, t.task_name,
+                   COUNT(i.logical_date) AS total,
+                   COUNT(*) FILTER (WHERE i.status = 'pending') AS pending,
+                   COUNT(*) FILTER (WHERE i.status = 'running') AS running,
+                   COUNT(*) FILTER (WHERE i.status = 'success') AS succeeded,
+                   COUNT(*) FILTER (WHERE i.status = 'skipped') AS skipped,
+                   COUNT(*) FILTER (WHERE i.status = 'failed') AS failed
+            FROM {self.schema}.backfill_jobs j
+            JOIN {self.schema}.scheduler_tasks t ON t.task_id = j.task_id
+            LEFT JOIN {self.schema}.backfill_items i ON i.backfill_id = j.backfill_id
+            {'WHERE j.backfill_id = %s' if backfill_id else ''}
+            GROUP BY j.backfill_id, t.task_name
+            ORDER BY j.backfill_id DESC
+            LIMIT %s
+        """
+        params = (backfill_id, limit) if backfill_id else (limit,)
+        return self.db.execute_query(query, params)
+    
+    def get_items(self, backfill_id: int) -> List[Dict]:
+        """A job's dates with their latest run."""
+        query = f"""
+            SELECT i.logical_date, i.status, i.attempts, i.run_id, i.updated_at,
+                   r.status AS run_status, r.duration_seconds, r.error_message
+            FROM {self.schema}.backfill_items i
+            LEFT JOIN {self.schema}.task_runs r ON r.run_id = i.run_id
+            WHERE i.backfill_id = %s
+            ORDER BY i.logical_date
+        """
+        return self.db.execute_query(query, (backfill_id,))
 
 class HealthManager:
     """Manages service health monitoring."""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, service_name: str = "PythonSchedulerService",
+                 machine_name: str = None):
         self.db = db_manager
         self.schema = SCHEMA_NAME
-        self.service_name = "PythonSchedulerService"
-        self.machine_name = os.environ.get('COMPUTERNAME', 'unknown')
+        self.service_name = service_name
+        self.machine_name = machine_name or os.environ.get('COMPUTERNAME', 'unknown')
     
     def update_heartbeat(self, status: str = 'healthy', metrics: Dict = None):
         """Update service heartbeat."""
@@ -327,6 +1678,27 @@ class HealthManager:
         
         return True
     
+    def touch(self):
+        """Refresh this node's heartbeat without changing its metrics."""
+        query_update = f"""
+            UPDATE {self.schema}.scheduler_health
+            SET last_heartbeat = CURRENT_TIMESTAMP,
+                status = CASE WHEN status = 'offline' THEN 'healthy' ELSE status END
+            WHERE service_name = %s AND machine_name = %s
+        """
+        if self.db.execute_update(query_update, (self.service_name, self.machine_name)) == 0:
+            self.update_heartbeat()
+    
+    def get_members(self, timeout_seconds: float) -> List[str]:
+        """Nodes of this service that heartbeated within timeout_seconds, sorted."""
+        query = f"""
+            SELECT DISTINCT machine_name FROM {self.schema}.scheduler_health
+            WHERE service_name = %s AND status <> 'offline'
+              AND last_heartbeat > CURRENT_TIMESTAMP - make_interval(secs => %s)
+            ORDER BY machine_name
+        """
+        return [row['machine_name'] for row in self.db.execute_query(query, (self.service_name, timeout_seconds))]
+    
     def get_service_health(self) -> List[Dict]:
         """Get health status of all services."""
         query = f"""
@@ -353,8 +1725,34 @@ class AlertManager:
             RETURNING alert_id
         """
         details_json = json.dumps(details) if details else None
-        return self.db.execute_insert(query, 
+        alert_id = self.db.execute_insert(query, 
             (alert_type, severity, message, task_id, run_id, details_json))
+        
+        event_bus.publish('alert', {
+            'alert_id': alert_id,
+            'alert_type': alert_type,
+            'severity': severity,
+            'message': message,
+            'task_id': task_id,
+            'run_id': run_id
+        })
+        return alert_id
+    
+    def create_duration_regression_alert(self, task_id: int, run_id: int, task_name: str,
+                                         elapsed_seconds: float, envelope_seconds: float,
+                                         stats: Dict = None):
+        """Raise an alert for a run that has outlived its learned duration envelope."""
+        details = {
+            'elapsed_seconds': round(elapsed_seconds, 1),
+            'envelope_seconds': round(envelope_seconds, 1),
+            'stats': stats
+        }
+        return self.create_alert(
+            'duration_regression', 'warning',
+            f"Task {task_name} has run {elapsed_seconds:.0f}s, past its learned "
+            f"envelope of {envelope_seconds:.0f}s",
+            task_id=task_id, run_id=run_id, details=details
+        )
     
     def get_unacknowledged_alerts(self, severity: str = None) -> List[Dict]:
         """Get unacknowledged alerts."""
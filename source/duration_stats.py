@@ -0,0 +1,175 @@
+# SchedulerService/duration_stats.py
+"""
+Incrementally maintained run duration statistics.
+Keeps an EWMA and a decaying log-bucket quantile sketch per task so p50/p95/p99
+can be answered without scanning task_runs.
+"""
+
+import math
+from typing import Dict, Optional
+
+
+class DurationSketch:
+    """Log-bucketed quantile sketch with bounded relative error.
+
+    Every value lands in bucket ceil(log_gamma(x)); any quantile estimate is
+    within `relative_accuracy` of the true value. Bucket counts decay by
+    `decay` on each insert so the sketch tracks the recent window of runs.
+    """
+
+    MIN_VALUE = 1e-3  # durations below 1 ms share the zero bucket
+
+    def __init__(self, relative_accuracy: float = 0.01, decay: float = 1.0,
+                 bins: Dict[int, float] = None, zero_count: float = 0.0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.decay = decay
+        self.bins = bins or {}
+        self.zero_count = zero_count
+
+    @property
+    def count(self) -> float:
+        return self.zero_count + sum(self.bins.values())
+
+    def _decay(self):
+        if self.decay >= 1.0:
+            return
+        self.zero_count *= self.decay
+        for key in list(self.bins):
+            self.bins[key] *= self.decay
+            if self.bins[key] < 1e-3:
+                del self.bins[key]
+
+    def add(self, value: float):
+        """Insert a value, decaying older observations first."""
+        self._decay()
+        if value < self.MIN_VALUE:
+            self.zero_count += 1
+            return
+        key = int(math.ceil(math.log(value) / self.log_gamma))
+        self.bins[key] = self.bins.get(key, 0.0) + 1
+
+    def merge(self, other: 'DurationSketch'):
+        """Fold another sketch with the same accuracy into this one."""
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0.0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0 <= q <= 1)."""
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * total
+        seen = self.zero_count
+        if seen >= rank and self.zero_count > 0:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen >= rank:
+                # Midpoint of the bucket in log space
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'decay': self.decay,
+            'zero_count': round(self.zero_count, 6),
+            'bins': {str(k): round(v, 6) for k, v in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DurationSketch':
+        return cls(
+            relative_accuracy=data.get('relative_accuracy', 0.01),
+            decay=data.get('decay', 1.0),
+            bins={int(k): float(v) for k, v in data.get('bins', {}).items()},
+            zero_count=float(data.get('zero_count', 0.0)),
+        )
+
+
+class DurationStats:
+    """Rolling duration statistics for a single task."""
+
+    def __init__(self, ewma_alpha: float = 0.2, relative_accuracy: float = 0.01,
+                 window_runs: int = 200):
+        self.ewma_alpha = ewma_alpha
+        self.run_count = 0
+        self.ewma = None
+        self.ewm_variance = 0.0
+        self.last_duration = None
+        # Exponential decay with a mean lifetime of `window_runs` observations
+        decay = 1.0 - 1.0 / window_runs if window_runs else 1.0
+        self.sketch = DurationSketch(relative_accuracy, decay)
+
+    def update(self, duration: float):
+        """Fold one completed run duration (seconds) into the stats."""
+        duration = max(float(duration), 0.0)
+        self.run_count += 1
+        self.last_duration = duration
+        if self.ewma is None:
+            self.ewma = duration
+        else:
+            # Incremental EWMA / EW variance (West, 1979)
+            diff = duration - self.ewma
+            increment = self.ewma_alpha * diff
+            self.ewma += increment
+            self.ewm_variance = (1 - self.ewma_alpha) * (self.ewm_variance + diff * increment)
+        self.sketch.add(duration)
+
+    @property
+    def ewm_stddev(self) -> float:
+        return math.sqrt(self.ewm_variance)
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.sketch.quantile(q)
+
+    def envelope(self, factor: float, quantile: float = 0.99) -> Optional[float]:
+        """Upper bound of expected durations: factor x the chosen quantile."""
+        value = self.quantile(quantile)
+        return value * factor if value is not None else None
+
+    def adaptive_timeout(self, factor: float, min_seconds: float,
+                         max_seconds: float) -> Optional[float]:
+        """k x p99, clamped to [min_seconds, max_seconds]."""
+        p99 = self.quantile(0.99)
+        if p99 is None:
+            return None
+        return min(max(p99 * factor, min_seconds), max_seconds)
+
+    def summary(self) -> Dict:
+        return {
+            'run_count': self.run_count,
+            'ewma_seconds': round(self.ewma, 3) if self.ewma is not None else None,
+            'ewm_stddev_seconds': round(self.ewm_stddev, 3),
+            'last_seconds': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'p50_seconds': _round(self.quantile(0.50)),
+            'p95_seconds': _round(self.quantile(0.95)),
+            'p99_seconds': _round(self.quantile(0.99)),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'ewma_alpha': self.ewma_alpha,
+            'run_count': self.run_count,
+            'ewma': self.ewma,
+            'ewm_variance': self.ewm_variance,
+            'last_duration': self.last_duration,
+            'sketch': self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DurationStats':
+        stats = cls(ewma_alpha=data.get('ewma_alpha', 0.2))
+        stats.run_count = data.get('run_count', 0)
+        stats.ewma = data.get('ewma')
+        stats.ewm_variance = data.get('ewm_variance', 0.0)
+        stats.last_duration = data.get('last_duration')
+        stats.sketch = DurationSketch.from_dict(data.get('sketch', {}))
+        return stats
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
@@ -0,0 +1,85 @@
+# SchedulerService/event_bus.py
+"""
+In-process publish/subscribe bus for run, alert and job state changes.
+Keeps a bounded history so Server-Sent Events clients can resume from their
+Last-Event-ID after a reconnect.
+"""
+
+import json
+import time
+import threading
+from collections import deque, namedtuple
+from typing import List, Optional, Tuple
+
+from production_config import EVENTS_CONFIG
+
+Event = namedtuple('Event', ['id', 'seq', 'type', 'data', 'timestamp'])
+
+
+class EventBus:
+    """Thread-safe event bus with replay.
+
+    Event ids have the form "<boot>.<seq>": seq increases monotonically and
+    boot changes on every process start, so a client holding an id from a
+    previous run is told to reset instead of silently missing events.
+    """
+
+    def __init__(self, history_size: int = 1000):
+        self.boot_id = str(int(time.time()))
+        self._events = deque(maxlen=history_size)
+        self._condition = threading.Condition()
+        self._seq = 0
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.boot_id}.{self._seq}"
+
+    def publish(self, event_type: str, data: dict) -> Event:
+        """Record an event and wake all waiting subscribers."""
+        with self._condition:
+            self._seq += 1
+            event = Event(f"{self.boot_id}.{self._seq}", self._seq, event_type, data, time.time())
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def _parse_seq(self, last_event_id: Optional[str]) -> Optional[int]:
+        """Sequence number for an id from this boot, or None if it can't be resumed."""
+        if not last_event_id:
+            return None
+        boot, _, seq = str(last_event_id).partition('.')
+        if boot != self.boot_id or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def events_since(self, last_event_id: Optional[str]) -> Tuple[List[Event], bool]:
+        """Events after last_event_id, and whether the client must reset its state.
+
+        A reset is needed when the id belongs to a previous boot or has already
+        fallen out of the retained history.
+        """
+        seq = self._parse_seq(last_event_id)
+        with self._condition:
+            if seq is None:
+                # New client (no id) starts from now; an unknown id needs a reset
+                return [], bool(last_event_id)
+            if self._events and seq < self._events[0].seq - 1:
+                return list(self._events), True
+            return [e for e in self._events if e.seq > seq], False
+
+    def wait_for_events(self, last_event_id: str, timeout: float) -> List[Event]:
+        """Block until events newer than last_event_id exist, or the timeout expires."""
+        seq = self._parse_seq(last_event_id) or 0
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > seq, timeout=timeout)
+            return [e for e in self._events if e.seq > seq]
+
+
+def format_sse(event: Event) -> str:
+    """Serialise an event in text/event-stream format."""
+    payload = json.dumps(dict(event.data, timestamp=event.timestamp), default=str)
+    return f"id: {event.id}\nevent: {event.type}\ndata: {payload}\n\n"
+
+
+# Process-wide bus shared by the managers, the scheduler and the dashboard
+event_bus = EventBus(EVENTS_CONFIG['history_size'])
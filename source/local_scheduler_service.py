@@ -176,7 +176,8 @@ def setup_logging():
     )
     return logging.getLogger('LocalSchedulerService')
 
-logger = setup_logging()
+# Set up in __main__ only: callable pool workers (spawn) import this module as __mp_main__
+logger = logging.getLogger('LocalSchedulerService')
 
 class IntegratedSchedulerService:
     def __init__(self):
@@ -197,22 +198,12 @@ class IntegratedSchedulerService:
             logger.info("Injecting scheduler into dashboard application context...")
             app.config['SCHEDULER'] = self.scheduler_instance
 
-            # 3. Start the dashboard in a background thread
-            def run_dashboard():
-                try:
-                    logger.info("Starting dashboard server...")
-                    app.run(
-                        host=production_config.DASHBOARD_CONFIG['host'],
-                        port=production_config.DASHBOARD_CONFIG['port'],
-                        debug=False, # Debug should be off for a service
-                        use_reloader=False
-                    )
-                except Exception as e:
-                    logger.error(f"Dashboard thread error: {e}", exc_info=True)
-
-            self.dashboard_thread = threading.Thread(target=run_dashboard, daemon=True)
-            self.dashboard_thread.start()
-            logger.info("Dashboard thread started")
+            # 3. Start the dashboard in a background thread, unless it runs as its own
+            #    process (dashboard_server.py) reading the scheduler's status channel
+            if production_config.DASHBOARD_CONFIG.get('mode') == 'standalone':
+                logger.info("Dashboard mode is standalone; start it with dashboard_server.py")
+            else:
+                self.start_dashboard()
 
             # 4. Start the scheduler's main loop (this will block)
             logger.info("Starting scheduler main loop...")
@@ -224,6 +215,24 @@ class IntegratedSchedulerService:
         finally:
             self.stop()
     
+    def start_dashboard(self):
+        """Run the Flask dashboard in a daemon thread of this process."""
+        def run_dashboard():
+            try:
+                logger.info("Starting dashboard server...")
+                app.run(
+                    host=production_config.DASHBOARD_CONFIG['host'],
+                    port=production_config.DASHBOARD_CONFIG['port'],
+                    debug=False, # Debug should be off for a service
+                    use_reloader=False
+                )
+            except Exception as e:
+                logger.error(f"Dashboard thread error: {e}", exc_info=True)
+
+        self.dashboard_thread = threading.Thread(target=run_dashboard, name='Dashboard', daemon=True)
+        self.dashboard_thread.start()
+        logger.info("Dashboard thread started")
+    
     def stop(self):
         """Stop the service."""
         logger.info("Stopping Integrated Scheduler Service...")
@@ -237,5 +246,6 @@ class IntegratedSchedulerService:
         logger.info("Service stopped")
 
 if __name__ == '__main__':
+    logger = setup_logging()
     service = IntegratedSchedulerService()
     service.start()
\ No newline at end of file
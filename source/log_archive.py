@@ -0,0 +1,168 @@
+# SchedulerService/log_archive.py
+"""
+Seekable compressed log archive.
+A log is stored as a series of independent gzip members, one per fixed-size
+block of the original, followed by empty members whose gzip extra fields hold
+the block index (continued over more members for logs of more than ~16k
+blocks) and a fixed-size locator for it. The file is still a
+plain .gz for gzip/zcat, but a byte range or the tail of the original can be
+read by decompressing only the blocks that cover it.
+"""
+
+import os
+import sys
+import gzip
+import zlib
+import struct
+import bisect
+from typing import Iterator, List, Tuple
+
+ARCHIVE_SUFFIX = '.gz'
+BLOCK_SIZE = 256 * 1024
+
+_INDEX_ID = b'SI'
+_INDEX_MORE_ID = b'SJ'
+_LOCATOR_ID = b'SL'
+_EMPTY_DEFLATE = b'\x03\x00'
+# Header (10) + XLEN (2) + subfield id/len (4) + 8-byte offset + empty deflate (2) + CRC/ISIZE (8)
+_LOCATOR_SIZE = 34
+# Block lengths per index member: XLEN is 16 bits and includes the 4-byte subfield header
+_MAX_SUBFIELD = 0xFFFF - 4
+_FIRST_INDEX_LENGTHS = (_MAX_SUBFIELD - 12) // 4
+_MORE_INDEX_LENGTHS = _MAX_SUBFIELD // 4
+
+
+def _extra_member(subfield_id: bytes, data: bytes) -> bytes:
+    """An empty gzip member carrying data in an FEXTRA subfield (ignored by gzip tools)."""
+    subfield = subfield_id + struct.pack('<H', len(data)) + data
+    header = b'\x1f\x8b\x08\x04' + b'\x00\x00\x00\x00' + b'\x00\xff' + struct.pack('<H', len(subfield))
+    return header + subfield + _EMPTY_DEFLATE + struct.pack('<II', 0, 0)
+
+
+def _read_extra(member: bytes, subfield_id: bytes) -> bytes:
+    xlen, = struct.unpack_from('<H', member, 10)
+    if member[:4] != b'\x1f\x8b\x08\x04' or member[12:14] != subfield_id:
+        raise ValueError("Not an indexed log archive")
+    length, = struct.unpack_from('<H', member, 14)
+    return member[16:16 + min(length, xlen - 4)]
+
+
+def compress_file(source: str, dest: str = None, block_size: int = BLOCK_SIZE,
+                  compress_level: int = 6) -> str:
+    """Write source as an indexed block-gzip archive (default source + '.gz')."""
+    dest = dest or source + ARCHIVE_SUFFIX
+    partial = dest + '.partial'
+    lengths = []
+    size = 0
+    try:
+        with open(source, 'rb') as fin, open(partial, 'wb') as fout:
+            while True:
+                data = fin.read(block_size)
+                if not data:
+                    break
+                member = gzip.compress(data, compresslevel=compress_level, mtime=0)
+                fout.write(member)
+                lengths.append(len(member))
+                size += len(data)
+            index_offset = fout.tell()
+            first = lengths[:_FIRST_INDEX_LENGTHS]
+            fout.write(_extra_member(_INDEX_ID, struct.pack('<IQ', block_size, size)
+                                     + struct.pack(f'<{len(first)}I', *first)))
+            for i in range(len(first), len(lengths), _MORE_INDEX_LENGTHS):
+                more = lengths[i:i + _MORE_INDEX_LENGTHS]
+                fout.write(_extra_member(_INDEX_MORE_ID, struct.pack(f'<{len(more)}I', *more)))
+            fout.write(_extra_member(_LOCATOR_ID, struct.pack('<Q', index_offset)))
+        os.replace(partial, dest)
+    except Exception:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return dest
+
+
+def is_archived(path: str) -> bool:
+    """True for a .gz written by compress_file."""
+    if not path.endswith(ARCHIVE_SUFFIX):
+        return False
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < _LOCATOR_SIZE:
+                return False
+            f.seek(-_LOCATOR_SIZE, os.SEEK_END)
+            _read_extra(f.read(_LOCATOR_SIZE), _LOCATOR_ID)
+        return True
+    except (OSError, ValueError, struct.error):
+        return False
+
+
+class ArchivedLog:
+    """Random access to the uncompressed contents of an indexed archive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            locator_offset = f.seek(-_LOCATOR_SIZE, os.SEEK_END)
+            index_offset, = struct.unpack('<Q', _read_extra(f.read(_LOCATOR_SIZE), _LOCATOR_ID))
+            f.seek(index_offset)
+            members = f.read(locator_offset - index_offset)
+        index = _read_extra(members, _INDEX_ID)
+        self.block_size, self.size = struct.unpack_from('<IQ', index)
+        lengths = list(struct.unpack_from(f'<{(len(index) - 12) // 4}I', index, 12))
+        # Continuation members follow the first; each is 22 bytes plus its XLEN
+        position = 0
+        while True:
+            position += 22 + struct.unpack_from('<H', members, position + 10)[0]
+            if position >= len(members):
+                break
+            more = _read_extra(members[position:], _INDEX_MORE_ID)
+            lengths.extend(struct.unpack(f'<{len(more) // 4}I', more))
+        # Compressed offset of each block; block i holds bytes [i * block_size, (i + 1) * block_size)
+        self.offsets: List[Tuple[int, int]] = []
+        position = 0
+        for length in lengths:
+            self.offsets.append((position, length))
+            position += length
+        self._starts = [i * self.block_size for i in range(len(self.offsets))]
+
+    def _block(self, f, i: int) -> bytes:
+        offset, length = self.offsets[i]
+        f.seek(offset)
+        return zlib.decompress(f.read(length), 16 + zlib.MAX_WBITS)
+
+    def read_range(self, start: int, end: int) -> Iterator[bytes]:
+        """Yield the uncompressed bytes start..end (inclusive), one block at a time."""
+        end = min(end, self.size - 1)
+        if start > end:
+            return
+        with open(self.path, 'rb') as f:
+            for i in range(bisect.bisect_right(self._starts, start) - 1, len(self.offsets)):
+                block_start = self._starts[i]
+                if block_start > end:
+                    break
+                data = self._block(f, i)
+                yield data[max(0, start - block_start):end - block_start + 1]
+
+    def reverse_blocks(self) -> Iterator[Tuple[int, bytes]]:
+        """Yield (offset, data) for each block from the end of the log backwards."""
+        with open(self.path, 'rb') as f:
+            for i in range(len(self.offsets) - 1, -1, -1):
+                yield self._starts[i], self._block(f, i)
+
+
+def archived_name(name: str) -> str:
+    """logging handler namer: rotated files get the archive suffix."""
+    return name + ARCHIVE_SUFFIX
+
+
+def rotate_to_archive(source: str, dest: str):
+    """logging handler rotator: compress the rotated file instead of renaming it."""
+    try:
+        compress_file(source, dest)
+        os.remove(source)
+    except (OSError, ValueError) as e:
+        # Keep logging working even if compression fails; fall back to a plain rename.
+        # Logging from inside a handler's rollover could re-enter it, so use stderr.
+        print(f"Could not compress rotated log {source}: {e}", file=sys.stderr)
+        if os.path.exists(source):
+            os.replace(source, dest[:-len(ARCHIVE_SUFFIX)] if dest.endswith(ARCHIVE_SUFFIX) else dest)
@@ -0,0 +1,420 @@
+# SchedulerService/log_index.py
+"""
+Full-text index over task run logs and the scheduler log.
+A background LogIndexer reads each finished run's log once, and the new bytes
+of the scheduler's daily log on every pass, into an inverted index in a local
+SQLite file: one posting per (token, file, line offset) with the line's time
+and task. Searches are index range reads; only the matching lines are read
+back from the logs (through log_reader, so archived logs work too).
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from log_archive import ARCHIVE_SUFFIX
+from log_reader import decode_log, log_size, read_range
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'[a-z0-9_]+')
+_TEXT_TIME_RE = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+MIN_TOKEN = 2
+MAX_TOKEN = 64
+
+
+def tokenize(text: str) -> List[str]:
+    """Distinct lower-case word tokens of a line, in order of first appearance.
+
+    Pure numbers are skipped: timestamps and counters would dominate the index.
+    """
+    tokens = {}
+    for token in _TOKEN_RE.findall(text.lower()):
+        if MIN_TOKEN <= len(token) <= MAX_TOKEN and not token.isdigit():
+            tokens.setdefault(token)
+    return list(tokens)
+
+
+def _line_context(line: bytes) -> Tuple[Optional[int], Optional[int]]:
+    """(epoch seconds, task_id) of a scheduler log line, if it carries them."""
+    if line.startswith(b'{'):
+        try:
+            record = json.loads(line)
+            return int(datetime.fromisoformat(record['ts']).timestamp()), record.get('task_id')
+        except (ValueError, KeyError, TypeError):
+            return None, None
+    match = _TEXT_TIME_RE.match(line)
+    if match:
+        try:
+            return int(datetime.strptime(match.group(1).decode(), '%Y-%m-%d %H:%M:%S').timestamp()), None
+        except ValueError:
+            pass
+    return None, None
+
+
+class LogIndex:
+    """The on-disk inverted index. Connections are opened per call, so any thread may use it."""
+
+    def __init__(self, path: str, max_line_bytes: int = 2048):
+        self.path = path
+        self.max_line_bytes = max_line_bytes
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def ensure_schema(self):
+        """Create the index tables (WAL, so searches do not wait for the indexer)."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS log_sources (
+                    source_id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,             -- 'run' or 'scheduler'
+                    path TEXT NOT NULL UNIQUE,
+                    run_id INTEGER UNIQUE,
+                    task_id INTEGER,
+                    task_name TEXT,
+                    started_at INTEGER,
+                    file_id TEXT,                   -- device:inode of a live file, to spot rotation
+                    indexed_bytes INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS log_postings (
+                    token TEXT NOT NULL,
+                    source_id INTEGER NOT NULL,
+                    line_offset INTEGER NOT NULL,
+                    ts INTEGER,
+                    task_id INTEGER,
+                    PRIMARY KEY (token, source_id, line_offset)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_log_postings_source ON log_postings (source_id);
+                CREATE TABLE IF NOT EXISTS log_index_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def get_state(self, key: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM log_index_state WHERE key = ?", (key,)).fetchone()
+            return row['value'] if row else None
+
+    def get_source(self, path: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM log_sources WHERE path = ?", (path,)).fetchone()
+            return dict(row) if row else None
+
+    def get_sources(self, kind: str) -> List[Dict]:
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute("SELECT * FROM log_sources WHERE kind = ?", (kind,))]
+
+    def index_file(self, path: str, kind: str, start: int = 0, complete: bool = True,
+                   run: Dict = None, file_id: str = None, state: Dict[str, str] = None) -> int:
+        """Index path from byte start; returns the offset indexed up to.
+
+        A live file (complete=False) is only indexed up to its last newline,
+        so a line being written is picked up whole on a later pass. run gives
+        the run_id/task/start time of a run log; state is saved in the same
+        transaction (the indexer's watermark).
+        """
+        if run:
+            default_ts = int(run['started_at'].timestamp()) if run.get('started_at') else None
+        else:
+            # Until the first timestamped line, scheduler lines are dated by the file
+            default_ts = int(os.path.getmtime(path))
+        default_task = run['task_id'] if run else None
+        size = log_size(path)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                INSERT INTO log_sources (kind, path, run_id, task_id, task_name, started_at, file_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET file_id = excluded.file_id
+            """, (kind, path, run['run_id'] if run else None, default_task,
+                  run['task_name'] if run else None, default_ts, file_id))
+            source_id = conn.execute("SELECT source_id FROM log_sources WHERE path = ?", (path,)).fetchone()[0]
+
+            offset = start
+            if size > start:
+                postings = []
+                pending = b''
+                last_ts = default_ts
+                for chunk in read_range(path, start, size - 1):
+                    data = pending + chunk
+                    lines = data.split(b'\n')
+                    pending = lines.pop()
+                    for line in lines:
+                        last_ts = self._add_line(postings, source_id, offset, line, kind, last_ts, default_task)
+                        offset += len(line) + 1
+                    if len(postings) >= 50000:
+                        conn.executemany("INSERT OR IGNORE INTO log_postings VALUES (?, ?, ?, ?, ?)", postings)
+                        postings = []
+                if pending and complete:
+                    self._add_line(postings, source_id, offset, pending, kind, last_ts, default_task)
+                    offset += len(pending)
+                conn.executemany("INSERT OR IGNORE INTO log_postings VALUES (?, ?, ?, ?, ?)", postings)
+
+            conn.execute("UPDATE log_sources SET indexed_bytes = ? WHERE source_id = ?", (offset, source_id))
+            for key, value in (state or {}).items():
+                conn.execute("INSERT OR REPLACE INTO log_index_state (key, value) VALUES (?, ?)", (key, value))
+        return offset
+
+    def _add_line(self, postings: List, source_id: int, offset: int, line: bytes, kind: str,
+                  last_ts: Optional[int], task_id: Optional[int]) -> Optional[int]:
+        line = line[:self.max_line_bytes]
+        if kind == 'scheduler':
+            line_ts, line_task = _line_context(line)
+            # Continuation lines (tracebacks) take the time of the record they belong to
+            last_ts = line_ts or last_ts
+            task_id = line_task
+        for token in tokenize(decode_log(line)):
+            postings.append((token, source_id, offset, last_ts, task_id))
+        return last_ts
+
+    def set_state(self, key: str, value: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO log_index_state (key, value) VALUES (?, ?)", (key, value))
+
+    def remove_sources(self, source_ids: Iterable[int]) -> int:
+        """Drop files (and their postings) from the index."""
+        source_ids = [(source_id,) for source_id in source_ids]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM log_postings WHERE source_id = ?", source_ids)
+            conn.executemany("DELETE FROM log_sources WHERE source_id = ?", source_ids)
+        return len(source_ids)
+
+    def prune_runs(self, before: datetime) -> int:
+        """Drop run logs started before the log retention cutoff."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT source_id FROM log_sources WHERE kind = 'run' AND started_at < ?",
+                                (int(before.timestamp()),)).fetchall()
+        return self.remove_sources(row['source_id'] for row in rows)
+
+    def search(self, query: str, start: datetime = None, end: datetime = None, task_id: int = None,
+               run_id: int = None, kind: str = None, limit: int = 100,
+               with_lines: bool = True) -> Tuple[List[Dict], bool]:
+        """Lines containing every term of query (each term matches as a word prefix), newest first.
+
+        Returns (matches, truncated). Run-log lines are dated by their run's
+        start; scheduler-log lines by their own timestamp.
+        """
+        terms = tokenize(query)
+        if not terms:
+            raise ValueError("Query has no searchable words (at least 2 letters or digits, not only digits)")
+
+        # Drive from the longest (usually rarest) term; the others must hit the same line
+        terms.sort(key=len, reverse=True)
+        sql = """
+            SELECT DISTINCT p.source_id, p.line_offset, p.ts, p.task_id,
+                   s.kind, s.path, s.run_id, s.task_name
+            FROM log_postings p
+            JOIN log_sources s ON s.source_id = p.source_id
+            WHERE p.token >= ? AND p.token < ?
+        """
+        params = [terms[0], terms[0] + '{']
+        if len(terms) > 1:
+            sql += " AND (p.source_id, p.line_offset) IN (" + " INTERSECT ".join(
+                ["SELECT source_id, line_offset FROM log_postings WHERE token >= ? AND token < ?"]
+                * (len(terms) - 1)) + ")"
+            for term in terms[1:]:
+                params += [term, term + '{']
+        if start:
+            sql += " AND p.ts >= ?"
+            params.append(int(start.timestamp()))
+        if end:
+            sql += " AND p.ts < ?"
+            params.append(int(end.timestamp()))
+        if task_id is not None:
+            sql += " AND p.task_id = ?"
+            params.append(task_id)
+        if run_id is not None:
+            sql += " AND s.run_id = ?"
+            params.append(run_id)
+        if kind:
+            sql += " AND s.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY p.ts DESC, p.source_id DESC, p.line_offset DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with closing(self._connect()) as conn:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        truncated = len(rows) > limit
+        matches = []
+        for row in rows[:limit]:
+            match = {
+                'kind': row['kind'],
+                'run_id': row['run_id'],
+                'task_id': row['task_id'],
+                'task_name': row['task_name'],
+                'path': row['path'],
+                'offset': row['line_offset'],
+                'time': datetime.fromtimestamp(row['ts']).isoformat() if row['ts'] is not None else None
+            }
+            if with_lines:
+                match['line'] = self.read_line(row['path'], row['line_offset'])
+            matches.append(match)
+        return matches, truncated
+
+    def read_line(self, path: str, offset: int) -> Optional[str]:
+        """The line at offset, or None if the file is gone."""
+        for candidate in (path, path + ARCHIVE_SUFFIX):
+            # Run logs written straight to the share are compressed after indexing
+            if os.path.exists(candidate):
+                try:
+                    data = b''.join(read_range(candidate, offset, offset + self.max_line_bytes - 1))
+                except (OSError, ValueError):
+                    return None
+                return decode_log(data.split(b'\n', 1)[0]).rstrip('\r')
+        return None
+
+
+class LogIndexer:
+    """Background thread that keeps the log index up to date."""
+
+    WATERMARK_KEY = 'run_watermark'
+    PENDING_KEY = 'spool_pending_runs'     # JSON list of run_ids passed while their log was in the spool
+
+    def __init__(self, index: LogIndex, run_manager, log_dir: str, scheduler_log: str = 'scheduler_daily.log',
+                 interval_seconds: int = 60, batch_runs: int = 200, keep_days: int = 30,
+                 skip_prefix: str = None):
+        self.index = index
+        self.run_manager = run_manager
+        self.log_dir = log_dir
+        self.scheduler_log = scheduler_log
+        self.interval_seconds = interval_seconds
+        self.batch_runs = batch_runs
+        self.keep_days = keep_days
+        self.skip_prefix = skip_prefix      # runs whose log is still here (the spool) are re-checked later
+        self._pruned_at = 0
+        self._stop = threading.Event()
+
+    def start(self):
+        self.index.ensure_schema()
+        threading.Thread(target=self._run, name='LogIndexer', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Log indexing error: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def run_once(self) -> Dict:
+        """One pass: new finished runs, new scheduler log lines, and (hourly) retention."""
+        stats = {'runs': self.index_runs(), 'scheduler_bytes': self.index_scheduler_logs(), 'pruned': 0}
+        if time.time() - self._pruned_at >= 3600:
+            self._pruned_at = time.time()
+            stats['pruned'] = self.index.prune_runs(datetime.now() - timedelta(days=self.keep_days))
+        if stats['runs'] or stats['pruned']:
+            logger.info(f"Log index: {stats['runs']} run logs indexed, {stats['pruned']} pruned")
+        return stats
+
+    def index_runs(self) -> int:
+        """Index logs of runs finished since the watermark, in completion order."""
+        watermark = self.index.get_state(self.WATERMARK_KEY)
+        if watermark:
+            completed_at, run_id = watermark.rsplit('|', 1)
+            after = (datetime.fromisoformat(completed_at), int(run_id))
+        else:
+            after = (datetime.now() - timedelta(days=self.keep_days), 0)
+
+        pending = set(json.loads(self.index.get_state(self.PENDING_KEY) or '[]'))
+        indexed = self.index_pending_runs(pending)
+        while not self._stop.is_set():
+            runs = self.run_manager.get_runs_to_index(after[0], after[1], self.batch_runs)
+            for run in runs:
+                path = run['log_file_path']
+                after = (run['completed_at'], run['run_id'])
+                state = {self.WATERMARK_KEY: f"{after[0].isoformat()}|{after[1]}"}
+                if self.skip_prefix and path.startswith(self.skip_prefix):
+                    # Not shipped yet: remember it and move on, so later runs are not held up
+                    pending.add(run['run_id'])
+                    self.index.set_state(self.PENDING_KEY, json.dumps(sorted(pending)))
+                    self.index.set_state(self.WATERMARK_KEY, state[self.WATERMARK_KEY])
+                    continue
+                if not os.path.exists(path):
+                    self.index.set_state(self.WATERMARK_KEY, state[self.WATERMARK_KEY])
+                    continue
+                try:
+                    self.index.index_file(path, 'run', run=run, state=state)
+                    indexed += 1
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not index log of run {run['run_id']}: {e}")
+                    self.index.set_state(self.WATERMARK_KEY, state[self.WATERMARK_KEY])
+            if len(runs) < self.batch_runs:
+                break
+        return indexed
+
+    def index_pending_runs(self, pending: set) -> int:
+        """Index the runs in pending whose logs have left the spool; drops them from pending."""
+        if not pending:
+            return 0
+        indexed = 0
+        waiting = len(pending)
+        expired = datetime.now() - timedelta(days=self.keep_days)
+        for run_id in sorted(pending):
+            run = self.run_manager.get_run(run_id)
+            path = run['log_file_path'] if run else None
+            if path and self.skip_prefix and path.startswith(self.skip_prefix):
+                if run['completed_at'] >= expired:
+                    continue
+            elif path and os.path.exists(path) and self.index.get_source(path) is None:
+                try:
+                    self.index.index_file(path, 'run', run=run)
+                    indexed += 1
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not index log of run {run_id}: {e}")
+            pending.discard(run_id)
+        if len(pending) != waiting:
+            self.index.set_state(self.PENDING_KEY, json.dumps(sorted(pending)))
+        return indexed
+
+    def index_scheduler_logs(self) -> int:
+        """Index new lines of the live scheduler log and any new rotated backups."""
+        live = os.path.join(self.log_dir, self.scheduler_log)
+        indexed = 0
+        seen = set()
+        try:
+            names = os.listdir(self.log_dir)
+        except OSError:
+            return 0
+        for name in sorted(names):
+            if not name.startswith(self.scheduler_log + '.') or name.endswith('.partial'):
+                continue
+            path = os.path.join(self.log_dir, name)
+            seen.add(path)
+            if self.index.get_source(path) is None:
+                # Rotated backups never change; index each one once
+                indexed += self.index.index_file(path, 'scheduler')
+
+        if os.path.exists(live):
+            st = os.stat(live)
+            file_id = f"{st.st_dev}:{st.st_ino}"
+            source = self.index.get_source(live)
+            start = 0
+            if source:
+                if source['file_id'] == file_id and source['indexed_bytes'] <= st.st_size:
+                    start = source['indexed_bytes']
+                else:
+                    # Rotated since the last pass: its old lines are now indexed from the backup
+                    self.index.remove_sources([source['source_id']])
+            seen.add(live)
+            indexed += self.index.index_file(live, 'scheduler', start=start, complete=False,
+                                             file_id=file_id) - start
+
+        gone = [s['source_id'] for s in self.index.get_sources('scheduler') if s['path'] not in seen]
+        if gone:
+            self.index.remove_sources(gone)
+        return indexed
@@ -0,0 +1,172 @@
+# SchedulerService/log_pipeline.py
+"""
+Non-blocking logging for the scheduler process.
+Log calls only put the record on a bounded queue; a single LogWriter thread
+formats it and does the file writes for every handler. Records carry the
+run/task they were logged under as structured fields, and noisy access-log
+lines are dropped or sampled by rule before they are queued.
+"""
+
+import re
+import copy
+import json
+import queue
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+CONTEXT_FIELDS = ('run_id', 'task_id', 'task_name', 'retry_count')
+
+_log_context = contextvars.ContextVar('log_context', default=None)
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields (run_id, task_id, ...) to every record logged in this block."""
+    token = _log_context.set(dict(_log_context.get() or {}, **fields))
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def bind_log_context(**fields):
+    """Add fields to the innermost log_context, e.g. the run_id once it exists."""
+    context = _log_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current log context onto the record in the logging thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in (_log_context.get() or {}).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class AccessLogFilter(logging.Filter):
+    """Drops or samples werkzeug request lines by path.
+
+    rules is a list of {'pattern': regex on the request path, 'sample': N}:
+    N = 0 drops matching lines, N > 1 keeps one in N. Error responses
+    (status >= 400) are always kept.
+    """
+
+    REQUEST_RE = re.compile(r'"[A-Z]+ (\S+) [^"]*" (\d{3})')
+
+    def __init__(self, rules: List[Dict], logger_names=('werkzeug',)):
+        super().__init__()
+        self.rules = [(re.compile(rule['pattern']), rule.get('sample', 0)) for rule in rules]
+        self.logger_names = logger_names
+        self._counts = [0] * len(self.rules)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.name not in self.logger_names:
+            return True
+        match = self.REQUEST_RE.search(record.getMessage())
+        if not match or int(match.group(2)) >= 400:
+            return True
+        path = match.group(1)
+        for i, (pattern, sample) in enumerate(self.rules):
+            if pattern.search(path):
+                with self._lock:
+                    self._counts[i] += 1
+                    keep = sample > 0 and (self._counts[i] - 1) % sample == 0
+                    if not keep:
+                        self.dropped += 1
+                return keep
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the run context as top-level fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'func': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage()
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller; records are dropped when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback here, but keep them separate so the
+        # writer's formatters (JSON or text) can lay them out themselves
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogWriter(QueueListener):
+    """QueueListener whose thread is named for thread dumps."""
+
+    def start(self):
+        super().start()
+        self._thread.name = 'LogWriter'
+
+
+def install_queue_logging(handlers: List[logging.Handler], queue_size: int = 10000,
+                          access_log_rules: Optional[List[Dict]] = None,
+                          level: int = logging.INFO) -> LogWriter:
+    """Move the root logger's handlers plus handlers behind a queue and start the writer.
+
+    Handlers already on the root logger (e.g. from logging.basicConfig) are
+    moved behind the queue too, so no log call writes to a file directly.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            continue
+        root.removeHandler(handler)
+        handlers = [handler] + list(handlers)
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(ContextFilter())
+    if access_log_rules:
+        queue_handler.addFilter(AccessLogFilter(access_log_rules))
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    writer = LogWriter(queue_handler.queue, *handlers, respect_handler_level=True)
+    writer.start()
+    return writer
@@ -0,0 +1,169 @@
+# SchedulerService/log_reader.py
+"""
+Constant-memory access to task run logs.
+Tails are found by reading backwards from EOF in fixed-size blocks, byte
+ranges are streamed in chunks, and follow mode polls for bytes appended by a
+still-running process. Archived (.gz) logs are read through their block
+index, so offsets always refer to the uncompressed log.
+"""
+
+import os
+import re
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from log_archive import ArchivedLog, is_archived
+
+BLOCK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def decode_log(data: bytes) -> str:
+    """Decode log bytes written by a task; bad bytes never break a view."""
+    return data.decode('utf-8', errors='replace')
+
+
+def log_size(path: str) -> int:
+    """Size of the (uncompressed) log."""
+    return ArchivedLog(path).size if is_archived(path) else os.path.getsize(path)
+
+
+def tail_lines(path: str, lines: int = 200, block_size: int = BLOCK_SIZE) -> Tuple[List[str], int, int]:
+    """Last N lines of a file.
+
+    Returns (lines, start_offset, size): start_offset is the byte position of
+    the first returned line and size the file size when it was read, which is
+    where a follow should resume.
+    """
+    if is_archived(path):
+        archive = ArchivedLog(path)
+        size, reverse_blocks = archive.size, archive.reverse_blocks()
+    else:
+        size = os.path.getsize(path)
+        reverse_blocks = _reverse_blocks(path, size, block_size)
+
+    position = size
+    blocks = []
+    newlines = 0
+    wanted = lines
+    for position, block in reverse_blocks:
+        if not blocks and block.endswith(b'\n'):
+            # A trailing newline ends the last line rather than starting an empty one
+            wanted = lines + 1
+        blocks.append(block)
+        newlines += block.count(b'\n')
+        if newlines >= wanted:
+            break
+    reverse_blocks.close()
+
+    data = b''.join(reversed(blocks))
+    if newlines >= wanted:
+        # Drop everything up to the newline preceding the first wanted line
+        cut = len(data)
+        for _ in range(wanted):
+            cut = data.rindex(b'\n', 0, cut)
+        data = data[cut + 1:]
+        position = size - len(data)
+
+    return decode_log(data).splitlines(), position, size
+
+
+def _reverse_blocks(path: str, size: int, block_size: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, data) blocks of the first size bytes, from the end backwards."""
+    with open(path, 'rb') as f:
+        position = size
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            yield position, f.read(read_size)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single HTTP byte range into an inclusive (start, end).
+
+    Returns None for a missing or multi-range header (serve the whole file) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, end
+
+
+def read_range(path: str, start: int, end: int, chunk_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Yield the bytes start..end (inclusive) in chunks."""
+    if is_archived(path):
+        yield from ArchivedLog(path).read_range(start, end)
+        return
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def follow(path: str, offset: int, is_running: Callable[[], bool], poll_interval: float = 1.0,
+           status_interval: float = 5.0, chunk_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, data) for bytes appended after offset until the writer finishes.
+
+    Chunks are cut at the last newline where possible so lines are not split
+    across events. Yields (offset, b'') while idle so callers can send
+    keepalives; stops once is_running() is false and the file is drained.
+    """
+    if is_archived(path):
+        # Archived logs are complete; send the rest and stop
+        archive = ArchivedLog(path)
+        for data in archive.read_range(offset, archive.size - 1):
+            offset += len(data)
+            yield offset, data
+        return
+    running = True
+    checked_at = time.time()
+    partial_polls = 0
+    with open(path, 'rb') as f:
+        while True:
+            f.seek(offset)
+            data = f.read(chunk_size)
+            if data and running and len(data) < chunk_size and not data.endswith(b'\n'):
+                cut = data.rfind(b'\n')
+                if cut >= 0:
+                    data = data[:cut + 1]
+                elif partial_polls < 2:
+                    # Give the writer a moment to finish the line before sending it
+                    partial_polls += 1
+                    data = b''
+            if data:
+                partial_polls = 0
+                offset += len(data)
+                yield offset, data
+                continue
+
+            if not running:
+                return
+            yield offset, b''
+            time.sleep(poll_interval)
+            if time.time() - checked_at >= status_interval:
+                checked_at = time.time()
+                # One more pass after the writer stops picks up its final bytes
+                running = is_running()
@@ -0,0 +1,189 @@
+# SchedulerService/log_shipper.py
+"""
+Local spool for run output with asynchronous shipping to the archive share.
+Runs write their log (and profile artifact) to a fast local disk; once a run
+finishes its files are queued here and copied to the location next to the
+script by a background thread, retrying with backoff while the share is slow
+or unreachable. Logs can be compressed into the indexed archive format on
+the local disk first, so fewer bytes cross the network. The run's stored
+path is switched to the archive copy only after the file has landed, so
+readers always see a complete file.
+"""
+
+import os
+import json
+import heapq
+import shutil
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from log_archive import ARCHIVE_SUFFIX, BLOCK_SIZE, compress_file
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = '.ship.json'
+
+
+class LogShipper:
+    """Copies spooled run files to the archive share in the background."""
+
+    def __init__(self, run_manager, spool_dir: str, retry_seconds: List[int] = None,
+                 alert_manager=None, alert_after_attempts: int = 5, compress: bool = False,
+                 block_size: int = BLOCK_SIZE, compress_level: int = 6):
+        self.run_manager = run_manager
+        self.alert_manager = alert_manager
+        self.spool_dir = spool_dir
+        self.compress = compress
+        self.block_size = block_size
+        self.compress_level = compress_level
+        self.retry_seconds = retry_seconds or [5, 30, 120, 600]
+        self.alert_after_attempts = alert_after_attempts
+        self._queue = []          # heap of (due, seq, item)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def spool_path(self, archive_path: str) -> str:
+        """Local path a run file is written to before it is shipped to archive_path."""
+        folder = os.path.basename(os.path.dirname(archive_path))
+        return os.path.join(self.spool_dir, folder, os.path.basename(archive_path))
+
+    def start(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        recovered = self._recover()
+        if recovered:
+            logger.info(f"Re-queued {recovered} spooled files left by a previous run")
+        self._thread = threading.Thread(target=self._run, name='LogShipper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def submit(self, run_id: int, local_path: str, archive_path: str, kind: str = 'log'):
+        """Queue a finished run file for shipping (kind is 'log' or 'profile')."""
+        if not os.path.exists(local_path):
+            return
+        item = {'run_id': run_id, 'kind': kind, 'local_path': local_path,
+                'archive_path': archive_path, 'attempts': 0}
+        # The manifest lets a restarted service finish shipping what was spooled
+        self._write_manifest(item)
+        self._enqueue(item, time.time())
+
+    def _enqueue(self, item: Dict, due: float):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._queue, (due, self._seq, item))
+            self._cond.notify()
+
+    def _write_manifest(self, item: Dict):
+        with open(item['local_path'] + MANIFEST_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump(item, f)
+
+    def _recover(self) -> int:
+        recovered = 0
+        for root, _, files in os.walk(self.spool_dir):
+            for name in files:
+                if not name.endswith(MANIFEST_SUFFIX):
+                    continue
+                manifest = os.path.join(root, name)
+                try:
+                    with open(manifest, 'r', encoding='utf-8') as f:
+                        item = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable spool manifest {manifest}: {e}")
+                    continue
+                self._enqueue(item, time.time())
+                recovered += 1
+        return recovered
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._stop.is_set():
+                    if self._queue and self._queue[0][0] <= time.time():
+                        _, _, item = heapq.heappop(self._queue)
+                        break
+                    self._cond.wait(self._queue[0][0] - time.time() if self._queue else None)
+                else:
+                    return
+            self._ship(item)
+
+    def _ship(self, item: Dict):
+        local_path, archive_path = item['local_path'], item['archive_path']
+        if not os.path.exists(local_path):
+            self._remove(local_path + MANIFEST_SUFFIX)
+            return
+        if self.compress and item['kind'] == 'log' and not local_path.endswith(ARCHIVE_SUFFIX):
+            try:
+                item = self._compress(item)
+            except ValueError as e:
+                # Retrying cannot help a log the archive format rejects; ship it uncompressed
+                logger.warning(f"Could not compress {local_path}, shipping it uncompressed: {e}")
+            except Exception as e:
+                self._retry(item, e)
+                return
+            local_path, archive_path = item['local_path'], item['archive_path']
+        try:
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            # Copy under a temporary name so a half-written file is never visible
+            partial = archive_path + '.partial'
+            shutil.copyfile(local_path, partial)
+            os.replace(partial, archive_path)
+            if item['kind'] == 'profile':
+                self.run_manager.set_profile_path(item['run_id'], archive_path)
+            else:
+                self.run_manager.set_log_file_path(item['run_id'], archive_path)
+        except Exception as e:
+            self._retry(item, e)
+            return
+
+        self._remove(local_path)
+        self._remove(local_path + MANIFEST_SUFFIX)
+        logger.debug(f"Shipped {item['kind']} for run {item['run_id']} to {archive_path}")
+
+    def _compress(self, item: Dict) -> Dict:
+        """Compress a spooled log in place and point the run at the local archive."""
+        plain = item['local_path']
+        compressed = compress_file(plain, block_size=self.block_size, compress_level=self.compress_level)
+        item = dict(item, local_path=compressed, archive_path=item['archive_path'] + ARCHIVE_SUFFIX)
+        self._write_manifest(item)
+        self.run_manager.set_log_file_path(item['run_id'], compressed)
+        self._remove(plain + MANIFEST_SUFFIX)
+        self._remove(plain)
+        return item
+    
+    def _retry(self, item: Dict, error: Exception):
+        item['attempts'] += 1
+        delay = self.retry_seconds[min(item['attempts'], len(self.retry_seconds)) - 1]
+        logger.warning(f"Shipping {item['local_path']} failed (attempt {item['attempts']}): {error}; "
+                       f"retrying in {delay}s")
+        if item['attempts'] == self.alert_after_attempts and self.alert_manager:
+            self.alert_manager.create_alert(
+                'log_ship_failed', 'warning',
+                f"Run {item['run_id']} {item['kind']} has not reached {item['archive_path']} "
+                f"after {item['attempts']} attempts: {error}",
+                run_id=item['run_id']
+            )
+        try:
+            self._write_manifest(item)
+        except OSError:
+            pass
+        self._enqueue(item, time.time() + delay)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove spooled file {path}: {e}")
@@ -564,15 +564,30 @@
 # monitoring_dashboard.py - Final version using Flask's application context
 import os
 import sys
+import csv
+import io
 import json
-import psutil
+import time
+import base64
 import logging
-from datetime import datetime, timedelta
-from flask import Flask, jsonify, request, send_from_directory, current_app
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+from flask import Flask, jsonify, request, send_from_directory, current_app, Response, stream_with_context
 from flask_cors import CORS
 import subprocess
 import re
 
+from production_config import EVENTS_CONFIG, RESPONSE_CACHE_CONFIG, LOG_VIEW_CONFIG, ANALYTICS_CONFIG
+from production_config import FORECAST_CONFIG, LOG_SEARCH_CONFIG, BACKFILL_CONFIG
+from event_bus import event_bus, format_sse
+from response_cache import ResponseCache
+from profile_reports import PROFILE_MODES, top_functions
+from log_reader import tail_lines, parse_range, read_range, follow, decode_log, log_size
+from task_operations import validate_operations, check_task_type, check_backfill
+from schedule_forecast import concurrency_histogram
+from thread_diagnostics import dump_threads, format_thread_dump
+from db_models import StreamLimitError
+
 # --- Initialization ---
 app = Flask(__name__)
 CORS(app)
@@ -581,11 +596,11 @@ CORS(app)
 template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
 logger = logging.getLogger(__name__)
 
-# This dictionary is a simple way to track running processes.
-# In a real production system, this state should be managed in the database for resilience.
-task_processes = {}
-# This tracks dependencies. This should also ideally be in the database.
-task_dependencies = {}
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_CONFIG['max_entries'],
+    compress_level=RESPONSE_CACHE_CONFIG['gzip_level'],
+    min_gzip_bytes=RESPONSE_CACHE_CONFIG['min_gzip_bytes']
+)
 
 
 # --- HTML Pages Routes ---
@@ -610,78 +625,69 @@ def settings_page():
 
 # --- API Routes ---
 
-def get_uptime():
-    """Placeholder for getting scheduler uptime."""
-    # A real implementation would track the start time of the service.
-    return "Running for 0 days, 0:00:00"
+def get_snapshot():
+    """Latest background-sampled status snapshot, or None if not available yet."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'status_sampler')):
+        return None
+    return scheduler.status_sampler.snapshot
+
+def versioned_json_response(name, version, build_payload):
+    """Serve a versioned payload with ETag revalidation from the response cache."""
+    entry = response_cache.get(name, version, build_payload)
+    if request.if_none_match.contains_weak(entry.etag):
+        response = current_app.response_class(status=304)
+    elif entry.gzip_body is not None and 'gzip' in request.accept_encodings:
+        response = current_app.response_class(entry.gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = current_app.response_class(entry.body, mimetype='application/json')
+
+    # Weak: the gzip and identity bodies are different bytes of the same version
+    response.set_etag(entry.etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/api/status')
 def api_status():
-    """Get overall system and scheduler status."""
-    scheduler = current_app.config.get('SCHEDULER')
-    
-    scheduler_status = "Not Initialized"
-    if scheduler and hasattr(scheduler, 'scheduler'):
-        scheduler_status = "Running" if scheduler.scheduler.running else "Stopped"
+    """Get overall system and scheduler status from the sampled snapshot."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({
+            'status': 'online',
+            'scheduler': {'status': 'Not Initialized', 'uptime': None, 'running_tasks': 0}
+        })
+
+    return versioned_json_response(
+        'status', f"{snapshot.epoch}.{snapshot.status_version}",
+        lambda: dict(snapshot.status, taken_at=snapshot.status_changed_at)
+    )
 
-    # Get running tasks count from our tracked processes
-    running_tasks_count = len([p for p in task_processes.values() if p and p.poll() is None])
+@app.route('/api/tasks', methods=['GET'])
+def api_get_tasks():
+    """Get a list of all scheduled tasks from the sampled snapshot (no blocking probes)."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
 
-    return jsonify({
-        'status': 'online',
-        'scheduler': {
-            'status': scheduler_status,
-            'uptime': get_uptime(),
-            'running_tasks': running_tasks_count
-        }
+    return versioned_json_response('tasks', f"{snapshot.epoch}.{snapshot.tasks_version}", lambda: {
+        'status': 'success',
+        'tasks': snapshot.tasks,
+        'count': len(snapshot.tasks),
+        'taken_at': snapshot.tasks_changed_at
     })
 
-@app.route('/api/tasks', methods=['GET'])
-def api_get_tasks():
-    """Get a list of all scheduled tasks, preserving all original fields."""
-    scheduler = current_app.config.get('SCHEDULER')
-    if not (scheduler and hasattr(scheduler, 'scheduler')):
+@app.route('/api/tasks/metrics')
+def api_task_metrics():
+    """Live CPU/memory/runtime of running runs; changes every sample, so served without a version."""
+    snapshot = get_snapshot()
+    if snapshot is None:
         return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
 
-    tasks = []
-    try:
-        for job in scheduler.scheduler.get_jobs():
-            process_info = None
-            is_running = job.id in task_processes and task_processes[job.id].poll() is None
-            if is_running:
-                try:
-                    p = psutil.Process(task_processes[job.id].pid)
-                    process_info = {
-                        'cpu_percent': p.cpu_percent(interval=0.1),
-                        'memory_mb': p.memory_info().rss / (1024 * 1024),
-                        'runtime': (datetime.now() - datetime.fromtimestamp(p.create_time())).total_seconds()
-                    }
-                except psutil.NoSuchProcess:
-                    is_running = False # Process ended but wasn't cleaned up yet
-                except Exception as e:
-                    logger.warning(f"Could not get process info for {job.id}: {e}")
-
-            task_info = {
-                'id': job.id,
-                'name': job.name,
-                'next_run': job.next_run_time.isoformat() if job.next_run_time else None,
-                'schedule': str(job.trigger),
-                'active': job.next_run_time is not None,
-                'is_running': is_running,
-                'process_info': process_info,
-                'dependencies': task_dependencies.get(job.id, []),
-                'script_path': job.kwargs.get('script_path', 'N/A'),
-                'python_path': job.kwargs.get('python_path'),
-                'working_directory': job.kwargs.get('working_directory'),
-                'arguments': job.kwargs.get('arguments'),
-                'description': job.kwargs.get('description'),
-                'last_run': None, # This would require DB persistence to track properly
-            }
-            tasks.append(task_info)
-        return jsonify({'status': 'success', 'tasks': tasks, 'count': len(tasks)})
-    except Exception as e:
-        logger.error(f"Error getting tasks: {e}", exc_info=True)
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+    response = jsonify({'status': 'success', 'runs': snapshot.run_metrics, 'taken_at': snapshot.taken_at})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 
 def parse_schedule_from_frontend(data):
@@ -752,8 +758,17 @@ def api_update_task(task_id):
 
     data = request.json
     try:
+        task = scheduler.task_manager.get_task(task_id=task_id)
+        if not task:
+            return jsonify({'status': 'error', 'message': f'Task {task_id} not found'}), 404
+        fields = {f: data[f] for f in scheduler.task_manager.UPDATABLE_FIELDS if f in data}
+        try:
+            check_task_type(fields, task)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+
         # Update task properties (name, script_path, etc.)
-        scheduler.task_manager.update_task(task_id, **data)
+        scheduler.task_manager.update_task(task_id, **fields)
         
         # If schedule is being updated, handle that as well
         if 'schedule' in data:
@@ -770,32 +785,751 @@ def api_update_task(task_id):
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+@app.route('/api/tasks/bulk', methods=['POST'])
+def api_bulk_tasks():
+    """Apply a batch of task operations in one transaction and reload the scheduler once.
+
+    Body: {"operations": [{"op": "create|update|enable|disable|delete", "task": ...}, ...],
+    "dry_run": false}. Nothing is written unless every operation validates.
+    """
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'task_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    data = request.get_json(silent=True) or {}
+    task_manager = scheduler.task_manager
+    try:
+        operations, errors = validate_operations(
+            data.get('operations'), task_manager.get_all_tasks(), task_manager.UPDATABLE_FIELDS,
+            task_manager.get_task_ids_with_runs()
+        )
+        if errors:
+            return jsonify({'status': 'error', 'message': 'Validation failed', 'errors': errors}), 400
+        if data.get('dry_run'):
+            return jsonify({'status': 'success', 'dry_run': True, 'operations': len(operations)})
+
+        results = task_manager.apply_operations(operations)
+        scheduler.load_tasks_from_db()
+        return jsonify({'status': 'success', 'results': results})
+    except Exception as e:
+        logger.error(f"Error applying bulk task operations: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 @app.route('/api/tasks/<task_name>/run', methods=['POST'])
 def api_run_task(task_name):
     """Run a task immediately by name."""
     scheduler = current_app.config.get('SCHEDULER')
+    if getattr(scheduler, 'read_only', False):
+        return jsonify({
+            'status': 'error',
+            'message': 'Manual runs are not available from the standalone dashboard'
+        }), 503
     if not (scheduler and hasattr(scheduler, 'scheduler')):
         return jsonify({'status': 'error', 'message': 'Scheduler not available'}), 503
 
-    job_to_run = None
-    for job in scheduler.scheduler.get_jobs():
-        if job.name == task_name:
-            job_to_run = job
-            break
+    # Look the task up in the database: with sharding, its schedule may live on another node
+    task = scheduler.task_manager.get_task(task_name=task_name)
+    if task and task['is_active']:
+        # Optional per-run profiling: {"profile": "cprofile" | "sampling"}
+        profile = (request.get_json(silent=True) or {}).get('profile')
+        if profile and profile not in PROFILE_MODES:
+            return jsonify({'status': 'error', 'message': f'Unknown profile mode: {profile}'}), 400
 
-    if job_to_run:
-        logger.info(f"Manual run triggered for job: {job_to_run.name} (ID: {job_to_run.id})")
+        logger.info(f"Manual run triggered for task: {task_name} (ID: {task['task_id']})")
         try:
-            # Manually trigger the core execution logic
-            scheduler.executor.submit(scheduler.execute_task, job_to_run.kwargs['task_id'])
+            # Manually trigger the core execution logic (on a worker agent in dispatch mode)
+            if scheduler.dispatch_mode:
+                scheduler.enqueue_run(task['task_id'], 0, profile, 'manual')
+            else:
+                scheduler.executor.submit(scheduler.execute_task, task['task_id'], 0, profile, 'manual')
             return jsonify({'status': 'success', 'message': f'Task {task_name} has been triggered to run.'})
         except Exception as e:
-            logger.error(f"Error triggering job {job_to_run.id}: {e}", exc_info=True)
+            logger.error(f"Error triggering task {task_name}: {e}", exc_info=True)
             return jsonify({'status': 'error', 'message': f"Failed to run job: {e}"}), 500
+    elif task:
+        return jsonify({'status': 'error', 'message': f'Task "{task_name}" is disabled'}), 409
     else:
         logger.warning(f"Manual run requested for task '{task_name}', but it was not found.")
         return jsonify({'status': 'error', 'message': f'Task "{task_name}" not found'}), 404
 
+@app.route('/api/tasks/<int:task_id>/duration-stats')
+def api_task_duration_stats(task_id):
+    """Learned duration statistics and effective timeout for a task."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        task = scheduler.task_manager.get_task(task_id=task_id)
+        if not task:
+            return jsonify({'status': 'error', 'message': f'Task {task_id} not found'}), 404
+
+        stats = scheduler.run_manager.duration_stats.get_stats(task_id)
+        timeout, envelope = scheduler.resolve_duration_limits(task)
+        return jsonify({
+            'status': 'success',
+            'task_id': task_id,
+            'stats': stats.summary() if stats else None,
+            'effective_timeout_seconds': timeout,
+            'regression_envelope_seconds': round(envelope, 1) if envelope else None,
+            'adaptive_timeout': bool(task.get('adaptive_timeout'))
+        })
+    except Exception as e:
+        logger.error(f"Error getting duration stats for task {task_id}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/runs/<int:run_id>/profile')
+def api_run_profile(run_id):
+    """Top functions from the profile artifact linked to a run."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    run = scheduler.run_manager.get_run(run_id)
+    if not run or not run.get('profile_path'):
+        return jsonify({'status': 'error', 'message': f'No profile recorded for run {run_id}'}), 404
+
+    try:
+        functions = top_functions(
+            run['profile_path'],
+            limit=request.args.get('limit', 25, type=int),
+            sort=request.args.get('sort', 'cumulative')
+        )
+        return jsonify({
+            'status': 'success',
+            'run_id': run_id,
+            'task_name': run['task_name'],
+            'profile_path': run['profile_path'],
+            'functions': functions
+        })
+    except Exception as e:
+        logger.error(f"Error reading profile for run {run_id}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def get_run_log(run_id):
+    """(scheduler, run, error response) for a run whose log file exists."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return None, None, (jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503)
+
+    run = scheduler.run_manager.get_run(run_id)
+    if not run:
+        return None, None, (jsonify({'status': 'error', 'message': f'Run {run_id} not found'}), 404)
+    if not run.get('log_file_path') or not os.path.exists(run['log_file_path']):
+        return None, None, (jsonify({'status': 'error', 'message': f'No log file for run {run_id}'}), 404)
+    return scheduler, run, None
+
+@app.route('/api/runs/<int:run_id>/log')
+def api_run_log(run_id):
+    """Tail of a run's log, read backwards from EOF (?lines=N).
+
+    With ?format=raw the file is served as bytes and honours HTTP Range, so
+    any chunk of a large log can be fetched without reading the rest.
+    """
+    scheduler, run, error = get_run_log(run_id)
+    if error:
+        return error
+    path = run['log_file_path']
+
+    if request.args.get('format') == 'raw' or request.headers.get('Range'):
+        size = log_size(path)
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            return current_app.response_class(status=416, headers={'Content-Range': f'bytes */{size}'})
+
+        start, end = byte_range or (0, size - 1)
+        response = Response(
+            stream_with_context(read_range(path, start, end)) if size else b'',
+            status=206 if byte_range else 200,
+            mimetype='text/plain'
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Content-Length'] = str(end - start + 1 if size else 0)
+        if byte_range:
+            response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return response
+
+    lines = request.args.get('lines', LOG_VIEW_CONFIG['default_tail_lines'], type=int)
+    lines = max(1, min(lines, LOG_VIEW_CONFIG['max_tail_lines']))
+    try:
+        tail, start_offset, size = tail_lines(path, lines)
+        return jsonify({
+            'status': 'success',
+            'run_id': run_id,
+            'task_name': run['task_name'],
+            'run_status': run['status'],
+            'log_file_path': path,
+            'lines': tail,
+            'start_offset': start_offset,
+            'size': size
+        })
+    except Exception as e:
+        logger.error(f"Error reading log for run {run_id}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/runs/<int:run_id>/log/follow')
+def api_follow_run_log(run_id):
+    """Stream bytes appended to a run's log as Server-Sent Events.
+
+    Starts at ?offset= (default: end of file) or the Last-Event-ID of a
+    reconnecting client; each event id is the byte offset after its data.
+    Ends with an 'end' event once the run has finished and the log is drained.
+    """
+    scheduler, run, error = get_run_log(run_id)
+    if error:
+        return error
+    path = run['log_file_path']
+    run_manager = scheduler.run_manager
+
+    resume = request.headers.get('Last-Event-ID') or request.args.get('offset')
+    try:
+        offset = int(resume) if resume is not None else log_size(path)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': f'Invalid offset: {resume}'}), 400
+
+    def is_running():
+        current = run_manager.get_run(run_id)
+        return bool(current) and current['status'] == 'running'
+
+    def stream():
+        yield f"retry: {EVENTS_CONFIG['client_retry_ms']}\n\n"
+        idle_since = time.time()
+        for position, data in follow(path, offset, is_running,
+                                     poll_interval=LOG_VIEW_CONFIG['follow_poll_seconds'],
+                                     status_interval=LOG_VIEW_CONFIG['status_check_seconds']):
+            if data:
+                idle_since = time.time()
+                yield f"id: {position}\nevent: log\ndata: {json.dumps({'text': decode_log(data)})}\n\n"
+            elif time.time() - idle_since >= EVENTS_CONFIG['keepalive_seconds']:
+                idle_since = time.time()
+                yield ": keepalive\n\n"
+        final = run_manager.get_run(run_id)
+        yield f"event: end\ndata: {json.dumps({'status': final['status'] if final else None})}\n\n"
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/runs/<int:run_id>/output')
+def api_run_output(run_id):
+    """Recent output of a running task from its in-memory buffer, without touching the log file.
+
+    Returns lines after ?since= (a seq from a previous call), at most ?limit=;
+    poll with the returned 'seq'. Finished runs answer 404: use /log instead.
+    """
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'get_run_output')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        output = scheduler.get_run_output(run_id, request.args.get('since', 0, type=int),
+                                          request.args.get('limit', LOG_VIEW_CONFIG['max_tail_lines'], type=int))
+    except ConnectionError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    if output is None:
+        return jsonify({'status': 'error', 'message': f'Run {run_id} is not running'}), 404
+
+    return jsonify(dict(output, status='success', run_id=run_id))
+
+LOG_TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}[,.]\d{3}')
+
+@app.route('/api/logs/<task_name>')
+def api_get_task_logs(task_name):
+    """Tail of the latest run log of a task, in the shape used by the tasks and logs pages."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        task = scheduler.task_manager.get_task(task_name=task_name)
+        if not task:
+            return jsonify({'status': 'error', 'message': f'Task "{task_name}" not found'}), 404
+
+        runs = scheduler.run_manager.get_run_history(limit=1, task_id=task['task_id'])
+        path = runs[0]['log_file_path'] if runs else None
+        if not path or not os.path.exists(path):
+            return jsonify({'status': 'success', 'task_name': task_name, 'logs': [],
+                            'message': 'No logs found for this task'})
+
+        lines, _, _ = tail_lines(path, request.args.get('lines', 100, type=int))
+        logs = []
+        for line in lines:
+            if not line.strip():
+                continue
+            # Lines from the logging module start with a 23-character timestamp
+            stamped = LOG_TIMESTAMP_RE.match(line)
+            logs.append({
+                'timestamp': stamped.group(0) if stamped else '',
+                'message': line[stamped.end():].strip(' -') if stamped else line.rstrip()
+            })
+        return jsonify({
+            'status': 'success',
+            'task_name': task_name,
+            'run_id': runs[0]['run_id'],
+            'logs': logs
+        })
+    except Exception as e:
+        logger.error(f"Error getting logs for task {task_name}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/debug/threads')
+def api_thread_dump():
+    """Live stack dump of every thread in the scheduler process."""
+    scheduler = current_app.config.get('SCHEDULER')
+    # Without a scheduler this still dumps the dashboard's own threads
+    threads = scheduler.get_thread_dump() if scheduler and hasattr(scheduler, 'get_thread_dump') else dump_threads()
+
+    if request.args.get('format') == 'text':
+        return current_app.response_class(format_thread_dump(threads), mimetype='text/plain')
+    return jsonify({'status': 'success', 'count': len(threads), 'threads': threads})
+
+@app.route('/api/events')
+def api_events():
+    """Server-Sent Events stream of run, alert, job and snapshot changes.
+
+    Clients resume with the Last-Event-ID header (sent automatically by
+    EventSource) or ?last_event_id=. A 'reset' event means events were missed
+    and the client should refetch full state.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    types = set(filter(None, request.args.get('types', '').split(',')))
+    # The scheduler's own bus, or its remote view when the dashboard runs standalone
+    bus = getattr(current_app.config.get('SCHEDULER'), 'event_bus', event_bus)
+
+    def stream():
+        yield f"retry: {EVENTS_CONFIG['client_retry_ms']}\n\n"
+
+        events, reset = bus.events_since(last_event_id)
+        if reset:
+            # Missed events can't be replayed; the client should refetch full state
+            yield "event: reset\ndata: {}\n\n"
+            events = []
+        cursor = last_event_id if last_event_id and not reset else bus.last_event_id
+
+        while True:
+            for event in events:
+                if not types or event.type in types:
+                    yield format_sse(event)
+                cursor = event.id
+
+            events = bus.wait_for_events(cursor, timeout=EVENTS_CONFIG['keepalive_seconds'])
+            if not events:
+                yield ": keepalive\n\n"
+            elif events[0].seq > int(cursor.rsplit('.', 1)[1]) + 1:
+                # The client fell behind the retained history
+                cursor = events[-1].id
+                yield f"id: {cursor}\nevent: reset\ndata: {{}}\n\n"
+                events = []
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+RUN_FORMATS = ('json', 'ndjson', 'csv')
+
+def serialize_run(run):
+    """Make a run row JSON/CSV friendly."""
+    return {
+        key: value.isoformat() if isinstance(value, date)
+        else float(value) if isinstance(value, Decimal)
+        else value
+        for key, value in run.items()
+    }
+
+def encode_run_cursor(run):
+    """Opaque keyset cursor for the (started_at, run_id) position of a run."""
+    raw = json.dumps([run['started_at'].isoformat(), run['run_id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_run_cursor(cursor):
+    started_at, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return datetime.fromisoformat(started_at), int(run_id)
+
+def parse_run_filters(args):
+    """Run history filters from query parameters; raises ValueError on bad input."""
+    filters = {}
+    if args.get('task_id'):
+        filters['task_id'] = int(args['task_id'])
+    if args.get('status'):
+        filters['statuses'] = [s.strip() for s in args['status'].split(',') if s.strip()]
+    if args.get('triggered_by'):
+        filters['triggered_by'] = args['triggered_by']
+    for name in ('since', 'until'):
+        if args.get(name):
+            filters[name] = datetime.fromisoformat(args[name])
+    if args.get('cursor'):
+        filters['after'] = decode_run_cursor(args['cursor'])
+    return filters
+
+@app.route('/api/runs')
+def api_runs():
+    """Run history, newest first.
+
+    Filters: task_id or task (name), status (comma-separated), triggered_by,
+    since/until (ISO timestamps). format=json returns one keyset page of
+    ?limit= runs with a next_cursor to pass back as ?cursor=; format=ndjson
+    or csv streams every matching run from a server-side cursor.
+    """
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    output_format = request.args.get('format', 'json')
+    if output_format not in RUN_FORMATS:
+        return jsonify({'status': 'error', 'message': f'Unknown format: {output_format}'}), 400
+
+    try:
+        filters = parse_run_filters(request.args)
+        limit = request.args.get('limit', type=int)
+    except (ValueError, TypeError) as e:
+        return jsonify({'status': 'error', 'message': f'Invalid filter: {e}'}), 400
+
+    try:
+        if request.args.get('task'):
+            task = scheduler.task_manager.get_task(task_name=request.args['task'])
+            if not task:
+                return jsonify({'status': 'error', 'message': f'Task "{request.args["task"]}" not found'}), 404
+            filters['task_id'] = task['task_id']
+
+        if output_format == 'json':
+            limit = max(1, min(limit or 100, 1000))
+            runs = scheduler.run_manager.get_run_history(limit=limit, **filters)
+            return jsonify({
+                'status': 'success',
+                'runs': [serialize_run(run) for run in runs],
+                'count': len(runs),
+                'next_cursor': encode_run_cursor(runs[-1]) if len(runs) == limit else None
+            })
+
+        rows = scheduler.run_manager.stream_run_history(limit=limit, **filters)
+    except StreamLimitError as e:
+        return jsonify({'status': 'error', 'message': f'Too many exports running, retry later ({e})'}), 503
+    except Exception as e:
+        logger.error(f"Error querying run history: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    if output_format == 'ndjson':
+        body = (json.dumps(serialize_run(run), default=str) + '\n' for run in rows)
+        mimetype = 'application/x-ndjson'
+    else:
+        body = stream_csv(serialize_run(run) for run in rows)
+        mimetype = 'text/csv'
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=runs.{output_format}'
+    })
+
+@app.route('/api/runs/<int:run_id>/children')
+def api_run_children(run_id):
+    """Partition and gather runs of a fan-out run, with a count per status."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        children = scheduler.run_manager.get_child_runs(run_id)
+        counts = {}
+        for child in children:
+            counts[child['status']] = counts.get(child['status'], 0) + 1
+        return jsonify({
+            'status': 'success',
+            'run_id': run_id,
+            'children': [serialize_run(child) for child in children],
+            'counts': counts
+        })
+    except Exception as e:
+        logger.error(f"Error getting child runs of run {run_id}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/backfills', methods=['POST'])
+def api_create_backfill():
+    """Start a backfill: {"task": name, "start_date", "end_date", "max_parallel", "pass_as", "force"}."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    data = request.get_json(silent=True) or {}
+    task = scheduler.task_manager.get_task(task_name=data.get('task'))
+    if not task:
+        return jsonify({'status': 'error', 'message': f"Task \"{data.get('task')}\" not found"}), 404
+    try:
+        start, end = check_backfill(task, data.get('start_date'), data.get('end_date'),
+                                    data.get('max_parallel', 1), data.get('pass_as', 'env'),
+                                    BACKFILL_CONFIG['max_dates'])
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    try:
+        backfill_id = scheduler.run_manager.backfills.create_job(
+            task['task_id'], start, end, max_parallel=data.get('max_parallel', 1),
+            pass_as=data.get('pass_as', 'env'), skip_succeeded=not data.get('force'),
+            requested_by='dashboard'
+        )
+        if hasattr(scheduler, 'backfill_engine'):
+            scheduler.backfill_engine.wake()
+        job = scheduler.run_manager.backfills.get_jobs(limit=1, backfill_id=backfill_id)[0]
+        return jsonify({'status': 'success', 'backfill': serialize_run(job)})
+    except Exception as e:
+        logger.error(f"Error creating backfill for task {task['task_name']}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/backfills', methods=['GET'])
+def api_backfills():
+    """Recent backfills with a count of dates per status."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        jobs = scheduler.run_manager.backfills.get_jobs(limit=limit)
+        return jsonify({'status': 'success', 'backfills': [serialize_run(job) for job in jobs]})
+    except Exception as e:
+        logger.error(f"Error getting backfills: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/backfills/<int:backfill_id>')
+def api_backfill(backfill_id):
+    """One backfill and the status and run of each of its dates."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        jobs = scheduler.run_manager.backfills.get_jobs(limit=1, backfill_id=backfill_id)
+        if not jobs:
+            return jsonify({'status': 'error', 'message': f'Backfill {backfill_id} not found'}), 404
+        items = scheduler.run_manager.backfills.get_items(backfill_id)
+        return jsonify({
+            'status': 'success',
+            'backfill': serialize_run(jobs[0]),
+            'dates': [serialize_run(item) for item in items]
+        })
+    except Exception as e:
+        logger.error(f"Error getting backfill {backfill_id}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/backfills/<int:backfill_id>/cancel', methods=['POST'])
+def api_cancel_backfill(backfill_id):
+    """Stop starting new dates of a backfill; dates already running finish."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        if not scheduler.run_manager.backfills.cancel_job(backfill_id):
+            return jsonify({'status': 'error', 'message': f'Backfill {backfill_id} is not active'}), 404
+        return jsonify({'status': 'success', 'message': f'Backfill {backfill_id} cancelled'})
+    except Exception as e:
+        logger.error(f"Error cancelling backfill {backfill_id}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def stream_csv(rows):
+    """Render dict rows as CSV text chunks, with a header from the first row."""
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+            writer.writeheader()
+        writer.writerow(row)
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Per-task success rate, retry/timeout counts and duration percentiles.
+
+    Served from the hourly rollups. ?window= picks one of the configured
+    windows (default: all of them); ?task_id= or ?task= narrows to one task.
+    """
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    windows = ANALYTICS_CONFIG['windows']
+    window = request.args.get('window')
+    if window and window not in windows:
+        return jsonify({'status': 'error', 'message': f'Unknown window: {window}',
+                        'windows': list(windows)}), 400
+
+    try:
+        task_id = request.args.get('task_id', type=int)
+        if request.args.get('task'):
+            task = scheduler.task_manager.get_task(task_name=request.args['task'])
+            if not task:
+                return jsonify({'status': 'error', 'message': f'Task "{request.args["task"]}" not found'}), 404
+            task_id = task['task_id']
+
+        results = {
+            name: scheduler.run_manager.rollups.get_task_analytics(windows[name], task_id=task_id)
+            for name in ([window] if window else windows)
+        }
+        return jsonify({'status': 'success', 'windows': results})
+    except Exception as e:
+        logger.error(f"Error computing analytics: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/timeline')
+def api_timeline():
+    """Forecast fires between ?from= and ?to= (ISO, default the next 24h).
+
+    Read from the cached forecast table. Includes a concurrency histogram of
+    runs expected to be in progress per ?bucket= seconds (default 60), using
+    each task's median duration; ?task= or ?task_id= narrows to one task.
+    """
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'task_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else datetime.now()
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else start + timedelta(hours=24)
+        bucket_seconds = max(1, request.args.get('bucket', 60, type=int))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid parameter: {e}'}), 400
+    if end <= start or end - start > timedelta(hours=FORECAST_CONFIG['max_range_hours']):
+        return jsonify({'status': 'error', 'message':
+                        f"'to' must be after 'from' and within {FORECAST_CONFIG['max_range_hours']} hours"}), 400
+
+    try:
+        forecasts = scheduler.task_manager.forecasts
+        task_id = request.args.get('task_id', type=int)
+        if request.args.get('task'):
+            task = scheduler.task_manager.get_task(task_name=request.args['task'])
+            if not task:
+                return jsonify({'status': 'error', 'message': f'Task "{request.args["task"]}" not found'}), 404
+            task_id = task['task_id']
+
+        default_seconds = FORECAST_CONFIG['default_duration_seconds']
+        # Runs that fired shortly before 'from' may still be in progress inside the range
+        lookback = timedelta(seconds=forecasts.get_max_expected_seconds(default_seconds))
+        rows = forecasts.get_timeline(start - lookback, end, task_id=task_id, default_seconds=default_seconds)
+        histogram = concurrency_histogram(
+            ((row['fire_time'], float(row['expected_seconds'])) for row in rows), start, end, bucket_seconds
+        )
+
+        fires = [row for row in rows if row['fire_time'] >= start]
+        limit = FORECAST_CONFIG['max_fires_returned']
+        histogram['start'] = histogram['start'].isoformat()
+        histogram['peak_at'] = histogram['peak_at'].isoformat()
+        return jsonify({
+            'status': 'success',
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'count': len(fires),
+            'truncated': len(fires) > limit,
+            'fires': [serialize_run(row) for row in fires[:limit]],
+            'concurrency': histogram
+        })
+    except Exception as e:
+        logger.error(f"Error building timeline: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/logs/search')
+def api_search_logs():
+    """Log lines containing every word of ?q=, newest first, from the log index.
+
+    Words match as prefixes. Filters: ?from= / ?to= (ISO) or ?hours=, ?task=
+    or ?task_id=, ?run_id=, ?kind=run|scheduler; ?limit= caps the matches.
+    """
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'log_index')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'status': 'error', 'message': "Missing 'q'"}), 400
+    try:
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+        if request.args.get('hours') and not start:
+            start = datetime.now() - timedelta(hours=float(request.args['hours']))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid parameter: {e}'}), 400
+    kind = request.args.get('kind')
+    if kind not in (None, 'run', 'scheduler'):
+        return jsonify({'status': 'error', 'message': "'kind' must be 'run' or 'scheduler'"}), 400
+    limit = min(max(1, request.args.get('limit', 100, type=int)), LOG_SEARCH_CONFIG['max_results'])
+
+    try:
+        task_id = request.args.get('task_id', type=int)
+        if request.args.get('task'):
+            task = scheduler.task_manager.get_task(task_name=request.args['task'])
+            if not task:
+                return jsonify({'status': 'error', 'message': f'Task "{request.args["task"]}" not found'}), 404
+            task_id = task['task_id']
+
+        started = time.time()
+        matches, truncated = scheduler.log_index.search(
+            query, start=start, end=end, task_id=task_id,
+            run_id=request.args.get('run_id', type=int), kind=kind, limit=limit
+        )
+        return jsonify({
+            'status': 'success',
+            'query': query,
+            'count': len(matches),
+            'truncated': truncated,
+            'elapsed_ms': round((time.time() - started) * 1000, 1),
+            'matches': matches
+        })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error searching logs: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/task/<task_name>/history')
+def api_get_task_history(task_name):
+    """Recent runs of a task in the shape used by the tasks and logs pages."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'run_manager')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    try:
+        task = scheduler.task_manager.get_task(task_name=task_name)
+        if not task:
+            return jsonify({'status': 'error', 'message': f'Task "{task_name}" not found'}), 404
+
+        runs = scheduler.run_manager.get_run_history(
+            limit=request.args.get('limit', 20, type=int), task_id=task['task_id'])
+        history = [{
+            'run_id': run['run_id'],
+            'start_time': run['started_at'].isoformat() if run['started_at'] else None,
+            'end_time': run['completed_at'].isoformat() if run['completed_at'] else None,
+            'status': run['status'],
+            'duration': float(run['duration_seconds']) if run['duration_seconds'] is not None else None,
+            'triggered_by': run['triggered_by'],
+            'output': run['error_message']
+        } for run in runs]
+        return jsonify({'status': 'success', 'task_name': task_name, 'history': history})
+    except Exception as e:
+        logger.error(f"Error getting history for task {task_name}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/traces/summary')
+def api_trace_summary():
+    """Per-task, per-phase run lifecycle durations recorded by the tracer."""
+    scheduler = current_app.config.get('SCHEDULER')
+    if not (scheduler and hasattr(scheduler, 'tracer')):
+        return jsonify({'status': 'error', 'message': 'Scheduler service not available'}), 503
+
+    task_id = request.args.get('task_id', type=int)
+    summary = scheduler.tracer.get_summary(task_id)
+    return jsonify({
+        'status': 'success',
+        'summary': {str(k): v for k, v in summary.items()}
+    })
+
 # Main entry point for direct execution (for testing)
 if __name__ == '__main__':
     # This part is for standalone testing only
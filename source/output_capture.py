@@ -0,0 +1,160 @@
+# SchedulerService/output_capture.py
+"""
+Pipe-based capture of a run's stdout/stderr.
+A reader thread drains the child's pipe as fast as it produces output,
+timestamps each line and keeps the most recent output in an in-memory ring
+buffer for live views. Disk writes happen on a separate writer thread in
+large chunks, so a slow log disk never back-pressures the child. Output past
+the task's cap is counted but not written.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from log_reader import decode_log
+
+READ_SIZE = 64 * 1024
+
+
+class OutputRing:
+    """The last max_bytes of a run's output as numbered, timestamped lines."""
+
+    def __init__(self, max_bytes: int = 256 * 1024):
+        self.max_bytes = max_bytes
+        self._lines = deque()       # (seq, time, text)
+        self._bytes = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, text: str):
+        with self._lock:
+            self._seq += 1
+            self._lines.append((self._seq, timestamp, text))
+            self._bytes += len(text)
+            while self._bytes > self.max_bytes and len(self._lines) > 1:
+                self._bytes -= len(self._lines.popleft()[2])
+
+    def since(self, seq: int = 0, limit: int = None) -> Tuple[List[Dict], int]:
+        """Lines after seq (oldest first, at most the last limit) and the latest seq."""
+        with self._lock:
+            lines = [entry for entry in self._lines if entry[0] > seq]
+            latest = self._seq
+        if limit:
+            lines = lines[-limit:]
+        return [
+            {'seq': s, 'time': datetime.fromtimestamp(t).isoformat(timespec='milliseconds'), 'line': text}
+            for s, t, text in lines
+        ], latest
+
+
+class OutputCapture:
+    """Reads a child's output pipe into an OutputRing and, in large writes, the run log."""
+
+    def __init__(self, pipe, log_file, name: str = 'run', ring_bytes: int = 256 * 1024,
+                 max_log_bytes: int = None, write_chunk_bytes: int = 1024 * 1024,
+                 flush_seconds: float = 1.0, max_pending_bytes: int = 64 * 1024 * 1024,
+                 timestamp_lines: bool = True):
+        self.pipe = pipe                # binary stdout pipe of the child
+        self.log_file = log_file        # binary file object, written only by the writer thread
+        self.name = name
+        self.ring = OutputRing(ring_bytes)
+        self.max_log_bytes = max_log_bytes
+        self.write_chunk_bytes = write_chunk_bytes
+        self.flush_seconds = flush_seconds
+        self.max_pending_bytes = max_pending_bytes
+        self.timestamp_lines = timestamp_lines
+        self.bytes_read = 0
+        self.bytes_logged = 0
+        self.dropped_bytes = 0          # over the cap, or while the disk could not keep up
+        self.capped = False
+        self.write_error = None
+        self._pending = bytearray()
+        self._eof = False
+        self._detached = False
+        self._cond = threading.Condition()
+        self._reader = threading.Thread(target=self._read, name=f'OutputReader-{name}', daemon=True)
+        self._writer = threading.Thread(target=self._write, name=f'OutputWriter-{name}', daemon=True)
+
+    def start(self):
+        self._reader.start()
+        self._writer.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for the pipe to close and everything to be written; False on timeout."""
+        self._reader.join(timeout)
+        if self._reader.is_alive():
+            return False
+        self._writer.join(timeout)
+        return not self._writer.is_alive()
+
+    def detach(self):
+        """Stop writing to the log (e.g. a grandchild still holds the pipe open).
+
+        Anything still buffered is written first; later output only reaches the ring.
+        """
+        with self._cond:
+            self._detached = True
+            self._cond.notify_all()
+        self._writer.join()
+
+    def _read(self):
+        at_line_start = True
+        try:
+            for chunk in iter(lambda: self.pipe.readline(READ_SIZE), b''):
+                now = time.time()
+                self.bytes_read += len(chunk)
+                self.ring.append(now, decode_log(chunk).rstrip('\r\n'))
+                data = chunk
+                if self.timestamp_lines and at_line_start:
+                    stamp = datetime.fromtimestamp(now).isoformat(sep=' ', timespec='milliseconds')
+                    data = stamp.encode() + b' ' + chunk
+                at_line_start = chunk.endswith(b'\n')
+                self._buffer(data)
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+
+    def _buffer(self, data: bytes):
+        with self._cond:
+            if self._detached:
+                return
+            if self.capped or (self.max_log_bytes and self.bytes_logged + len(data) > self.max_log_bytes):
+                if not self.capped:
+                    self.capped = True
+                    self._pending += (f"\n=== Output capped at {self.max_log_bytes // (1024 * 1024)} MB; "
+                                      f"further output is not logged ===\n").encode()
+                self.dropped_bytes += len(data)
+                return
+            if len(self._pending) >= self.max_pending_bytes:
+                # The disk has fallen far behind; drop rather than stall the child
+                self.dropped_bytes += len(data)
+                return
+            self._pending += data
+            self.bytes_logged += len(data)
+            if len(self._pending) >= self.write_chunk_bytes:
+                self._cond.notify_all()
+
+    def _write(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._eof or self._detached or len(self._pending) >= self.write_chunk_bytes,
+                    timeout=self.flush_seconds
+                )
+                data, self._pending = bytes(self._pending), bytearray()
+                done = self._eof or self._detached
+            if data:
+                try:
+                    self.log_file.write(data)
+                    self.log_file.flush()
+                except (OSError, ValueError) as e:
+                    self.write_error = str(e)
+                    self.dropped_bytes += len(data)
+            if done:
+                return
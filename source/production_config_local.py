@@ -29,7 +29,12 @@ DATABASE_SCHEMA = 'nicks_workspace'
 DASHBOARD_CONFIG = {
     'host': '0.0.0.0',  # Listen on all interfaces for network access
     'port': 5001,
-    'debug': False
+    'debug': False,
+    # 'embedded' runs the dashboard in a thread of the scheduler service;
+    # 'standalone' expects it to run separately via dashboard_server.py
+    'mode': 'embedded',
+    'workers': 4,       # standalone worker processes (gunicorn; POSIX only)
+    'threads': 16       # threads per worker; each open /api/events stream holds one
 }
 
 # Service configuration
@@ -47,7 +52,9 @@ SCHEDULER_CONFIG = {
         'coalesce': True,
         'max_instances': 1,
         'misfire_grace_time': 300
-    }
+    },
+    'config_poll_seconds': 15,  # how often to check for task changes made by other processes
+    'next_run_flush_seconds': 5  # batch interval for writing task_schedules.next_run_time
 }
 
 # Task defaults
@@ -77,5 +84,207 @@ RETENTION_POLICY = {
     'cleanup_interval_hours': 24
 }
 
+# Run lifecycle tracing (OTLP/JSON lines, no collector required)
+TRACE_CONFIG = {
+    'enabled': True,
+    'trace_file': os.path.join(LOG_DIR, "traces", "run_traces.jsonl"),
+    'max_bytes': 50*1024*1024  # 50MB, one backup kept
+}
+
+# Rolling per-task duration statistics
+DURATION_STATS_CONFIG = {
+    'ewma_alpha': 0.2,
+    'sketch_relative_accuracy': 0.01,   # quantile estimates within 1%
+    'window_runs': 200,                 # sketch decays over roughly this many runs
+    'min_samples': 10,                  # runs needed before the envelope is trusted
+    'adaptive_timeout_factor': 3.0,     # default k for adaptive timeout = k x p99
+    'adaptive_timeout_min_seconds': 60,
+    'regression_quantile': 0.99,
+    'regression_factor': 1.5            # alert when a run exceeds 1.5 x p99
+}
+
+# Opt-in profiling of task runs ('cprofile' or 'sampling')
+PROFILING_CONFIG = {
+    'sampling_profiler': 'py-spy',   # executable used for 'sampling' mode
+    'sampling_rate': 100,            # samples per second
+    'top_functions': 25
+}
+
+# Stuck worker watchdog
+WATCHDOG_CONFIG = {
+    'enabled': True,
+    'interval_seconds': 15,     # how often worker stacks are sampled
+    'threshold_seconds': 300,   # same frame for this long raises 'worker_stuck'
+    # Waiting on the child process, a pool call or a fan-out's child runs is bounded
+    # by their timeouts, not a hang
+    'expected_wait_functions': ['wait_for_process', 'run_callable', 'run_fanout']
+}
+
+# Background status snapshot served by /api/tasks and /api/status
+SNAPSHOT_CONFIG = {
+    'interval_seconds': 5,      # job and process sampling period
+    'db_refresh_seconds': 30    # task metadata / last run refresh period
+}
+
+# Server-Sent Events push channel (/api/events)
+EVENTS_CONFIG = {
+    'history_size': 1000,       # events retained for Last-Event-ID replay
+    'keepalive_seconds': 15,
+    'client_retry_ms': 3000
+}
+
+# Serialised/gzipped response cache for the snapshot-backed dashboard APIs
+RESPONSE_CACHE_CONFIG = {
+    'max_entries': 32,
+    'gzip_level': 6,
+    'min_gzip_bytes': 512       # smaller bodies are sent uncompressed
+}
+
+# Per-task analytics served from hourly rollups (/api/analytics, CLI stats)
+ANALYTICS_CONFIG = {
+    'windows': {'24h': 24, '7d': 24 * 7, '30d': 24 * 30},   # window name -> hours
+    'default_window': '24h'
+}
+
+# Run log viewing (/api/runs/<id>/log)
+LOG_VIEW_CONFIG = {
+    'default_tail_lines': 200,
+    'max_tail_lines': 10000,
+    'follow_poll_seconds': 1.0,     # how often follow mode checks for new bytes
+    'status_check_seconds': 5       # how often follow mode checks whether the run ended
+}
+
+# NDJSON/CSV run history exports (/api/runs?format=...) stream over their own connections
+RUN_EXPORT_CONFIG = {
+    'max_concurrent': 3,                # more concurrent exports get 503
+    'statement_timeout_seconds': 300,
+    'idle_timeout_seconds': 120         # a reader stalled this long ends its export
+}
+
+# Read-only channel serving scheduler state to a standalone dashboard
+# (enable it together with DASHBOARD_CONFIG['mode'] = 'standalone'; it is not started otherwise)
+STATUS_CHANNEL_CONFIG = {
+    'enabled': False,
+    'host': '127.0.0.1',
+    'port': 5002,
+    'authkey': None,                    # None: a key generated into authkey_file on first start
+    'authkey_file': os.path.join(LOCAL_ROOT, "status_channel.key"),
+    'timeout_seconds': 5
+}
+
+# Upcoming-fires forecast (/api/timeline)
+FORECAST_CONFIG = {
+    'enabled': True,
+    'horizon_hours': 24 * 7,          # how far ahead fires are cached
+    'max_fires_per_task': 5000,       # cap for very frequent interval jobs
+    'refresh_seconds': 900,           # extend the horizon / prune past fires
+    'default_duration_seconds': 60,   # expected run time for tasks with no history
+    'max_range_hours': 24 * 7,
+    'max_fires_returned': 5000
+}
+
+# Run output is written to a local spool and shipped to the task's log folder
+# on the share in the background
+LOG_SPOOL_CONFIG = {
+    'enabled': True,
+    'spool_dir': os.path.join(LOCAL_ROOT, "spool"),
+    'retry_seconds': [5, 30, 120, 600],   # backoff between attempts; the last repeats
+    'alert_after_attempts': 5
+}
+
+# Compressed log archive (indexed block-gzip; still readable by gzip/zcat)
+LOG_ARCHIVE_CONFIG = {
+    'enabled': True,
+    'block_size': 256 * 1024,           # uncompressed bytes per independently compressed block
+    'compress_level': 6,
+    'compress_after_minutes': 10,       # finished run logs written straight to the share
+    'batch_size': 50,                   # run logs compressed per cleanup pass
+    'compress_scheduler_logs': True     # rotated scheduler_*.log backups
+}
+
+# Log records are queued by the calling thread and written by one LogWriter thread
+LOGGING_CONFIG = {
+    'format': 'json',                   # 'json' (one object per line) or 'text'
+    'queue_size': 10000,                # records beyond this are dropped rather than blocking
+    'access_log_rules': [               # dashboard request lines; sample 0 drops, N keeps 1 in N
+        {'pattern': r'^/api/events', 'sample': 0},
+        {'pattern': r'^/static/', 'sample': 0},
+        {'pattern': r'^/api/(status|tasks|runs)', 'sample': 100}
+    ]
+}
+
+# Full-text index over run logs and the scheduler's daily log (local SQLite file)
+LOG_SEARCH_CONFIG = {
+    'enabled': True,
+    'index_path': os.path.join(LOCAL_ROOT, "index", "log_index.sqlite3"),
+    'interval_seconds': 60,             # indexing pass interval
+    'batch_runs': 200,                  # runs fetched per query while catching up
+    'scheduler_log': 'scheduler_daily.log',
+    'max_line_bytes': 2048,             # longer lines are indexed and returned truncated
+    'max_results': 500
+}
+
+# Run stdout/stderr is read through a pipe; the log file is written in large chunks
+OUTPUT_CAPTURE_CONFIG = {
+    'ring_kb': 256,                     # recent output kept in memory per running task
+    'max_log_mb': 500,                  # default per-run log cap (tasks can set max_output_mb)
+    'write_chunk_kb': 1024,
+    'flush_seconds': 1.0,               # partial chunks are written at least this often
+    'max_pending_mb': 64,               # unwritten output held while the disk is slow
+    'timestamp_lines': True,            # prefix each logged line with the time it was read
+    'drain_seconds': 10                 # wait for the pipe to close after the process exits
+}
+
+# Dispatch mode: the scheduler only queues runs; worker_agent.py processes
+# (on this or other hosts) claim and execute them
+DISPATCH_CONFIG = {
+    'enabled': False,
+    'worker_slots': 4,                  # concurrent runs per worker agent
+    'poll_seconds': 2,                  # idle workers check the queue this often
+    'heartbeat_seconds': 15,
+    'lease_seconds': 120,               # a claimed run with no heartbeat for this long is failed and retried
+    'reap_interval_seconds': 30
+}
+
+# Sharded scheduling: several scheduler nodes split the tasks between them
+SHARDING_CONFIG = {
+    'enabled': False,
+    'node_name': None,                  # unique per node; defaults to COMPUTERNAME
+    'heartbeat_seconds': 10,
+    'member_timeout_seconds': 45,       # a node silent for this long loses its tasks
+    'virtual_nodes': 64,                # ring points per node; more gives a more even split
+    'fire_claim_keep_days': 7
+}
+
+# 'callable' tasks (script_path = 'package.module:function') run on a process pool
+CALLABLE_CONFIG = {
+    'workers': 4,
+    'max_tasks_per_child': 100,         # a worker is replaced after this many calls
+    'max_memory_mb': 512,               # the pool is replaced once a worker grows past this
+    'python': VENV_PYTHON,              # interpreter for pool workers
+    'sys_path': [PROJECT_ROOT],         # where task modules are imported from
+    'kill_grace_seconds': 300           # after a timeout, wait this long for other calls before killing the pool
+}
+
+# 'fanout' tasks: one scheduled parent run expands into a child run per partition
+FANOUT_CONFIG = {
+    'max_parallel': 4,                  # default child runs at a time (tasks can set max_parallel)
+    'env_var': 'PARTITION_KEY',         # default variable the partition key is passed in
+    'generator_timeout_seconds': 300,
+    'max_partitions': 1000
+}
+
+# Backfills: one run of a script task per logical date in a range
+BACKFILL_CONFIG = {
+    'enabled': True,
+    'poll_seconds': 5,
+    'max_workers': 4,                   # backfill runs at a time on this node, less live runs
+    'lease_seconds': 300,               # another node adopts a job after this long without heartbeat
+    'max_attempts': 2,                  # runs per date before it is marked failed
+    'max_dates': 3660,
+    'env_var': 'LOGICAL_DATE'
+}
+
 # Ensure directories exist
-os.makedirs(LOG_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(LOG_DIR, exist_ok=True)
+os.makedirs(LOG_SPOOL_CONFIG['spool_dir'], exist_ok=True)
\ No newline at end of file
@@ -1,5 +1,6 @@
 # SchedulerService/production_scheduler_core.py
 import os
+import re
 import sys
 import logging
 import subprocess
@@ -7,17 +8,43 @@ import threading
 import time
 import psutil
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import math
+import shutil
 
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from apscheduler.events import (
+    EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_ADDED, EVENT_JOB_REMOVED,
+    EVENT_JOB_MODIFIED, EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED
+)
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
 
 from db_models import DatabaseManager, TaskManager, RunManager, HealthManager, AlertManager
-from production_config import VENV_PYTHON, LOG_DIR, PROJECT_ROOT
+from production_config import VENV_PYTHON, LOG_DIR, PROJECT_ROOT, TRACE_CONFIG, DURATION_STATS_CONFIG
+from production_config import PROFILING_CONFIG, WATCHDOG_CONFIG, SNAPSHOT_CONFIG
+from production_config import SCHEDULER_CONFIG, STATUS_CHANNEL_CONFIG, FORECAST_CONFIG
+from production_config import LOG_SPOOL_CONFIG, LOG_ARCHIVE_CONFIG, RETENTION_POLICY, LOGGING_CONFIG
+from production_config import LOG_SEARCH_CONFIG, OUTPUT_CAPTURE_CONFIG, DISPATCH_CONFIG, SHARDING_CONFIG
+from production_config import CALLABLE_CONFIG, FANOUT_CONFIG, BACKFILL_CONFIG, DASHBOARD_CONFIG
+from run_tracing import RunTracer
+from profile_reports import PROFILE_MODES, profile_artifact_path
+from thread_diagnostics import StuckWorkerWatchdog, dump_threads
+from status_snapshot import StatusSampler
+from event_bus import event_bus
+from status_channel import StatusChannelServer
+from schedule_forecast import ScheduleForecaster, NextRunRecorder
+from log_shipper import LogShipper
+from log_archive import compress_file, archived_name, rotate_to_archive
+from log_pipeline import JsonFormatter, install_queue_logging, log_context, bind_log_context
+from log_index import LogIndex, LogIndexer
+from output_capture import OutputCapture
+from sharding import ShardCoordinator, scheduled_fire_time
+from callable_pool import CallablePool
+from backfill import BackfillEngine
 
 # Configure logging with rotation
 from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
@@ -25,7 +52,9 @@ from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 class ProductionScheduler:
     """Production-grade scheduler with dependency support and resilience."""
     
-    def __init__(self):
+    def __init__(self, log_prefix: str = 'scheduler', service_name: str = 'PythonSchedulerService',
+                 node_name: str = None):
+        self.log_prefix = log_prefix
         self.setup_logging()
         self.logger = logging.getLogger(__name__)
         
@@ -33,8 +62,17 @@ class ProductionScheduler:
         self.db = DatabaseManager()
         self.task_manager = TaskManager(self.db)
         self.run_manager = RunManager(self.db)
-        self.health_manager = HealthManager(self.db)
+        self.health_manager = HealthManager(self.db, service_name=service_name,
+                                            machine_name=node_name or SHARDING_CONFIG['node_name'])
         self.alert_manager = AlertManager(self.db)
+        self.ensure_schema()
+        
+        # Run lifecycle tracing
+        self.tracer = RunTracer(
+            TRACE_CONFIG['trace_file'],
+            enabled=TRACE_CONFIG['enabled'],
+            max_bytes=TRACE_CONFIG['max_bytes']
+        )
         
         # Initialize scheduler
         self.scheduler = BackgroundScheduler(
@@ -47,55 +85,193 @@ class ProductionScheduler:
         )
         
         # Thread pool for parallel execution
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix='ManualRun')
+        
+        # Process pool for 'callable' tasks; workers start on the first call
+        self.callable_pool = CallablePool(
+            workers=CALLABLE_CONFIG['workers'],
+            max_tasks_per_child=CALLABLE_CONFIG['max_tasks_per_child'],
+            max_memory_mb=CALLABLE_CONFIG['max_memory_mb'],
+            python=CALLABLE_CONFIG['python'],
+            sys_path=CALLABLE_CONFIG['sys_path'],
+            kill_grace_seconds=CALLABLE_CONFIG['kill_grace_seconds']
+        )
         
         # Track running processes
         self.running_processes = {}
+        self.running_runs = {}  # run_id -> task_id/task_name/started_at
+        self.run_outputs = {}   # run_id -> OutputCapture (recent output of running tasks)
         self.process_lock = threading.Lock()
+        self.started_at = None
+        self.event_bus = event_bus
+        self.config_version = None
+        self.job_signatures = {}  # task_id -> (task_name, schedule_type, schedule_config) of its job
+        self.job_triggers = {}    # task_id -> trigger of its job, for fire claims
+        self.reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        
+        # In dispatch mode fires only enqueue; worker agents claim and run them
+        self.dispatch_mode = DISPATCH_CONFIG['enabled']
+        self._reaped_at = 0
+        
+        # Sharded mode: this node only schedules the tasks it owns on the hash ring
+        self.shard = None
+        if SHARDING_CONFIG['enabled']:
+            self.shard = ShardCoordinator(
+                self.health_manager,
+                on_change=self.load_tasks_from_db,
+                heartbeat_seconds=SHARDING_CONFIG['heartbeat_seconds'],
+                member_timeout_seconds=SHARDING_CONFIG['member_timeout_seconds'],
+                virtual_nodes=SHARDING_CONFIG['virtual_nodes']
+            )
+        self._fire_claims_pruned_at = 0
+        
+        # Runs backfill jobs created from the CLI or the dashboard
+        self.backfill_engine = BackfillEngine(
+            self,
+            poll_seconds=BACKFILL_CONFIG['poll_seconds'],
+            max_workers=BACKFILL_CONFIG['max_workers'],
+            lease_seconds=BACKFILL_CONFIG['lease_seconds'],
+            max_attempts=BACKFILL_CONFIG['max_attempts'],
+            env_var=BACKFILL_CONFIG['env_var']
+        )
+        
+        # Background snapshot for the dashboard APIs
+        self.status_sampler = StatusSampler(
+            self,
+            interval_seconds=SNAPSHOT_CONFIG['interval_seconds'],
+            db_refresh_seconds=SNAPSHOT_CONFIG['db_refresh_seconds']
+        )
+        
+        # Upcoming fires for /api/timeline
+        self.forecaster = ScheduleForecaster(
+            self.scheduler,
+            self.task_manager.forecasts,
+            horizon_hours=FORECAST_CONFIG['horizon_hours'],
+            max_fires_per_task=FORECAST_CONFIG['max_fires_per_task'],
+            refresh_seconds=FORECAST_CONFIG['refresh_seconds'],
+            owns=self.shard.owns if self.shard else None
+        )
+        
+        # Ships spooled run logs to the share after each run
+        self.log_shipper = LogShipper(
+            self.run_manager,
+            LOG_SPOOL_CONFIG['spool_dir'],
+            retry_seconds=LOG_SPOOL_CONFIG['retry_seconds'],
+            alert_manager=self.alert_manager,
+            alert_after_attempts=LOG_SPOOL_CONFIG['alert_after_attempts'],
+            compress=LOG_ARCHIVE_CONFIG['enabled'],
+            block_size=LOG_ARCHIVE_CONFIG['block_size'],
+            compress_level=LOG_ARCHIVE_CONFIG['compress_level']
+        )
+        self._retention_checked_at = 0
+        
+        # Full-text search over run and scheduler logs
+        self.log_index = LogIndex(LOG_SEARCH_CONFIG['index_path'], max_line_bytes=LOG_SEARCH_CONFIG['max_line_bytes'])
+        self.log_indexer = LogIndexer(
+            self.log_index,
+            self.run_manager,
+            LOG_DIR,
+            scheduler_log=LOG_SEARCH_CONFIG['scheduler_log'],
+            interval_seconds=LOG_SEARCH_CONFIG['interval_seconds'],
+            batch_runs=LOG_SEARCH_CONFIG['batch_runs'],
+            keep_days=RETENTION_POLICY['keep_logs_days'],
+            skip_prefix=LOG_SPOOL_CONFIG['spool_dir'] if LOG_SPOOL_CONFIG['enabled'] else None
+        )
+        
+        # Persisted next fire times, so other processes need not ask the scheduler
+        self.next_run_recorder = NextRunRecorder(
+            self.scheduler,
+            self.task_manager,
+            flush_seconds=SCHEDULER_CONFIG.get('next_run_flush_seconds', 5),
+            owns=self.shard.owns if self.shard else None
+        )
         
         # Health monitoring
         self.start_health_monitor()
         
+        # Read-only state for a standalone dashboard process
+        self.status_channel = StatusChannelServer(
+            self,
+            STATUS_CHANNEL_CONFIG['host'],
+            STATUS_CHANNEL_CONFIG['port'],
+            STATUS_CHANNEL_CONFIG['authkey'],
+            authkey_file=STATUS_CHANNEL_CONFIG.get('authkey_file')
+        )
+        
+        # Stuck worker detection
+        self.watchdog = StuckWorkerWatchdog(
+            self.alert_manager,
+            interval_seconds=WATCHDOG_CONFIG['interval_seconds'],
+            threshold_seconds=WATCHDOG_CONFIG['threshold_seconds'],
+            expected_wait_functions=WATCHDOG_CONFIG['expected_wait_functions']
+        )
+        if WATCHDOG_CONFIG['enabled']:
+            self.watchdog.start()
+        
         self.logger.info("Production scheduler initialized")
     
+    def ensure_schema(self):
+        """Create tables and columns the scheduler relies on beyond the base schema."""
+        try:
+            self.task_manager.ensure_schema()
+            self.run_manager.ensure_schema()
+            self.run_manager.duration_stats.ensure_schema()
+            self.run_manager.rollups.ensure_schema()
+            self.run_manager.queue.ensure_schema()
+            self.task_manager.forecasts.ensure_schema()
+            self.task_manager.fire_claims.ensure_schema()
+            self.run_manager.backfills.ensure_schema()
+        except Exception as e:
+            self.logger.error(f"Failed to ensure database schema: {e}")
+    
     def setup_logging(self):
-        """Configure production logging with rotation."""
-        log_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-        )
-        
-        # Root logger
-        root_logger = logging.getLogger()
-        root_logger.setLevel(logging.INFO)
+        """Configure production logging with rotation, written by a background LogWriter."""
+        if LOGGING_CONFIG['format'] == 'json':
+            log_formatter = JsonFormatter()
+        else:
+            log_formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+            )
         
         # Main log file with size rotation
         main_handler = RotatingFileHandler(
-            os.path.join(LOG_DIR, 'scheduler_service.log'),
+            os.path.join(LOG_DIR, f'{self.log_prefix}_service.log'),
             maxBytes=50*1024*1024,  # 50MB
             backupCount=10
         )
         main_handler.setFormatter(log_formatter)
-        root_logger.addHandler(main_handler)
         
         # Error log file
         error_handler = RotatingFileHandler(
-            os.path.join(LOG_DIR, 'scheduler_errors.log'),
+            os.path.join(LOG_DIR, f'{self.log_prefix}_errors.log'),
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(log_formatter)
-        root_logger.addHandler(error_handler)
         
         # Daily log file
         daily_handler = TimedRotatingFileHandler(
-            os.path.join(LOG_DIR, 'scheduler_daily.log'),
+            os.path.join(LOG_DIR, f'{self.log_prefix}_daily.log'),
             when='midnight',
             interval=1,
             backupCount=30
         )
         daily_handler.setFormatter(log_formatter)
-        root_logger.addHandler(daily_handler)
+        
+        # Rotated backups are stored compressed (and stay tail/range readable)
+        if LOG_ARCHIVE_CONFIG['enabled'] and LOG_ARCHIVE_CONFIG['compress_scheduler_logs']:
+            for handler in (main_handler, error_handler, daily_handler):
+                handler.namer = archived_name
+                handler.rotator = rotate_to_archive
+        
+        # Log calls only enqueue; file writes and rotation happen on the LogWriter thread
+        self.log_writer = install_queue_logging(
+            [main_handler, error_handler, daily_handler],
+            queue_size=LOGGING_CONFIG['queue_size'],
+            access_log_rules=LOGGING_CONFIG['access_log_rules']
+        )
     
     def start_health_monitor(self):
         """Start background health monitoring."""
@@ -107,7 +283,7 @@ class ProductionScheduler:
                         'cpu_percent': psutil.cpu_percent(interval=1),
                         'memory_percent': psutil.virtual_memory().percent,
                         'disk_usage': psutil.disk_usage('/').percent,
-                        'running_tasks': len(self.running_processes),
+                        'running_tasks': len(self.running_runs),
                         'scheduled_jobs': len(self.scheduler.get_jobs()),
                         'python_version': sys.version,
                         'scheduler_running': self.scheduler.running
@@ -128,21 +304,47 @@ class ProductionScheduler:
                 
                 time.sleep(30)  # Update every 30 seconds
         
-        health_thread = threading.Thread(target=monitor_health, daemon=True)
+        health_thread = threading.Thread(target=monitor_health, name='HealthMonitor', daemon=True)
         health_thread.start()
     
+    def get_thread_dump(self) -> List[Dict]:
+        """Stacks of all scheduler threads, annotated with watchdog timings."""
+        return dump_threads(self.watchdog.unchanged_since())
+    
+    def get_run_output(self, run_id: int, since: int = 0, limit: int = None) -> Optional[Dict]:
+        """Buffered output of a running run after line seq since, or None if it is not running here."""
+        with self.process_lock:
+            capture = self.run_outputs.get(run_id)
+        if not capture:
+            return None
+        lines, seq = capture.ring.since(since, limit)
+        return {'seq': seq, 'lines': lines, 'bytes_read': capture.bytes_read, 'capped': capture.capped}
+    
     def load_tasks_from_db(self):
-        """Load and schedule all active tasks from database."""
+        """Load all active tasks from database and reconcile their jobs."""
         try:
-            tasks = self.task_manager.get_active_tasks()
-            
-            for task in tasks:
-                if task.get('schedule_type') and task.get('schedule_config'):
-                    self.schedule_task(task)
-                else:
-                    self.logger.warning(f"Task {task['task_name']} has no schedule defined")
+            with self.reload_lock:
+                # Read the version first so changes made while loading are picked up next poll
+                self.config_version = self.task_manager.get_config_version()
+                tasks = self.task_manager.get_active_tasks()
+                
+                desired = {}
+                for task in tasks:
+                    if self.shard and not self.shard.owns(task['task_id']):
+                        continue
+                    if task.get('schedule_type') and task.get('schedule_config'):
+                        desired[task['task_id']] = task
+                    else:
+                        self.logger.warning(f"Task {task['task_name']} has no schedule defined")
+                
+                changed, removed = self.reconcile_jobs(desired)
             
-            self.logger.info(f"Loaded {len(tasks)} tasks from database")
+            if changed or removed:
+                self.forecaster.mark_changed(changed)
+            owned = f", {len(desired)} owned by this node" if self.shard else ""
+            self.logger.info(f"Loaded {len(tasks)} tasks from database "
+                             f"({len(changed)} jobs scheduled, {len(removed)} removed{owned})")
+            self.status_sampler.request_refresh(reload_db=True)
             
         except Exception as e:
             self.logger.error(f"Failed to load tasks: {e}")
@@ -151,7 +353,39 @@ class ProductionScheduler:
                 f"Failed to load tasks from database: {e}"
             )
     
-    def schedule_task(self, task: Dict):
+    def reconcile_jobs(self, desired: Dict[int, Dict]):
+        """Bring the task_* jobs in line with the desired tasks.
+        
+        Jobs whose schedule is unchanged are left alone, so their next run time
+        is not reset by an unrelated reload; jobs for tasks that were disabled or
+        deleted are removed. Pending retry_* jobs are not touched.
+        Returns the task ids whose jobs were (re)scheduled and removed.
+        """
+        changed, removed = [], []
+        for task_id, task in desired.items():
+            signature = (task['task_name'], task['schedule_type'],
+                         json.dumps(task['schedule_config'], sort_keys=True, default=str))
+            if self.job_signatures.get(task_id) == signature:
+                # A fired one-off (date) job is gone by design and must not be re-added
+                if task['schedule_type'] == 'date' or self.scheduler.get_job(f"task_{task_id}"):
+                    continue
+            if self.schedule_task(task):
+                self.job_signatures[task_id] = signature
+                changed.append(task_id)
+        
+        for job in self.scheduler.get_jobs():
+            if not job.id.startswith('task_'):
+                continue
+            task_id = int(job.id[len('task_'):])
+            if task_id not in desired:
+                job.remove()
+                self.job_signatures.pop(task_id, None)
+                self.job_triggers.pop(task_id, None)
+                self.logger.info(f"Unscheduled task: {job.name} (ID: {task_id})")
+                removed.append(task_id)
+        return changed, removed
+    
+    def schedule_task(self, task: Dict) -> bool:
         """Schedule a task based on its configuration."""
         try:
             task_id = task['task_id']
@@ -162,10 +396,19 @@ class ProductionScheduler:
             if task['schedule_type'] == 'cron':
                 trigger = CronTrigger(**schedule_config)
             elif task['schedule_type'] == 'interval':
+                if self.shard:
+                    # Anchor intervals so every node computes the same fire times
+                    schedule_config = {'start_date': '2000-01-01', 'timezone': self.scheduler.timezone,
+                                       **schedule_config}
                 trigger = IntervalTrigger(**schedule_config)
+            elif task['schedule_type'] == 'date':
+                trigger = DateTrigger(**schedule_config)
+                if trigger.run_date < datetime.now(trigger.run_date.tzinfo):
+                    self.logger.info(f"One-off run for {task_name} at {trigger.run_date} has passed; not scheduling")
+                    return False
             else:
                 self.logger.error(f"Unknown schedule type: {task['schedule_type']}")
-                return
+                return False
             
             # Add job to scheduler
             job = self.scheduler.add_job(
@@ -176,8 +419,10 @@ class ProductionScheduler:
                 name=task_name,
                 replace_existing=True
             )
+            self.job_triggers[task_id] = trigger
             
             self.logger.info(f"Scheduled task: {task_name} (ID: {task_id})")
+            return True
             
         except Exception as e:
             self.logger.error(f"Failed to schedule task {task_name}: {e}")
@@ -186,194 +431,631 @@ class ProductionScheduler:
                 f"Failed to schedule task {task_name}: {e}",
                 task_id=task_id
             )
+            return False
+    
+    def claim_fire(self, task_id: int) -> bool:
+        """Claim the scheduled fire being run now; False if another node already ran it.
+        
+        Nodes can briefly disagree about who owns a task while membership
+        changes; the claim keeps that from running the same fire twice.
+        """
+        trigger = self.job_triggers.get(task_id)
+        now = datetime.now(self.scheduler.timezone)
+        # Looks back as far as misfire_grace_time, the latest a fire can start
+        fire_time = scheduled_fire_time(trigger, now, lookback_seconds=300) if trigger else None
+        if fire_time is None:
+            return True
+        fire_time = fire_time.astimezone(self.scheduler.timezone).replace(tzinfo=None)
+        if self.task_manager.fire_claims.claim(task_id, fire_time, self.health_manager.machine_name):
+            return True
+        self.logger.info(f"Fire of task {task_id} at {fire_time} was already claimed by another node")
+        return False
     
     def execute_task_with_dependencies(self, task_id: int):
         """Execute a task after checking dependencies."""
-        task = self.task_manager.get_task(task_id=task_id)
-        if not task:
-            self.logger.error(f"Task {task_id} not found")
+        if self.shard and not self.claim_fire(task_id):
             return
-        
-        try:
-            # Check dependencies
-            if not self.run_manager.check_dependencies_satisfied(task_id):
-                self.logger.info(f"Dependencies not satisfied for task {task['task_name']}")
+        with self.tracer.span('task.trigger', task_id=task_id, triggered_by='schedule'):
+            with self.tracer.span('task.load'):
+                task = self.task_manager.get_task(task_id=task_id)
+            if not task:
+                self.logger.error(f"Task {task_id} not found")
+                return
+            self.tracer.set_attribute('task_name', task['task_name'])
+            
+            try:
+                # Check dependencies
+                with self.tracer.span('dependency.check'):
+                    satisfied = self.run_manager.check_dependencies_satisfied(task_id)
                 
-                # Create a skipped run entry
-                run_id = self.run_manager.create_run(task_id, triggered_by='schedule')
-                self.run_manager.update_run_status(run_id, 'skipped', 
-                    error_message='Dependencies not satisfied')
+                if not satisfied:
+                    self.logger.info(f"Dependencies not satisfied for task {task['task_name']}")
+                    
+                    # Create a skipped run entry
+                    with self.tracer.span('run.create'):
+                        run_id = self.run_manager.create_run(task_id, triggered_by='schedule')
+                    with self.tracer.span('run.update_status', status='skipped'):
+                        self.run_manager.update_run_status(run_id, 'skipped', 
+                            error_message='Dependencies not satisfied')
+                    
+                    self.alert_manager.create_alert(
+                        'dependency_not_met', 'warning',
+                        f"Task {task['task_name']} skipped due to unmet dependencies",
+                        task_id=task_id
+                    )
+                    return
+                
+                # Execute the task, or hand it to a worker agent
+                if self.dispatch_mode:
+                    self.enqueue_run(task_id, triggered_by='schedule', skip_if_queued=True)
+                else:
+                    self.execute_task(task_id)
                 
+            except Exception as e:
+                self.logger.error(f"Error executing task {task_id}: {e}")
                 self.alert_manager.create_alert(
-                    'dependency_not_met', 'warning',
-                    f"Task {task['task_name']} skipped due to unmet dependencies",
+                    'task_error', 'error',
+                    f"Error executing task {task['task_name']}: {e}",
                     task_id=task_id
                 )
-                return
-            
-            # Execute the task
-            self.execute_task(task_id)
-            
-        except Exception as e:
-            self.logger.error(f"Error executing task {task_id}: {e}")
-            self.alert_manager.create_alert(
-                'task_error', 'error',
-                f"Error executing task {task['task_name']}: {e}",
-                task_id=task_id
-            )
     
-    def execute_task(self, task_id: int, retry_count: int = 0):
-        """Execute a single task with retry logic."""
-        task = self.task_manager.get_task(task_id=task_id)
-        if not task:
+    def enqueue_run(self, task_id: int, retry_count: int = 0, profile: str = None,
+                    triggered_by: str = None, delay_seconds: float = 0,
+                    skip_if_queued: bool = False) -> Optional[int]:
+        """Queue a run for a worker agent (dispatch mode)."""
+        queue_id = self.run_manager.queue.enqueue(
+            task_id, retry_count=retry_count, profile_mode=profile, triggered_by=triggered_by,
+            delay_seconds=delay_seconds, skip_if_queued=skip_if_queued
+        )
+        if queue_id is None:
+            self.logger.info(f"Task {task_id} is already queued or running; not queuing another run")
+        else:
+            self.logger.info(f"Queued task {task_id} for a worker (queue ID: {queue_id})")
+        return queue_id
+    
+    def schedule_retry(self, task_id: int, retry_count: int, retry_delay: float):
+        """Run attempt retry_count + 1 of a task after retry_delay seconds."""
+        if self.dispatch_mode:
+            self.enqueue_run(task_id, retry_count + 1, delay_seconds=retry_delay)
             return
-        
-        # Create run record
-        run_id = self.run_manager.create_run(
-            task_id, 
-            triggered_by='retry' if retry_count > 0 else 'schedule',
-            process_id=os.getpid()
+        self.scheduler.add_job(
+            self.execute_task,
+            'date',
+            run_date=datetime.now() + timedelta(seconds=retry_delay),
+            args=[task_id, retry_count + 1],
+            id=f"retry_{task_id}_{retry_count}",
+            replace_existing=True
         )
-        
-        # Update status to running
-        self.run_manager.update_run_status(run_id, 'running')
-        
-        # Prepare execution
-        script_path = task['script_path']
-        task_name = task['task_name']
-        timeout = task.get('timeout_seconds', 3600)
-        
-        # Create log file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_dir = os.path.join(os.path.dirname(script_path), f"{task_name}_logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, f"{task_name}_{timestamp}.log")
-        
-        self.logger.info(f"Executing task {task_name} (Run ID: {run_id})")
-        
-        try:
-            # Create clean environment
-            clean_env = self.create_clean_environment()
+    
+    def execute_task(self, task_id: int, retry_count: int = 0, profile: str = None,
+                     triggered_by: str = None, queue_id: int = None):
+        """Execute a single task with retry logic, optionally under a profiler."""
+        with log_context(task_id=task_id, retry_count=retry_count):
+            self._execute_task(task_id, retry_count, profile, triggered_by, queue_id)
+    
+    def _execute_task(self, task_id: int, retry_count: int, profile: str, triggered_by: str,
+                      queue_id: int = None):
+        """Run one attempt of a task; log records in here carry its run context."""
+        with self.tracer.span('task.execute', task_id=task_id, retry_count=retry_count):
+            with self.tracer.span('task.load'):
+                task = self.task_manager.get_task(task_id=task_id)
+            if not task:
+                return
+            self.tracer.set_attribute('task_name', task['task_name'])
             
-            # Execute script
-            with open(log_file, 'w') as flog:
-                flog.write(f"=== Task Execution: {task_name} ===\n")
-                flog.write(f"Run ID: {run_id}\n")
-                flog.write(f"Started: {datetime.now()}\n")
-                flog.write(f"Script: {script_path}\n")
-                flog.write(f"Python: {VENV_PYTHON}\n")
-                flog.write("="*50 + "\n\n")
-                flog.flush()
+            # Create run record
+            with self.tracer.span('run.create'):
+                run_id = self.run_manager.create_run(
+                    task_id, 
+                    triggered_by=triggered_by or ('retry' if retry_count > 0 else 'schedule'),
+                    process_id=os.getpid()
+                )
+            self.tracer.set_attribute('run_id', run_id)
+            bind_log_context(run_id=run_id, task_name=task['task_name'])
+            if queue_id:
+                self.run_manager.queue.set_run(queue_id, run_id)
+            
+            # Update status to running
+            with self.tracer.span('run.update_status', status='running'):
+                self.run_manager.update_run_status(run_id, 'running')
+            
+            # Prepare execution
+            script_path = task['script_path']
+            task_name = task['task_name']
+            is_callable = task.get('task_type') == 'callable'
+            is_fanout = task.get('task_type') == 'fanout'
+            timeout, envelope = self.resolve_duration_limits(task)
+            
+            # Create log file (a callable's script_path is module:function, not a file)
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            if is_callable:
+                log_dir = os.path.join(LOG_DIR, 'callables', f"{task_name}_logs")
+            else:
+                log_dir = os.path.join(os.path.dirname(script_path), f"{task_name}_logs")
+            archive_log_file = os.path.join(log_dir, f"{task_name}_{timestamp}.log")
+            if LOG_SPOOL_CONFIG['enabled']:
+                # Write to the local spool; the shipper copies it next to the script afterwards
+                log_file = self.log_shipper.spool_path(archive_log_file)
+                log_dir = os.path.dirname(log_file)
+            else:
+                log_file = archive_log_file
+            with self.tracer.span('log.prepare_dir', log_dir=log_dir):
+                os.makedirs(log_dir, exist_ok=True)
+            
+            # Profiling can be requested per run or enabled on the task (script tasks only)
+            profile_mode = None if is_callable or is_fanout else self.resolve_profile_mode(profile or task.get('profile_mode'))
+            profile_path = profile_artifact_path(log_file, profile_mode) if profile_mode else None
+            command = self.build_command(script_path, profile_mode, profile_path)
+            
+            self.logger.info(f"Executing task {task_name} (Run ID: {run_id})"
+                             + (f" with {profile_mode} profiling" if profile_mode else ""))
+            
+            try:
+                # Create clean environment
+                with self.tracer.span('env.create'):
+                    clean_env = self.create_clean_environment()
                 
-                # Use cmd wrapper for Windows
-                if sys.platform == 'win32':
-                    cmd = f'cmd.exe /c ""{VENV_PYTHON}" "{script_path}""'
-                    process = subprocess.Popen(
-                        cmd,
-                        stdout=flog,
-                        stderr=subprocess.STDOUT,
-                        cwd=os.path.dirname(script_path),
-                        env=clean_env,
-                        shell=True
-                    )
-                else:
-                    process = subprocess.Popen(
-                        [VENV_PYTHON, script_path],
-                        stdout=flog,
-                        stderr=subprocess.STDOUT,
-                        cwd=os.path.dirname(script_path),
-                        env=clean_env
-                    )
+                # Execute script
+                with self.tracer.span('log.open', log_file=log_file):
+                    flog = open(log_file, 'w')
+                    flog.write(f"=== Task Execution: {task_name} ===\n")
+                    flog.write(f"Run ID: {run_id}\n")
+                    flog.write(f"Started: {datetime.now()}\n")
+                    if is_callable:
+                        flog.write(f"Callable: {script_path}\n")
+                        flog.write(f"Python: {CALLABLE_CONFIG['python'] or sys.executable} (process pool)\n")
+                    else:
+                        flog.write(f"Script: {script_path}\n")
+                        flog.write(f"Python: {VENV_PYTHON}\n")
+                    if profile_mode:
+                        flog.write(f"Profile: {profile_path}\n")
+                    flog.write("="*50 + "\n\n")
+                    flog.flush()
+                self.run_manager.set_log_file_path(run_id, log_file)
                 
-                # Track process
-                with self.process_lock:
-                    self.running_processes[run_id] = process
+                if is_callable:
+                    # The pool worker appends the call's output to the log itself
+                    flog.close()
+                    self.run_callable(task, run_id, retry_count, log_file, timeout)
+                    return
                 
-                # Wait with timeout
-                try:
-                    process.wait(timeout=timeout)
-                    exit_code = process.returncode
-                except subprocess.TimeoutExpired:
-                    self.logger.error(f"Task {task_name} timed out after {timeout} seconds")
-                    process.terminate()
-                    time.sleep(5)
-                    if process.poll() is None:
-                        process.kill()
-                    
-                    self.run_manager.update_run_status(
-                        run_id, 'timeout', 
-                        error_message=f'Timed out after {timeout} seconds',
-                        log_file_path=log_file
-                    )
-                    
-                    self.alert_manager.create_alert(
-                        'task_timeout', 'error',
-                        f"Task {task_name} timed out after {timeout} seconds",
-                        task_id=task_id, run_id=run_id
-                    )
+                if is_fanout:
+                    # The parent log lists the partitions; each child run has its own log
+                    with flog:
+                        exit_code, error_msg = self.run_fanout(task, run_id, flog, archive_log_file, clean_env)
+                    self.record_exit(task, run_id, retry_count, exit_code, log_file, error_msg=error_msg)
                     return
-                finally:
-                    with self.process_lock:
-                        self.running_processes.pop(run_id, None)
+                
+                with flog:
+                    try:
+                        exit_code = self.run_process(task, run_id, command, os.path.dirname(script_path),
+                                                     clean_env, flog, log_file, timeout, envelope)
+                    finally:
+                        # Link the profile artifact if the profiler wrote one
+                        if profile_path and os.path.exists(profile_path):
+                            self.run_manager.set_profile_path(run_id, profile_path)
+                
+                if exit_code is not None:
+                    self.record_exit(task, run_id, retry_count, exit_code, log_file)
             
-            # Check exit code
-            if exit_code == 0:
-                self.logger.info(f"Task {task_name} completed successfully")
+            except Exception as e:
+                error_msg = f"Exception executing task {task_name}: {e}"
+                self.logger.exception(error_msg)
+                
                 self.run_manager.update_run_status(
-                    run_id, 'success', 
-                    exit_code=exit_code,
+                    run_id, 'failed',
+                    error_message=str(e),
                     log_file_path=log_file
                 )
-            else:
-                error_msg = f"Task {task_name} failed with exit code {exit_code}"
-                self.logger.error(error_msg)
                 
-                # Update run status
+                self.alert_manager.create_alert(
+                    'task_exception', 'critical',
+                    error_msg,
+                    task_id=task_id, run_id=run_id,
+                    details={'exception': str(e), 'type': type(e).__name__}
+                )
+            
+            finally:
+                if log_file != archive_log_file:
+                    self.log_shipper.submit(run_id, log_file, archive_log_file)
+                    if profile_path:
+                        self.log_shipper.submit(
+                            run_id, profile_path,
+                            profile_artifact_path(archive_log_file, profile_mode), kind='profile'
+                        )
+    
+    def run_process(self, task: Dict, run_id: int, command: List[str], cwd: str, env: Dict[str, str],
+                    flog, log_file: str, timeout: float, envelope: float = None) -> Optional[int]:
+        """Run a run's process with its output captured to flog; the exit code, or None on timeout."""
+        # Use cmd wrapper for Windows
+        with self.tracer.span('process.spawn'):
+            if sys.platform == 'win32':
+                quoted = ' '.join(f'"{arg}"' for arg in command)
+                cmd = f'cmd.exe /c "{quoted}"'
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    cwd=cwd,
+                    env=env,
+                    shell=True
+                )
+            else:
+                process = subprocess.Popen(
+                    command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    cwd=cwd,
+                    env=env
+                )
+        
+        # Drain the pipe on reader/writer threads so the child never waits on the disk
+        max_output_mb = task.get('max_output_mb') or OUTPUT_CAPTURE_CONFIG['max_log_mb']
+        capture = OutputCapture(
+            process.stdout, flog.buffer,
+            name=str(run_id),
+            ring_bytes=OUTPUT_CAPTURE_CONFIG['ring_kb'] * 1024,
+            max_log_bytes=max_output_mb * 1024 * 1024,
+            write_chunk_bytes=OUTPUT_CAPTURE_CONFIG['write_chunk_kb'] * 1024,
+            flush_seconds=OUTPUT_CAPTURE_CONFIG['flush_seconds'],
+            max_pending_bytes=OUTPUT_CAPTURE_CONFIG['max_pending_mb'] * 1024 * 1024,
+            timestamp_lines=OUTPUT_CAPTURE_CONFIG['timestamp_lines']
+        )
+        capture.start()
+        
+        # Track process
+        with self.process_lock:
+            self.running_processes[run_id] = process
+            self.run_outputs[run_id] = capture
+            self.running_runs[run_id] = {
+                'task_id': task['task_id'],
+                'task_name': task['task_name'],
+                'started_at': datetime.now()
+            }
+        self.status_sampler.request_refresh()
+        
+        # Wait with timeout
+        try:
+            with self.tracer.span('process.wait', pid=process.pid):
+                self.wait_for_process(process, task, run_id, timeout, envelope)
+            return process.returncode
+        except subprocess.TimeoutExpired:
+            process.terminate()
+            time.sleep(5)
+            if process.poll() is None:
+                process.kill()
+            self.record_timeout(task, run_id, timeout, log_file)
+            return None
+        finally:
+            with self.process_lock:
+                self.running_processes.pop(run_id, None)
+                self.running_runs.pop(run_id, None)
+            self.status_sampler.request_refresh(reload_db=True)
+            self.finish_output_capture(capture, task['task_name'], run_id)
+    
+    def record_exit(self, task: Dict, run_id: int, retry_count: int, exit_code: int,
+                    log_file: str, error_msg: str = None):
+        """Record a finished run's outcome and schedule a retry if it failed."""
+        task_id, task_name = task['task_id'], task['task_name']
+        if exit_code == 0:
+            self.logger.info(f"Task {task_name} completed successfully")
+            with self.tracer.span('run.update_status', status='success'):
                 self.run_manager.update_run_status(
-                    run_id, 'failed',
+                    run_id, 'success', 
                     exit_code=exit_code,
-                    error_message=error_msg,
                     log_file_path=log_file
                 )
-                
-                # Handle retry
-                if retry_count < task.get('max_retries', 3):
-                    retry_delay = task.get('retry_delay_seconds', 300)
-                    self.logger.info(f"Retrying task {task_name} in {retry_delay} seconds")
-                    
-                    # Schedule retry
-                    self.scheduler.add_job(
-                        self.execute_task,
-                        'date',
-                        run_date=datetime.now() + timedelta(seconds=retry_delay),
-                        args=[task_id, retry_count + 1],
-                        id=f"retry_{task_id}_{retry_count}",
-                        replace_existing=True
-                    )
-                else:
-                    # Max retries reached
-                    self.alert_manager.create_alert(
-                        'task_failed', 'error',
-                        f"Task {task_name} failed after {retry_count} retries",
-                        task_id=task_id, run_id=run_id
-                    )
+            return
         
-        except Exception as e:
-            error_msg = f"Exception executing task {task_name}: {e}"
-            self.logger.exception(error_msg)
-            
+        error_msg = error_msg or f"Task {task_name} failed with exit code {exit_code}"
+        self.logger.error(error_msg)
+        
+        # Update run status
+        with self.tracer.span('run.update_status', status='failed'):
             self.run_manager.update_run_status(
                 run_id, 'failed',
-                error_message=str(e),
+                exit_code=exit_code,
+                error_message=error_msg,
                 log_file_path=log_file
             )
+        
+        # Handle retry
+        if retry_count < task.get('max_retries', 3):
+            retry_delay = task.get('retry_delay_seconds', 300)
+            self.logger.info(f"Retrying task {task_name} in {retry_delay} seconds")
             
+            # Schedule retry
+            self.schedule_retry(task_id, retry_count, retry_delay)
+        else:
+            # Max retries reached
             self.alert_manager.create_alert(
-                'task_exception', 'critical',
-                error_msg,
-                task_id=task_id, run_id=run_id,
-                details={'exception': str(e), 'type': type(e).__name__}
+                'task_failed', 'error',
+                f"Task {task_name} failed after {retry_count} retries",
+                task_id=task_id, run_id=run_id
+            )
+    
+    def record_timeout(self, task: Dict, run_id: int, timeout: float, log_file: str):
+        """Record a run that was stopped at its timeout."""
+        self.logger.error(f"Task {task['task_name']} timed out after {timeout} seconds")
+        with self.tracer.span('run.update_status', status='timeout'):
+            self.run_manager.update_run_status(
+                run_id, 'timeout', 
+                error_message=f'Timed out after {timeout} seconds',
+                log_file_path=log_file
+            )
+        
+        self.alert_manager.create_alert(
+            'task_timeout', 'error',
+            f"Task {task['task_name']} timed out after {timeout} seconds",
+            task_id=task['task_id'], run_id=run_id
+        )
+    
+    def run_callable(self, task: Dict, run_id: int, retry_count: int, log_file: str, timeout: float):
+        """Run a 'callable' task on the process pool and record its outcome."""
+        with self.process_lock:
+            self.running_runs[run_id] = {
+                'task_id': task['task_id'],
+                'task_name': task['task_name'],
+                'started_at': datetime.now()
+            }
+        self.status_sampler.request_refresh()
+        try:
+            with self.tracer.span('callable.run', target=task['script_path']):
+                succeeded, error = self.callable_pool.run(
+                    task['script_path'], task.get('callable_args'), log_file, timeout
+                )
+        except TimeoutError:
+            self.record_timeout(task, run_id, timeout, log_file)
+            return
+        finally:
+            with self.process_lock:
+                self.running_runs.pop(run_id, None)
+            self.status_sampler.request_refresh(reload_db=True)
+        
+        if succeeded:
+            self.record_exit(task, run_id, retry_count, 0, log_file)
+        else:
+            self.record_exit(task, run_id, retry_count, 1, log_file,
+                             error_msg=f"Task {task['task_name']} failed: {error}")
+    
+    def resolve_partitions(self, config: Dict, env: Dict[str, str]) -> List[str]:
+        """A fan-out run's partition keys: the fixed list, or each line a generator script prints."""
+        generator = config.get('generator')
+        if generator:
+            result = subprocess.run(
+                [VENV_PYTHON, generator], capture_output=True, text=True,
+                cwd=os.path.dirname(generator), env=env,
+                timeout=FANOUT_CONFIG['generator_timeout_seconds']
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"Partition generator {generator} failed with exit code "
+                                   f"{result.returncode}: {result.stderr.strip()[-500:]}")
+            keys = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+        else:
+            keys = [str(key) for key in config.get('partitions') or []]
+        
+        keys = list(dict.fromkeys(keys))
+        if len(keys) > FANOUT_CONFIG['max_partitions']:
+            raise ValueError(f"{len(keys)} partitions exceed the limit of {FANOUT_CONFIG['max_partitions']}")
+        return keys
+    
+    def run_fanout(self, task: Dict, run_id: int, flog, archive_log_file: str,
+                   env: Dict[str, str]) -> Tuple[int, Optional[str]]:
+        """Run a fan-out task's partitions as child runs, max_parallel at a time, then its gather step.
+        
+        Returns the parent run's exit code (0 when every child succeeded) and error.
+        """
+        task_name = task['task_name']
+        config = task.get('fanout_config') or {}
+        partitions = self.resolve_partitions(config, env)
+        max_parallel = config.get('max_parallel') or FANOUT_CONFIG['max_parallel']
+        self.logger.info(f"Fanning out task {task_name} into {len(partitions)} partitions "
+                         f"({max_parallel} at a time, Run ID: {run_id})")
+        flog.write(f"Fan-out: {len(partitions)} partitions, {max_parallel} at a time\n\n")
+        flog.flush()
+        
+        results = {}  # partition key -> (child run_id, status)
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='FanoutRun') as pool:
+            futures = {
+                pool.submit(self.run_partition, task, run_id, archive_log_file, env, key): key
+                for key in partitions
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Partition {key} of task {task_name} could not run: {e}")
+                    results[key] = (None, 'failed')
+                child_run_id, status = results[key]
+                flog.write(f"{datetime.now():%H:%M:%S} {key}: {status} (Run ID: {child_run_id})\n")
+                flog.flush()
+        failed = [key for key in partitions if results[key][1] != 'success']
+        
+        if config.get('gather') and (not failed or config.get('gather_on_failure')):
+            gather_env = dict(env, FANOUT_PARTITIONS=json.dumps(partitions), FANOUT_FAILED=json.dumps(failed))
+            gather_run_id, status = self.run_partition(
+                task, run_id, archive_log_file, gather_env, None, script=config['gather'],
+                depends_on=[child_run_id for child_run_id, _ in results.values() if child_run_id]
+            )
+            flog.write(f"{datetime.now():%H:%M:%S} gather: {status} (Run ID: {gather_run_id})\n")
+            if status != 'success' and not failed:
+                return 1, f"Task {task_name} gather step {status}"
+        
+        if failed:
+            shown = ', '.join(failed[:10]) + (', ...' if len(failed) > 10 else '')
+            return 1, f"Task {task_name}: {len(failed)} of {len(partitions)} partitions failed ({shown})"
+        return 0, None
+    
+    def run_partition(self, task: Dict, parent_run_id: int, parent_log_file: str, env: Dict[str, str],
+                      key: Optional[str], script: str = None, depends_on: List[int] = ()) -> Tuple[int, str]:
+        """Run one child of a fan-out run: a partition, or the gather step when key is None.
+        
+        The child is linked to the parent in run_dependencies.
+        """
+        config = task.get('fanout_config') or {}
+        run_id = self.run_manager.create_run(
+            task['task_id'], triggered_by='fanout' if key is not None else 'gather', process_id=os.getpid()
+        )
+        self.run_manager.create_run_dependency(parent_run_id, run_id)
+        for depends_on_run_id in depends_on:
+            self.run_manager.create_run_dependency(run_id, depends_on_run_id)
+        
+        label = 'gather' if key is None else re.sub(r'[^\w.-]+', '_', key)[:60]
+        env = dict(env, FANOUT_PARENT_RUN_ID=str(parent_run_id))
+        argv = []
+        header = [f"Run ID: {run_id} (fan-out of run {parent_run_id})"]
+        if key is not None:
+            env[config.get('env_var') or FANOUT_CONFIG['env_var']] = key
+            if config.get('pass_as') == 'argv':
+                argv.append(key)
+            header.append(f"Partition: {key}")
+        status = self.run_script_child(
+            task, run_id, script or task['script_path'], env, argv,
+            f"{os.path.splitext(parent_log_file)[0]}_{label}.log",
+            label, f"Partition {key}" if key is not None else "Gather step", header,
+            config.get('partition_timeout_seconds') or task.get('timeout_seconds') or 3600
+        )
+        return run_id, status
+    
+    def run_script_child(self, task: Dict, run_id: int, script: str, env: Dict[str, str], argv: List[str],
+                         archive_log_file: str, label: str, description: str, header: List[str],
+                         timeout: float) -> str:
+        """Run script once as run_id with its own log; records and returns the run's final status.
+        
+        For runs derived from a task (fan-out partitions, backfill dates): they are
+        not retried on their own and stay out of the task's duration stats.
+        """
+        log_file = self.log_shipper.spool_path(archive_log_file) if LOG_SPOOL_CONFIG['enabled'] else archive_log_file
+        with log_context(task_id=task['task_id'], task_name=task['task_name'], run_id=run_id):
+            try:
+                self.run_manager.update_run_status(run_id, 'running')
+                os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                with open(log_file, 'w') as flog:
+                    flog.write(f"=== Task Execution: {task['task_name']} [{label}] ===\n")
+                    for line in header:
+                        flog.write(f"{line}\n")
+                    flog.write(f"Started: {datetime.now()}\n")
+                    flog.write(f"Script: {script}\n")
+                    flog.write("="*50 + "\n\n")
+                    flog.flush()
+                    self.run_manager.set_log_file_path(run_id, log_file)
+                    exit_code = self.run_process(task, run_id, [VENV_PYTHON, script] + list(argv),
+                                                 os.path.dirname(script), env, flog, log_file, timeout)
+                if exit_code is None:
+                    return 'timeout'
+                
+                status = 'success' if exit_code == 0 else 'failed'
+                self.run_manager.update_run_status(
+                    run_id, status, exit_code=exit_code,
+                    error_message=None if exit_code == 0 else f"{description} failed with exit code {exit_code}",
+                    log_file_path=log_file, record_duration=False
+                )
+                return status
+            except Exception as e:
+                self.logger.exception(f"Exception running {description.lower()} of task {task['task_name']}: {e}")
+                self.run_manager.update_run_status(run_id, 'failed', error_message=str(e), log_file_path=log_file)
+                return 'failed'
+            finally:
+                if log_file != archive_log_file:
+                    self.log_shipper.submit(run_id, log_file, archive_log_file)
+    
+    def finish_output_capture(self, capture: OutputCapture, task_name: str, run_id: int):
+        """Wait for a finished run's output to reach the log and report anything dropped."""
+        if not capture.wait(OUTPUT_CAPTURE_CONFIG['drain_seconds']):
+            # A process started by the task still holds the pipe; stop logging its output
+            self.logger.warning(f"Output of task {task_name} still open after exit (Run ID: {run_id}); "
+                                f"detaching from the log")
+            capture.detach()
+        with self.process_lock:
+            self.run_outputs.pop(run_id, None)
+        
+        if capture.capped:
+            self.logger.warning(f"Task {task_name} output exceeded its log cap; "
+                                f"{capture.dropped_bytes} bytes not logged (Run ID: {run_id})")
+        elif capture.dropped_bytes:
+            self.logger.warning(f"{capture.dropped_bytes} bytes of task {task_name} output were dropped "
+                                f"(Run ID: {run_id}){': ' + capture.write_error if capture.write_error else ''}")
+    
+    def resolve_duration_limits(self, task: Dict):
+        """Work out the effective timeout and the learned regression envelope for a run."""
+        timeout = task.get('timeout_seconds') or 3600
+        try:
+            stats = self.run_manager.duration_stats.get_stats(task['task_id'])
+        except Exception as e:
+            self.logger.warning(f"Could not load duration stats for {task['task_name']}: {e}")
+            return timeout, None
+        
+        if not stats or stats.run_count < DURATION_STATS_CONFIG['min_samples']:
+            return timeout, None
+        
+        envelope = stats.envelope(
+            DURATION_STATS_CONFIG['regression_factor'],
+            DURATION_STATS_CONFIG['regression_quantile']
+        )
+        
+        # Opt-in adaptive timeout of k x p99, never above the configured timeout
+        if task.get('adaptive_timeout'):
+            factor = float(task.get('adaptive_timeout_factor') or
+                           DURATION_STATS_CONFIG['adaptive_timeout_factor'])
+            adaptive = stats.adaptive_timeout(
+                factor, DURATION_STATS_CONFIG['adaptive_timeout_min_seconds'], timeout)
+            if adaptive:
+                timeout = int(math.ceil(adaptive))
+        
+        return timeout, envelope
+    
+    def wait_for_process(self, process, task: Dict, run_id: int, timeout: float,
+                         envelope: float = None):
+        """Wait for a run to exit, alerting once if it outlives the learned envelope."""
+        if not envelope or envelope >= timeout:
+            return process.wait(timeout=timeout)
+        
+        try:
+            return process.wait(timeout=envelope)
+        except subprocess.TimeoutExpired:
+            self.logger.warning(
+                f"Task {task['task_name']} exceeded its learned duration envelope "
+                f"({envelope:.0f}s) (Run ID: {run_id})"
+            )
+            try:
+                stats = self.run_manager.duration_stats.get_stats(task['task_id'])
+                self.alert_manager.create_duration_regression_alert(
+                    task['task_id'], run_id, task['task_name'],
+                    elapsed_seconds=envelope, envelope_seconds=envelope,
+                    stats=stats.summary() if stats else None
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to raise duration regression alert: {e}")
+        
+        return process.wait(timeout=timeout - envelope)
+    
+    def resolve_profile_mode(self, profile_mode: Optional[str]) -> Optional[str]:
+        """Validate a requested profile mode, falling back to cProfile if no sampler is installed."""
+        if profile_mode not in PROFILE_MODES:
+            return None
+        if profile_mode == 'sampling' and not shutil.which(PROFILING_CONFIG['sampling_profiler']):
+            self.logger.warning(
+                f"Sampling profiler '{PROFILING_CONFIG['sampling_profiler']}' not found, "
+                f"falling back to cProfile"
             )
+            return 'cprofile'
+        return profile_mode
+    
+    def build_command(self, script_path: str, profile_mode: str = None,
+                      profile_path: str = None) -> List[str]:
+        """Build the interpreter command line for a run."""
+        if profile_mode == 'sampling':
+            return [shutil.which(PROFILING_CONFIG['sampling_profiler']),
+                    'record', '--format', 'speedscope',
+                    '--rate', str(PROFILING_CONFIG['sampling_rate']),
+                    '--output', profile_path, '--',
+                    VENV_PYTHON, script_path]
+        
+        if profile_mode == 'cprofile':
+            return [VENV_PYTHON, '-m', 'cProfile', '-o', profile_path, script_path]
+        
+        return [VENV_PYTHON, script_path]
     
     def create_clean_environment(self) -> Dict[str, str]:
         """Create a clean environment for subprocess execution."""
@@ -385,21 +1067,93 @@ class ProductionScheduler:
         }
         return clean_env
     
+    def start_background(self):
+        """Load tasks and start the scheduler without blocking the caller."""
+        # Join the other scheduler nodes first, so only owned tasks are loaded
+        if self.shard:
+            self.shard.start()
+        
+        # Load tasks from database
+        self.load_tasks_from_db()
+        
+        # Add listeners
+        self.scheduler.add_listener(
+            self.job_executed_listener,
+            EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
+        )
+        self.scheduler.add_listener(
+            self.job_event_publisher,
+            EVENT_JOB_ADDED | EVENT_JOB_REMOVED | EVENT_JOB_MODIFIED |
+            EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+        )
+        self.scheduler.add_listener(
+            self.next_run_recorder.job_listener,
+            EVENT_JOB_ADDED | EVENT_JOB_REMOVED | EVENT_JOB_MODIFIED |
+            EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+        )
+        
+        # Finish shipping anything spooled before a restart
+        if LOG_SPOOL_CONFIG['enabled']:
+            self.log_shipper.start()
+        
+        # Start scheduler
+        self.scheduler.start()
+        self.started_at = datetime.now()
+        self.logger.info("Scheduler started successfully")
+        
+        # Start publishing the dashboard snapshot
+        self.status_sampler.start()
+        self.next_run_recorder.start()
+        
+        # Reload when tasks are changed from another process
+        threading.Thread(target=self.watch_config_changes, name='ConfigWatcher', daemon=True).start()
+        
+        # Fold any finished runs the analytics rollups have not seen yet
+        threading.Thread(target=self.backfill_rollups, name='RollupBackfill', daemon=True).start()
+        
+        if FORECAST_CONFIG['enabled']:
+            self.forecaster.start()
+        
+        if BACKFILL_CONFIG['enabled']:
+            self.backfill_engine.start()
+        
+        if LOG_SEARCH_CONFIG['enabled']:
+            try:
+                self.log_indexer.start()
+            except Exception as e:
+                self.logger.error(f"Failed to start log indexer: {e}")
+        
+        # Nothing connects to the channel when the dashboard runs in this process
+        if STATUS_CHANNEL_CONFIG['enabled'] and DASHBOARD_CONFIG.get('mode') == 'standalone':
+            try:
+                self.status_channel.start()
+            except Exception as e:
+                self.logger.error(f"Failed to start status channel: {e}")
+    
+    def backfill_rollups(self):
+        """Catch the analytics rollups up with task_runs."""
+        try:
+            folded = self.run_manager.rollups.backfill()
+            if folded:
+                self.logger.info(f"Backfilled analytics rollups with {folded} runs")
+        except Exception as e:
+            self.logger.error(f"Rollup backfill failed: {e}")
+    
+    def watch_config_changes(self):
+        """Poll the task config version and reload tasks when it moves."""
+        while not self._stop_event.wait(SCHEDULER_CONFIG.get('config_poll_seconds', 15)):
+            try:
+                version = self.task_manager.get_config_version()
+                if version != self.config_version:
+                    self.logger.info(f"Task configuration changed (version {version}), reloading tasks")
+                    self.load_tasks_from_db()
+            except Exception as e:
+                self.logger.error(f"Config watcher error: {e}")
+    
     def start(self):
         """Start the scheduler."""
         try:
-            # Load tasks from database
-            self.load_tasks_from_db()
-            
-            # Add listener
-            self.scheduler.add_listener(
-                self.job_executed_listener,
-                EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
-            )
-            
-            # Start scheduler
-            self.scheduler.start()
-            self.logger.info("Scheduler started successfully")
+            self.start_background()
             
             # Keep running
             while True:
@@ -425,23 +1179,146 @@ class ProductionScheduler:
         else:
             self.logger.debug(f"Job {event.job_id} executed successfully")
     
+    def job_event_publisher(self, event):
+        """Forward APScheduler job events to the event bus."""
+        names = {
+            EVENT_JOB_ADDED: 'added', EVENT_JOB_REMOVED: 'removed',
+            EVENT_JOB_MODIFIED: 'modified', EVENT_JOB_SUBMITTED: 'submitted',
+            EVENT_JOB_EXECUTED: 'executed', EVENT_JOB_ERROR: 'error',
+            EVENT_JOB_MISSED: 'missed'
+        }
+        job = self.scheduler.get_job(event.job_id) if event.code != EVENT_JOB_REMOVED else None
+        event_bus.publish('job', {
+            'job_id': event.job_id,
+            'event': names.get(event.code, str(event.code)),
+            'name': job.name if job else None,
+            'next_run': job.next_run_time.isoformat() if job and job.next_run_time else None
+        })
+    
+    def reap_lost_runs(self) -> int:
+        """Fail queued runs whose worker stopped heartbeating and retry them like any failure."""
+        items = self.run_manager.queue.reclaim_expired(DISPATCH_CONFIG['lease_seconds'])
+        for item in items:
+            task = self.task_manager.get_task(task_id=item['task_id'])
+            task_name = task['task_name'] if task else item['task_id']
+            run = self.run_manager.get_run(item['run_id']) if item['run_id'] else None
+            if not run:
+                # Lost before the run started: hand the same attempt to another worker
+                self.enqueue_run(item['task_id'], item['retry_count'], item['profile_mode'],
+                                 item['triggered_by'])
+                continue
+            if run['status'] not in ('pending', 'running'):
+                # Finished, but the worker could not remove the item
+                continue
+            
+            message = f"Worker {item['claimed_by']} stopped responding"
+            self.logger.error(f"{message} while running task {task_name} (Run ID: {run['run_id']})")
+            self.run_manager.update_run_status(run['run_id'], 'failed', error_message=message)
+            self.alert_manager.create_alert(
+                'worker_lost', 'error',
+                f"{message} while running task {task_name}",
+                task_id=item['task_id'], run_id=run['run_id']
+            )
+            if task and item['retry_count'] < task.get('max_retries', 3):
+                self.schedule_retry(item['task_id'], item['retry_count'], task.get('retry_delay_seconds', 300))
+        return len(items)
+    
     def cleanup_old_runs(self):
-        """Clean up old run records and logs."""
+        """Compress finished run logs and enforce the log retention policy."""
+        # Cluster-wide housekeeping runs on one node only
+        if self.shard and not self.shard.is_leader():
+            return
         try:
-            # This would be implemented based on retention policy
-            pass
+            if self.dispatch_mode and time.time() - self._reaped_at >= DISPATCH_CONFIG['reap_interval_seconds']:
+                self._reaped_at = time.time()
+                self.reap_lost_runs()
+            
+            if LOG_ARCHIVE_CONFIG['enabled']:
+                self.compress_run_logs()
+            
+            if time.time() - self._retention_checked_at >= RETENTION_POLICY['cleanup_interval_hours'] * 3600:
+                self._retention_checked_at = time.time()
+                self.enforce_log_retention()
+            
+            if self.shard and time.time() - self._fire_claims_pruned_at >= 3600:
+                self._fire_claims_pruned_at = time.time()
+                self.task_manager.fire_claims.prune(SHARDING_CONFIG['fire_claim_keep_days'])
         except Exception as e:
             self.logger.error(f"Cleanup error: {e}")
     
+    def compress_run_logs(self) -> int:
+        """Compress a batch of finished run logs that were written uncompressed."""
+        runs = self.run_manager.get_runs_to_compress(
+            LOG_ARCHIVE_CONFIG['compress_after_minutes'],
+            limit=LOG_ARCHIVE_CONFIG['batch_size'],
+            # Spooled logs are compressed by the shipper
+            skip_prefix=LOG_SPOOL_CONFIG['spool_dir'] if LOG_SPOOL_CONFIG['enabled'] else None
+        )
+        compressed = 0
+        for run in runs:
+            path = run['log_file_path']
+            if not os.path.exists(path):
+                self.run_manager.set_log_file_path(run['run_id'], None)
+                continue
+            try:
+                archived = compress_file(
+                    path,
+                    block_size=LOG_ARCHIVE_CONFIG['block_size'],
+                    compress_level=LOG_ARCHIVE_CONFIG['compress_level']
+                )
+                self.run_manager.set_log_file_path(run['run_id'], archived)
+                os.remove(path)
+                compressed += 1
+            except Exception as e:
+                self.logger.warning(f"Could not compress log of run {run['run_id']} ({path}): {e}")
+        if compressed:
+            self.logger.info(f"Compressed {compressed} run logs")
+        return compressed
+    
+    def enforce_log_retention(self) -> int:
+        """Delete run logs and profiles older than keep_logs_days."""
+        removed = 0
+        while True:
+            runs = self.run_manager.get_runs_with_logs_before(RETENTION_POLICY['keep_logs_days'])
+            if not runs:
+                break
+            for run in runs:
+                for path in (run['log_file_path'], run['profile_path']):
+                    if not path:
+                        continue
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        self.logger.warning(f"Could not remove {path}: {e}")
+            removed += self.run_manager.clear_log_paths([run['run_id'] for run in runs])
+        if removed:
+            self.logger.info(f"Removed logs of {removed} runs older than "
+                             f"{RETENTION_POLICY['keep_logs_days']} days")
+        return removed
+    
     def shutdown(self):
         """Gracefully shutdown the scheduler."""
         self.logger.info("Shutting down scheduler...")
         
+        # Stop background samplers
+        self._stop_event.set()
+        self.watchdog.stop()
+        self.status_sampler.stop()
+        self.status_channel.stop()
+        self.forecaster.stop()
+        self.next_run_recorder.stop()
+        self.log_indexer.stop()
+        if self.shard:
+            self.shard.stop()
+        
         # Stop scheduler
         if self.scheduler.running:
             self.scheduler.shutdown(wait=True)
         
         # Terminate running processes
+        self.backfill_engine.stop(wait=False)
         with self.process_lock:
             for run_id, process in self.running_processes.items():
                 try:
@@ -450,13 +1327,22 @@ class ProductionScheduler:
                 except:
                     pass
         
+        self.callable_pool.shutdown()
+        self.backfill_engine.stop()
+        
         # Shutdown executor
         self.executor.shutdown(wait=True)
         
+        # Unshipped files keep their spool manifests and are shipped on the next start
+        self.log_shipper.stop()
+        
         # Update health status
         self.health_manager.update_heartbeat('offline')
         
         self.logger.info("Scheduler shutdown complete")
+        
+        # Flush queued log records last
+        self.log_writer.stop()
 
 if __name__ == '__main__':
     scheduler = ProductionScheduler()
@@ -0,0 +1,88 @@
+# SchedulerService/profile_reports.py
+"""
+Readers for profile artifacts produced by profiled task runs.
+Supports cProfile stats files (.prof) and sampled speedscope JSON from py-spy.
+"""
+
+import os
+import json
+import pstats
+from typing import Dict, List
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+
+def profile_artifact_path(log_file: str, profile_mode: str) -> str:
+    """Path of the profile artifact stored next to a run log."""
+    base, _ = os.path.splitext(log_file)
+    if profile_mode == 'sampling':
+        return f"{base}.speedscope.json"
+    return f"{base}.prof"
+
+
+def top_functions(profile_path: str, limit: int = 25, sort: str = 'cumulative') -> List[Dict]:
+    """Return the heaviest functions recorded in a profile artifact."""
+    if not os.path.exists(profile_path):
+        raise FileNotFoundError(f"Profile not found: {profile_path}")
+
+    if profile_path.endswith('.json'):
+        return _speedscope_top_functions(profile_path, limit, sort)
+    return _cprofile_top_functions(profile_path, limit, sort)
+
+
+def _cprofile_top_functions(profile_path: str, limit: int, sort: str) -> List[Dict]:
+    stats = pstats.Stats(profile_path)
+    sort_key = {'cumulative': 'cumtime', 'self': 'tottime', 'calls': 'ncalls'}.get(sort, 'cumtime')
+
+    rows = []
+    for (filename, line, function), (prim_calls, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': function,
+            'file': filename,
+            'line': line,
+            'ncalls': ncalls,
+            'primitive_calls': prim_calls,
+            'tottime': round(tottime, 6),
+            'cumtime': round(cumtime, 6),
+        })
+
+    rows.sort(key=lambda r: r[sort_key], reverse=True)
+    return rows[:limit]
+
+
+def _speedscope_top_functions(profile_path: str, limit: int, sort: str) -> List[Dict]:
+    with open(profile_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    frames = data.get('shared', {}).get('frames', [])
+    self_weight = {}
+    total_weight = {}
+
+    for profile in data.get('profiles', []):
+        if profile.get('type') != 'sampled':
+            continue
+        for stack, weight in zip(profile.get('samples', []), profile.get('weights', [])):
+            if not stack:
+                continue
+            self_weight[stack[-1]] = self_weight.get(stack[-1], 0) + weight
+            # Count each frame once per sample for inclusive time
+            for frame_index in set(stack):
+                total_weight[frame_index] = total_weight.get(frame_index, 0) + weight
+
+    # Weights are in the profile's unit (sample counts for py-spy)
+    rows = []
+    for frame_index, total in total_weight.items():
+        frame = frames[frame_index] if frame_index < len(frames) else {}
+        rows.append({
+            'function': frame.get('name', '?'),
+            'file': frame.get('file', ''),
+            'line': frame.get('line'),
+            'ncalls': None,
+            'primitive_calls': None,
+            'tottime': self_weight.get(frame_index, 0),
+            'cumtime': total,
+        })
+
+    sort_key = 'tottime' if sort == 'self' else 'cumtime'
+    rows.sort(key=lambda r: r[sort_key], reverse=True)
+    return rows[:limit]
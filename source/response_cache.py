@@ -0,0 +1,56 @@
+# SchedulerService/response_cache.py
+"""
+Version-keyed cache of serialised API responses.
+Payloads derived from a versioned snapshot are serialised and gzip-compressed
+once per version; later requests reuse the bytes or get a 304 via the ETag.
+"""
+
+import gzip
+import json
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable
+
+CachedResponse = namedtuple('CachedResponse', ['etag', 'body', 'gzip_body'])
+
+
+class ResponseCache:
+    """Small thread-safe LRU of serialised responses keyed by (name, version)."""
+
+    def __init__(self, max_entries: int = 32, compress_level: int = 6, min_gzip_bytes: int = 512):
+        self.max_entries = max_entries
+        self.compress_level = compress_level
+        self.min_gzip_bytes = min_gzip_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, version: str, build_payload: Callable[[], dict]) -> CachedResponse:
+        """Return the cached response for this version, building it on a miss."""
+        key = (name, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        # Build outside the lock; a concurrent miss for the same key just does the work twice
+        body = json.dumps(build_payload(), default=str, separators=(',', ':')).encode('utf-8')
+        gzip_body = None
+        if len(body) >= self.min_gzip_bytes:
+            gzip_body = gzip.compress(body, compresslevel=self.compress_level, mtime=0)
+        entry = CachedResponse(f"{name}-{version}", body, gzip_body)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,258 @@
+# SchedulerService/run_tracing.py
+"""
+Lightweight span instrumentation for the task run lifecycle.
+Each finished trace is appended to a local JSONL file as one OTLP/JSON
+export request per line, so it can be loaded by OpenTelemetry tooling
+without running a collector.
+"""
+
+import os
+import json
+import time
+import secrets
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kind / status codes
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+
+def _otlp_value(value) -> Dict:
+    """Convert a Python value into an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    """Convert a dict of attributes into an OTLP KeyValue list."""
+    return [
+        {'key': key, 'value': _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def _attribute_value(attr: Dict):
+    """Read the Python value back out of an OTLP KeyValue."""
+    value = attr.get('value', {})
+    if 'intValue' in value:
+        return int(value['intValue'])
+    for key in ('stringValue', 'doubleValue', 'boolValue'):
+        if key in value:
+            return value[key]
+    return None
+
+
+class RunTracer:
+    """Records nested spans per thread and writes finished traces to JSONL."""
+
+    def __init__(self, trace_file: str, enabled: bool = True,
+                 service_name: str = 'PythonSchedulerService',
+                 max_bytes: int = 50*1024*1024):
+        self.trace_file = trace_file
+        self.enabled = enabled
+        self.service_name = service_name
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._summary_lock = threading.Lock()
+        self._summary = {}  # task_id -> span name -> stats
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(self.trace_file), exist_ok=True)
+
+    def _stack(self) -> List[Dict]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_span(self) -> Optional[Dict]:
+        """Return the innermost open span on this thread, if any."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def set_attribute(self, key: str, value):
+        """Set an attribute on the innermost open span."""
+        span = self.current_span()
+        if span is not None:
+            span['attributes'][key] = value
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block of work as a span nested under the current one."""
+        if not self.enabled:
+            yield None
+            return
+
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = {
+            'name': name,
+            'trace_id': parent['trace_id'] if parent else secrets.token_hex(16),
+            'span_id': secrets.token_hex(8),
+            'parent_span_id': parent['span_id'] if parent else None,
+            'attributes': dict(attributes),
+            'start_ns': time.time_ns(),
+            'error': None,
+            'finished': parent['finished'] if parent else [],
+        }
+        stack.append(span)
+        perf_start = time.perf_counter_ns()
+        try:
+            yield span
+        except BaseException as e:
+            span['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span['duration_ns'] = time.perf_counter_ns() - perf_start
+            span['end_ns'] = span['start_ns'] + span['duration_ns']
+            stack.pop()
+            span['finished'].append(span)
+            if parent is None:
+                self._finish_trace(span)
+
+    def _finish_trace(self, root: Dict):
+        """Write a completed trace and fold it into the per-task summary."""
+        spans = root['finished']
+        task_id = root['attributes'].get('task_id')
+        # Children inherit task context so the file can be filtered per span
+        for span in spans:
+            if task_id is not None:
+                span['attributes'].setdefault('task_id', task_id)
+            if 'task_name' in root['attributes']:
+                span['attributes'].setdefault('task_name', root['attributes']['task_name'])
+
+        try:
+            self._write_trace(spans)
+        except Exception as e:
+            logger.warning(f"Failed to write trace {root['trace_id']}: {e}")
+
+        with self._summary_lock:
+            task_summary = self._summary.setdefault(task_id, {})
+            for span in spans:
+                _accumulate(task_summary, span['name'], span['duration_ns'] / 1e6)
+
+    def _to_otlp(self, span: Dict) -> Dict:
+        otlp_span = {
+            'traceId': span['trace_id'],
+            'spanId': span['span_id'],
+            'name': span['name'],
+            'kind': SPAN_KIND_INTERNAL,
+            'startTimeUnixNano': str(span['start_ns']),
+            'endTimeUnixNano': str(span['end_ns']),
+            'attributes': _otlp_attributes(span['attributes']),
+            'status': {'code': STATUS_CODE_ERROR, 'message': span['error']}
+                      if span['error'] else {'code': STATUS_CODE_OK},
+        }
+        if span['parent_span_id']:
+            otlp_span['parentSpanId'] = span['parent_span_id']
+        return otlp_span
+
+    def _write_trace(self, spans: List[Dict]):
+        record = {
+            'resourceSpans': [{
+                'resource': {
+                    'attributes': _otlp_attributes({'service.name': self.service_name})
+                },
+                'scopeSpans': [{
+                    'scope': {'name': 'scheduler.run_lifecycle'},
+                    'spans': [self._to_otlp(span) for span in spans]
+                }]
+            }]
+        }
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+
+        with self._write_lock:
+            # Keep a single backup so the trace file stays bounded
+            if os.path.exists(self.trace_file) and os.path.getsize(self.trace_file) > self.max_bytes:
+                os.replace(self.trace_file, self.trace_file + '.1')
+            with open(self.trace_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def get_summary(self, task_id: int = None) -> Dict:
+        """Per-task, per-phase duration summary since the scheduler started."""
+        with self._summary_lock:
+            if task_id is not None:
+                return _finalize({task_id: self._summary.get(task_id, {})})
+            return _finalize(self._summary)
+
+
+def _accumulate(task_summary: Dict, name: str, duration_ms: float):
+    stats = task_summary.setdefault(name, {
+        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0
+    })
+    stats['count'] += 1
+    stats['total_ms'] += duration_ms
+    stats['max_ms'] = max(stats['max_ms'], duration_ms)
+    stats['last_ms'] = duration_ms
+
+
+def _finalize(summary: Dict) -> Dict:
+    result = {}
+    for task_id, phases in summary.items():
+        result[task_id] = {
+            name: {
+                'count': stats['count'],
+                'avg_ms': round(stats['total_ms'] / stats['count'], 3) if stats['count'] else 0.0,
+                'max_ms': round(stats['max_ms'], 3),
+                'last_ms': round(stats['last_ms'], 3),
+            }
+            for name, stats in sorted(phases.items())
+        }
+    return result
+
+
+def iter_trace_spans(trace_file: str):
+    """Yield spans from a JSONL trace file as plain dicts."""
+    if not os.path.exists(trace_file):
+        return
+    with open(trace_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            for resource_spans in record.get('resourceSpans', []):
+                for scope_spans in resource_spans.get('scopeSpans', []):
+                    for span in scope_spans.get('spans', []):
+                        attributes = {a['key']: _attribute_value(a) for a in span.get('attributes', [])}
+                        start_ns = int(span['startTimeUnixNano'])
+                        end_ns = int(span['endTimeUnixNano'])
+                        yield {
+                            'trace_id': span['traceId'],
+                            'span_id': span['spanId'],
+                            'parent_span_id': span.get('parentSpanId'),
+                            'name': span['name'],
+                            'start_ns': start_ns,
+                            'duration_ms': (end_ns - start_ns) / 1e6,
+                            'attributes': attributes,
+                            'error': span.get('status', {}).get('code') == STATUS_CODE_ERROR,
+                        }
+
+
+def summarize_trace_file(trace_file: str, task_id: int = None, since: float = None) -> Dict:
+    """Build the per-task phase summary from a trace file (for out-of-process readers)."""
+    summary = {}
+    since_ns = int(since * 1e9) if since else None
+    for span in iter_trace_spans(trace_file):
+        span_task = span['attributes'].get('task_id')
+        if task_id is not None and span_task != task_id:
+            continue
+        if since_ns and span['start_ns'] < since_ns:
+            continue
+        _accumulate(summary.setdefault(span_task, {}), span['name'], span['duration_ms'])
+    return _finalize(summary)
@@ -0,0 +1,234 @@
+# SchedulerService/schedule_forecast.py
+"""
+Forecast of upcoming task fires.
+Fire times are walked from each job's live trigger over a rolling horizon and
+cached in the task_fire_forecast table, so "what runs between 05:00 and 07:00
+tomorrow" is an indexed range read from any process. Only tasks whose
+schedule changed are recomputed; otherwise the horizon is extended from each
+task's last cached fire. NextRunRecorder keeps task_schedules.next_run_time
+current for cheap "next N runs" reads.
+"""
+
+import math
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def forecast_fire_times(trigger, first_fire: Optional[datetime], end: datetime,
+                        max_fires: int) -> List[datetime]:
+    """Fire times of a trigger from first_fire (inclusive) up to end (exclusive)."""
+    fires = []
+    fire = first_fire
+    while fire is not None and fire < end and len(fires) < max_fires:
+        fires.append(fire)
+        fire = trigger.get_next_fire_time(fire, fire + timedelta(microseconds=1))
+    return fires
+
+
+def concurrency_histogram(fires: Iterable[Tuple[datetime, float]], start: datetime, end: datetime,
+                          bucket_seconds: int = 60) -> Dict:
+    """Count runs expected to be in progress in each bucket between start and end.
+
+    fires is (fire_time, expected_seconds) pairs; a run occupies every bucket
+    its [fire_time, fire_time + expected_seconds) interval touches.
+    """
+    buckets = max(1, math.ceil((end - start).total_seconds() / bucket_seconds))
+    delta = [0] * (buckets + 1)
+    for fire_time, expected_seconds in fires:
+        run_start = max(fire_time, start)
+        run_end = min(fire_time + timedelta(seconds=max(expected_seconds or 0, 1)), end)
+        if run_end <= run_start:
+            continue
+        delta[int((run_start - start).total_seconds() // bucket_seconds)] += 1
+        delta[min(buckets, math.ceil((run_end - start).total_seconds() / bucket_seconds))] -= 1
+
+    counts = []
+    running = 0
+    for change in delta[:buckets]:
+        running += change
+        counts.append(running)
+    peak = max(counts)
+    return {
+        'start': start,
+        'bucket_seconds': bucket_seconds,
+        'counts': counts,
+        'peak': peak,
+        'peak_at': start + timedelta(seconds=counts.index(peak) * bucket_seconds)
+    }
+
+
+class ScheduleForecaster:
+    """Keeps the fire forecast in line with the scheduler's task_* jobs."""
+
+    def __init__(self, scheduler, forecast_manager, horizon_hours: int = 168,
+                 max_fires_per_task: int = 5000, refresh_seconds: int = 900, owns=None):
+        self.scheduler = scheduler          # APScheduler instance
+        self.forecasts = forecast_manager
+        self.owns = owns                    # task_id -> bool when sharded; other nodes write their own tasks
+        self.horizon = timedelta(hours=horizon_hours)
+        self.max_fires_per_task = max_fires_per_task
+        self.refresh_seconds = refresh_seconds
+        self._last_fire = {}                # task_id -> last cached fire time (aware)
+        self._capped = set()                # tasks whose forecast stops at max_fires_per_task
+        self._changed = set()
+        self._rebuild = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name='ScheduleForecaster', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def mark_changed(self, task_ids: Iterable[int] = ()):
+        """Recompute these tasks (and drop removed ones) on the next pass."""
+        with self._lock:
+            self._changed.update(task_ids)
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Schedule forecast error: {e}")
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+
+    def _naive(self, fire: datetime) -> datetime:
+        # Stored like the other timestamps: naive, in the scheduler's timezone
+        return fire.astimezone(self.scheduler.timezone).replace(tzinfo=None)
+
+    def refresh(self):
+        """Recompute changed tasks, extend the rest to the horizon and prune the past."""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            rebuild, self._rebuild = self._rebuild, False
+
+        now = datetime.now(self.scheduler.timezone)
+        end = now + self.horizon
+        jobs = {}
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith('task_'):
+                jobs[int(job.id[len('task_'):])] = job
+
+        if rebuild:
+            if self.owns is None:
+                self.forecasts.clear()
+            self._last_fire = {}
+            self._capped = set()
+            changed = set(jobs)
+
+        removed = [task_id for task_id in self._last_fire if task_id not in jobs]
+        if removed:
+            # A task that moved to another node is rewritten by its new owner
+            self.forecasts.delete_tasks([task_id for task_id in removed if self.owns is None or self.owns(task_id)])
+            for task_id in removed:
+                self._last_fire.pop(task_id, None)
+                self._capped.discard(task_id)
+
+        written = 0
+        for task_id, job in jobs.items():
+            next_run_time = getattr(job, 'next_run_time', None)
+            # A task that hit the per-task cap is recomputed rather than extended past it
+            if task_id in changed or task_id not in self._last_fire or task_id in self._capped:
+                fires = forecast_fire_times(job.trigger, next_run_time, end, self.max_fires_per_task)
+                self.forecasts.replace_task(task_id, [self._naive(f) for f in fires])
+            else:
+                last = self._last_fire[task_id]
+                first = job.trigger.get_next_fire_time(last, last + timedelta(microseconds=1)) if last else next_run_time
+                fires = forecast_fire_times(job.trigger, first, end, self.max_fires_per_task)
+                self.forecasts.add_fires(task_id, [self._naive(f) for f in fires])
+            if len(fires) >= self.max_fires_per_task:
+                self._capped.add(task_id)
+            else:
+                self._capped.discard(task_id)
+            if fires:
+                self._last_fire[task_id] = fires[-1]
+            else:
+                self._last_fire.setdefault(task_id, None)
+            written += len(fires)
+
+        self.forecasts.prune(self._naive(now))
+        if written or removed:
+            logger.info(f"Forecast updated: {written} fires written, {len(removed)} tasks dropped")
+
+
+class NextRunRecorder:
+    """Writes each task job's next fire time back to task_schedules.next_run_time.
+
+    Job events only mark the task; a background pass reads the jobs' current
+    next_run_time and writes all marked tasks in one statement, so a burst
+    of fires costs one round trip.
+    """
+
+    def __init__(self, scheduler, task_manager, flush_seconds: float = 5, owns=None):
+        self.scheduler = scheduler          # APScheduler instance
+        self.task_manager = task_manager
+        self.owns = owns                    # task_id -> bool when sharded; other nodes write their own tasks
+        self.flush_seconds = flush_seconds
+        self._pending = set()
+        self._full_sync = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name='NextRunRecorder', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def job_listener(self, event):
+        """APScheduler listener: mark the task whose job fired or changed."""
+        if event.job_id.startswith('task_'):
+            with self._lock:
+                self._pending.add(int(event.job_id[len('task_'):]))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Next run time flush failed: {e}")
+        self.flush()
+
+    def flush(self) -> int:
+        """Write the marked tasks' next run times; returns the number of tasks written."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            full_sync, self._full_sync = self._full_sync, False
+
+        jobs = {}
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith('task_'):
+                jobs[int(job.id[len('task_'):])] = job
+        if full_sync:
+            pending |= set(jobs)
+        if self.owns is not None:
+            # A task that moved to another node is written by its new owner
+            pending = {task_id for task_id in pending if task_id in jobs or self.owns(task_id)}
+        if not pending and not full_sync:
+            return 0
+
+        next_runs = {}
+        for task_id in pending:
+            job = jobs.get(task_id)
+            next_run_time = getattr(job, 'next_run_time', None) if job else None
+            next_runs[task_id] = (next_run_time.astimezone(self.scheduler.timezone).replace(tzinfo=None)
+                                  if next_run_time else None)
+        try:
+            self.task_manager.set_next_run_times(next_runs, clear_others=full_sync and self.owns is None)
+        except Exception:
+            # Keep the marks so the next pass retries them
+            with self._lock:
+                self._pending |= pending
+                self._full_sync = self._full_sync or full_sync
+            raise
+        return len(next_runs)
@@ -0,0 +1,439 @@
+# SchedulerService/scheduler_benchmark.py
+"""
+End-to-end scheduler benchmark with synthetic workloads.
+Runs a real ProductionScheduler against a throwaway schema on a local
+PostgreSQL database, fires N trivial cron/interval/dependency-chain tasks and
+reports throughput, latency, DB round trips and scheduler CPU/memory.
+Results are saved as a JSON baseline so later commits can be compared.
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import psutil
+import psycopg2
+
+import production_config_local
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'scheduler_baseline.json'
+)
+
+# Base tables the scheduler expects, matching the columns the code reads and writes
+BENCH_SCHEMA_DDL = """
+    CREATE SCHEMA IF NOT EXISTS {schema};
+    CREATE TABLE IF NOT EXISTS {schema}.scheduler_tasks (
+        task_id SERIAL PRIMARY KEY,
+        task_name VARCHAR(255) UNIQUE NOT NULL,
+        script_path TEXT NOT NULL,
+        description TEXT,
+        is_active BOOLEAN DEFAULT true,
+        max_retries INTEGER DEFAULT 3,
+        retry_delay_seconds INTEGER DEFAULT 300,
+        timeout_seconds INTEGER DEFAULT 3600,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS {schema}.task_schedules (
+        schedule_id SERIAL PRIMARY KEY,
+        task_id INTEGER REFERENCES {schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+        schedule_type VARCHAR(20) NOT NULL,
+        schedule_config JSONB NOT NULL,
+        is_active BOOLEAN DEFAULT true,
+        next_run_time TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS {schema}.task_dependencies (
+        dependency_id SERIAL PRIMARY KEY,
+        task_id INTEGER REFERENCES {schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+        depends_on_task_id INTEGER REFERENCES {schema}.scheduler_tasks(task_id) ON DELETE CASCADE,
+        dependency_type VARCHAR(20) DEFAULT 'success',
+        UNIQUE (task_id, depends_on_task_id)
+    );
+    CREATE TABLE IF NOT EXISTS {schema}.task_runs (
+        run_id SERIAL PRIMARY KEY,
+        task_id INTEGER REFERENCES {schema}.scheduler_tasks(task_id),
+        status VARCHAR(20) NOT NULL,
+        started_at TIMESTAMP,
+        completed_at TIMESTAMP,
+        duration_seconds NUMERIC,
+        exit_code INTEGER,
+        error_message TEXT,
+        log_file_path TEXT,
+        triggered_by VARCHAR(50),
+        machine_name VARCHAR(255),
+        process_id INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS {schema}.run_dependencies (
+        run_id INTEGER REFERENCES {schema}.task_runs(run_id),
+        depends_on_run_id INTEGER REFERENCES {schema}.task_runs(run_id)
+    );
+    CREATE TABLE IF NOT EXISTS {schema}.scheduler_alerts (
+        alert_id SERIAL PRIMARY KEY,
+        alert_type VARCHAR(50),
+        severity VARCHAR(20),
+        message TEXT,
+        task_id INTEGER,
+        run_id INTEGER,
+        details JSONB,
+        acknowledged BOOLEAN DEFAULT false,
+        acknowledged_by VARCHAR(255),
+        acknowledged_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS {schema}.scheduler_health (
+        service_name VARCHAR(255),
+        machine_name VARCHAR(255),
+        status VARCHAR(20),
+        last_heartbeat TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        metrics JSONB
+    );
+"""
+
+TRIVIAL_SCRIPT = "import sys\nsys.exit(0)\n"
+
+# Metric name -> True if higher is better
+METRIC_DIRECTIONS = {
+    'fires_per_sec': True,
+    'runs_per_sec': True,
+    'trigger_to_spawn_ms_p50': False,
+    'trigger_to_spawn_ms_p95': False,
+    'trigger_to_spawn_ms_p99': False,
+    'schedule_lag_ms_p50': False,
+    'schedule_lag_ms_p95': False,
+    'db_round_trips_per_run': False,
+    'scheduler_cpu_percent': False,
+    'scheduler_rss_mb_peak': False,
+}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return round(ordered[index], 3)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+class RoundTripCounter:
+    """Counts cursor.execute calls made through a DatabaseManager."""
+
+    def __init__(self, db_manager):
+        self.count = 0
+        self.lock = threading.Lock()
+        original_get_cursor = db_manager.get_cursor
+        counter = self
+
+        class CountingCursor:
+            def __init__(self, cursor):
+                self._cursor = cursor
+
+            def execute(self, *args, **kwargs):
+                with counter.lock:
+                    counter.count += 1
+                return self._cursor.execute(*args, **kwargs)
+
+            def __getattr__(self, name):
+                return getattr(self._cursor, name)
+
+        @contextmanager
+        def counting_get_cursor(*args, **kwargs):
+            with original_get_cursor(*args, **kwargs) as cursor:
+                yield CountingCursor(cursor)
+
+        db_manager.get_cursor = counting_get_cursor
+
+
+class SchedulerBenchmark:
+    def __init__(self, args):
+        self.args = args
+        self.work_dir = tempfile.mkdtemp(prefix='scheduler_bench_')
+        self.db_config = {
+            'host': args.db_host,
+            'port': args.db_port,
+            'database': args.db_name,
+            'user': args.db_user,
+            'password': args.db_password
+        }
+        self.schema = args.schema
+        self.schedule_lags = []
+        self.install_config()
+
+    def install_config(self):
+        """Point production_config at the benchmark database, schema and temp paths."""
+        config = types.ModuleType('production_config')
+        config.__dict__.update({
+            k: v for k, v in vars(production_config_local).items() if not k.startswith('__')
+        })
+        config.DATABASE_CONFIG = self.db_config
+        config.DATABASE_SCHEMA = self.schema
+        config.VENV_PYTHON = sys.executable
+        config.LOG_DIR = os.path.join(self.work_dir, 'logs')
+        config.TRACE_CONFIG = dict(production_config_local.TRACE_CONFIG,
+                                   enabled=True,
+                                   trace_file=os.path.join(self.work_dir, 'traces.jsonl'))
+        config.WATCHDOG_CONFIG = dict(production_config_local.WATCHDOG_CONFIG, enabled=False)
+        # Keep the production spool, log index, status channel and cluster state untouched
+        config.LOG_SPOOL_CONFIG = dict(production_config_local.LOG_SPOOL_CONFIG,
+                                       spool_dir=os.path.join(self.work_dir, 'spool'))
+        config.LOG_SEARCH_CONFIG = dict(production_config_local.LOG_SEARCH_CONFIG,
+                                        index_path=os.path.join(self.work_dir, 'index', 'log_index.sqlite3'))
+        config.STATUS_CHANNEL_CONFIG = dict(production_config_local.STATUS_CHANNEL_CONFIG, enabled=False)
+        config.DISPATCH_CONFIG = dict(production_config_local.DISPATCH_CONFIG, enabled=False)
+        config.SHARDING_CONFIG = dict(production_config_local.SHARDING_CONFIG, enabled=False)
+        config.BACKFILL_CONFIG = dict(production_config_local.BACKFILL_CONFIG, enabled=False)
+        config.CALLABLE_CONFIG = dict(production_config_local.CALLABLE_CONFIG, python=sys.executable,
+                                      sys_path=[self.work_dir])
+        os.makedirs(config.LOG_DIR, exist_ok=True)
+        sys.modules['production_config'] = config
+        self.config = config
+
+    def execute_ddl(self, sql):
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def create_schema(self):
+        print(f"Creating benchmark schema '{self.schema}'...")
+        self.execute_ddl(f"DROP SCHEMA IF EXISTS {self.schema} CASCADE")
+        self.execute_ddl(BENCH_SCHEMA_DDL.format(schema=self.schema))
+
+    def drop_schema(self):
+        self.execute_ddl(f"DROP SCHEMA IF EXISTS {self.schema} CASCADE")
+
+    def create_tasks(self, task_manager):
+        """Generate the synthetic workload: cron, interval and dependency chains."""
+        script_path = os.path.join(self.work_dir, 'scripts', 'trivial_task.py')
+        os.makedirs(os.path.dirname(script_path), exist_ok=True)
+        with open(script_path, 'w') as f:
+            f.write(TRIVIAL_SCRIPT)
+
+        counts = {'cron': 0, 'interval': 0, 'chain': 0}
+        previous_chain_task = None
+        for i in range(self.args.tasks):
+            kind = ('cron', 'interval', 'chain')[i % 3]
+            task_id = task_manager.create_task(
+                task_name=f"bench_{kind}_{i:04d}",
+                script_path=script_path,
+                description='Synthetic benchmark task',
+                max_retries=0,
+                timeout_seconds=60
+            )
+            if kind == 'cron':
+                task_manager.add_schedule(task_id, 'cron', {'second': f"*/{self.args.cron_seconds}"})
+            else:
+                task_manager.add_schedule(task_id, 'interval', {'seconds': self.args.interval_seconds})
+
+            if kind == 'chain':
+                # Each link depends on the previous one; chains restart every chain_length tasks
+                if previous_chain_task and counts['chain'] % self.args.chain_length:
+                    task_manager.add_dependency(task_id, previous_chain_task)
+                previous_chain_task = task_id
+            counts[kind] += 1
+        return counts
+
+    def record_schedule_lag(self, event):
+        now = datetime.now(event.scheduled_run_times[0].tzinfo) if event.scheduled_run_times else None
+        for scheduled in event.scheduled_run_times:
+            self.schedule_lags.append((now - scheduled).total_seconds() * 1000)
+
+    def run(self):
+        self.create_schema()
+        try:
+            return self.run_workload()
+        finally:
+            if not self.args.keep_schema:
+                self.drop_schema()
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def run_workload(self):
+        from apscheduler.events import EVENT_JOB_SUBMITTED
+        from production_scheduler_core import ProductionScheduler
+        from run_tracing import iter_trace_spans
+
+        scheduler = ProductionScheduler()
+        counter = RoundTripCounter(scheduler.db)
+        counts = self.create_tasks(scheduler.task_manager)
+        print(f"Created {self.args.tasks} tasks: {counts}")
+
+        scheduler.scheduler.add_listener(self.record_schedule_lag, EVENT_JOB_SUBMITTED)
+
+        proc = psutil.Process()
+        cpu_start = proc.cpu_times()
+        rss_samples = []
+        round_trips_start = counter.count
+        wall_start = time.time()
+
+        scheduler.start_background()
+        print(f"Running workload for {self.args.duration}s...")
+        while time.time() - wall_start < self.args.duration:
+            rss_samples.append(proc.memory_info().rss / (1024 * 1024))
+            time.sleep(1)
+
+        wall = time.time() - wall_start
+        cpu_end = proc.cpu_times()
+        round_trips = counter.count - round_trips_start
+        scheduler.shutdown()
+
+        runs = scheduler.db.execute_query(
+            f"SELECT status, COUNT(*) AS n FROM {self.schema}.task_runs GROUP BY status"
+        )
+        run_counts = {r['status']: r['n'] for r in runs}
+        total_runs = sum(run_counts.values())
+
+        # Trigger-to-spawn latency: root span start to end of process.spawn, per trace
+        traces = {}
+        for span in iter_trace_spans(self.config.TRACE_CONFIG['trace_file']):
+            traces.setdefault(span['trace_id'], []).append(span)
+        fires = 0
+        spawn_latencies = []
+        for spans in traces.values():
+            root = next((s for s in spans if not s['parent_span_id']), None)
+            if not root:
+                continue
+            if root['name'] == 'task.trigger':
+                fires += 1
+            spawn = next((s for s in spans if s['name'] == 'process.spawn'), None)
+            if spawn:
+                spawn_end_ns = spawn['start_ns'] + spawn['duration_ms'] * 1e6
+                spawn_latencies.append((spawn_end_ns - root['start_ns']) / 1e6)
+
+        cpu_seconds = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+        metrics = {
+            'fires_per_sec': round(fires / wall, 3),
+            'runs_per_sec': round(total_runs / wall, 3),
+            'trigger_to_spawn_ms_p50': percentile(spawn_latencies, 0.50),
+            'trigger_to_spawn_ms_p95': percentile(spawn_latencies, 0.95),
+            'trigger_to_spawn_ms_p99': percentile(spawn_latencies, 0.99),
+            'schedule_lag_ms_p50': percentile(self.schedule_lags, 0.50),
+            'schedule_lag_ms_p95': percentile(self.schedule_lags, 0.95),
+            'db_round_trips_per_run': round(round_trips / total_runs, 2) if total_runs else None,
+            'scheduler_cpu_percent': round(100 * cpu_seconds / wall, 2),
+            'scheduler_rss_mb_peak': round(max(rss_samples), 1) if rss_samples else None,
+            'scheduler_rss_mb_mean': round(statistics.mean(rss_samples), 1) if rss_samples else None,
+        }
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'git_revision': git_revision(),
+            'python': sys.version.split()[0],
+            'params': {
+                'tasks': self.args.tasks,
+                'duration_seconds': self.args.duration,
+                'cron_seconds': self.args.cron_seconds,
+                'interval_seconds': self.args.interval_seconds,
+                'chain_length': self.args.chain_length,
+                'task_mix': counts,
+            },
+            'runs': {'total': total_runs, 'by_status': run_counts, 'fires': fires},
+            'metrics': metrics,
+        }
+
+
+def compare_results(current, baseline, tolerance):
+    """Return a list of metric regressions beyond the tolerance."""
+    regressions = []
+    for name, higher_is_better in METRIC_DIRECTIONS.items():
+        new = current['metrics'].get(name)
+        old = baseline['metrics'].get(name)
+        if new is None or old in (None, 0):
+            continue
+        change = (new - old) / abs(old)
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressions.append({'metric': name, 'baseline': old, 'current': new,
+                                'change_percent': round(change * 100, 1)})
+    return regressions
+
+
+def print_results(results):
+    print(f"\n=== Benchmark Results ({results['git_revision'] or 'unknown revision'}) ===")
+    print(f"Runs: {results['runs']['total']} {results['runs']['by_status']}")
+    for name, value in results['metrics'].items():
+        print(f"  {name:<28} {value}")
+
+
+def main():
+    db = production_config_local.DATABASE_CONFIG
+    parser = argparse.ArgumentParser(description='Scheduler End-to-End Benchmark')
+    parser.add_argument('--tasks', type=int, default=30, help='Number of synthetic tasks')
+    parser.add_argument('--duration', type=int, default=120, help='Workload duration in seconds')
+    parser.add_argument('--cron-seconds', type=int, default=10, help='Cron tasks fire every N seconds')
+    parser.add_argument('--interval-seconds', type=int, default=10, help='Interval task period in seconds')
+    parser.add_argument('--chain-length', type=int, default=5, help='Tasks per dependency chain')
+    parser.add_argument('--db-host', default='localhost', help='Benchmark database host')
+    parser.add_argument('--db-port', type=int, default=5432, help='Benchmark database port')
+    parser.add_argument('--db-name', default=db['database'], help='Benchmark database name')
+    parser.add_argument('--db-user', default=db['user'], help='Benchmark database user')
+    parser.add_argument('--db-password', default=db['password'], help='Benchmark database password')
+    parser.add_argument('--schema', default='scheduler_bench', help='Throwaway schema (dropped and recreated)')
+    parser.add_argument('--keep-schema', action='store_true', help='Keep the benchmark schema afterwards')
+    parser.add_argument('--output', help='Write results JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression (0.2 = 20%%)')
+
+    args = parser.parse_args()
+
+    if args.schema == production_config_local.DATABASE_SCHEMA:
+        print("✗ Refusing to benchmark against the production schema")
+        sys.exit(2)
+
+    results = SchedulerBenchmark(args).run()
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to: {args.output}")
+
+    exit_code = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        print(f"\nCompared with baseline {baseline.get('git_revision')} ({baseline.get('timestamp')}):")
+        if regressions:
+            for r in regressions:
+                print(f"  ✗ {r['metric']}: {r['baseline']} -> {r['current']} ({r['change_percent']:+}%)")
+            exit_code = 1
+        else:
+            print(f"  ✓ No regressions beyond {args.tolerance:.0%}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved: {args.baseline}")
+
+    sys.exit(exit_code)
+
+if __name__ == '__main__':
+    main()
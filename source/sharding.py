@@ -0,0 +1,117 @@
+# SchedulerService/sharding.py
+"""
+Sharded scheduling across several scheduler nodes.
+Nodes heartbeat into scheduler_health; every node reads the same live
+membership and places task ids on a consistent-hash ring, so each task has
+exactly one owner and only about 1/N of the tasks move when a node joins or
+stops heartbeating. While nodes briefly disagree about membership, a fire is
+only run by the node that claims it first in the database.
+"""
+
+import bisect
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent-hash ring of node names with virtual nodes for an even spread."""
+
+    def __init__(self, nodes: Iterable[str], virtual_nodes: int = 64):
+        self.nodes = sorted(set(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(virtual_nodes))
+        self._keys = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key) -> Optional[str]:
+        """The node owning key (the first ring point clockwise from its hash)."""
+        if not self._keys:
+            return None
+        i = bisect.bisect_right(self._keys, _hash(str(key))) % len(self._keys)
+        return self._owners[i]
+
+
+def scheduled_fire_time(trigger, now: datetime, lookback_seconds: float = 300,
+                        max_steps: int = 10000) -> Optional[datetime]:
+    """The trigger's latest fire time at or before now, looking back lookback_seconds.
+
+    Every node computes the same value for a fire, so it can key the fire claim.
+    """
+    fire = trigger.get_next_fire_time(None, now - timedelta(seconds=lookback_seconds))
+    last = None
+    for _ in range(max_steps):
+        if fire is None or fire > now:
+            break
+        last = fire
+        fire = trigger.get_next_fire_time(fire, fire + timedelta(microseconds=1))
+    return last
+
+
+class ShardCoordinator:
+    """Heartbeats this node's membership and tracks which task ids it owns."""
+
+    def __init__(self, health_manager, on_change: Callable[[], None] = None,
+                 heartbeat_seconds: float = 10, member_timeout_seconds: float = 45,
+                 virtual_nodes: int = 64):
+        self.health_manager = health_manager
+        self.node_name = health_manager.machine_name
+        self.on_change = on_change          # called after membership changed (reload jobs)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.member_timeout_seconds = member_timeout_seconds
+        self.virtual_nodes = virtual_nodes
+        self.members: List[str] = [self.node_name]
+        self.ring = HashRing(self.members, virtual_nodes)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Join (so the first task load is already sharded) and keep heartbeating."""
+        self.refresh()
+        threading.Thread(target=self._run, name='ShardCoordinator', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def owns(self, task_id: int) -> bool:
+        with self._lock:
+            return self.ring.node_for(task_id) == self.node_name
+
+    def is_leader(self) -> bool:
+        """The first live member runs cluster-wide housekeeping."""
+        with self._lock:
+            return self.members[0] == self.node_name
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                if self.refresh() and self.on_change:
+                    self.on_change()
+            except Exception as e:
+                logger.error(f"Shard membership refresh failed: {e}")
+
+    def refresh(self) -> bool:
+        """Heartbeat and re-read membership; True if it changed."""
+        self.health_manager.touch()
+        members = self.health_manager.get_members(self.member_timeout_seconds)
+        if self.node_name not in members:
+            members.append(self.node_name)
+        members = sorted(members)
+        with self._lock:
+            if members == self.members:
+                return False
+            previous, self.members = self.members, members
+            self.ring = HashRing(members, self.virtual_nodes)
+        joined = sorted(set(members) - set(previous))
+        left = sorted(set(previous) - set(members))
+        logger.info(f"Scheduler membership changed: {len(members)} node(s)"
+                    + (f", joined {', '.join(joined)}" if joined else "")
+                    + (f", left {', '.join(left)}" if left else ""))
+        return True
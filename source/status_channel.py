@@ -0,0 +1,271 @@
+# SchedulerService/status_channel.py
+"""
+Read-only status channel between the scheduler and a standalone dashboard.
+The scheduler serves its snapshot, event history, thread dumps and trace
+summaries over an authenticated multiprocessing.connection socket; the
+dashboard process talks to it through SchedulerClient, which exposes the same
+attributes the dashboard routes use on an in-process ProductionScheduler.
+Messages are pickled, so a client holding the authkey can run code in the
+scheduler: the channel only listens in standalone dashboard mode, and never
+with the placeholder key.
+"""
+
+import os
+import logging
+import secrets
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from typing import Dict, List, Optional
+
+from production_config import LOG_SEARCH_CONFIG
+from db_models import DatabaseManager, TaskManager, RunManager, AlertManager
+from log_index import LogIndex
+
+logger = logging.getLogger(__name__)
+
+# Shipped in older configs; never accepted
+PLACEHOLDER_AUTHKEYS = ('', 'change-me')
+
+
+def load_authkey(authkey: Optional[str], authkey_file: Optional[str], create: bool = False) -> bytes:
+    """The configured authkey, else the per-install key in authkey_file.
+    
+    The scheduler (create=True) generates the key file on first use; the
+    dashboard on the same host reads it.
+    """
+    if authkey is not None:
+        if authkey in PLACEHOLDER_AUTHKEYS:
+            raise ValueError("STATUS_CHANNEL_CONFIG['authkey'] is the placeholder; set a secret "
+                             "or leave it None to use a generated key")
+        return authkey.encode('utf-8')
+    if not authkey_file:
+        raise ValueError("Status channel needs an 'authkey' or an 'authkey_file'")
+    if create and not os.path.exists(authkey_file):
+        os.makedirs(os.path.dirname(authkey_file) or '.', exist_ok=True)
+        fd = os.open(authkey_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+        logger.info(f"Generated status channel key {authkey_file}")
+    with open(authkey_file) as f:
+        key = f.read().strip()
+    if not key:
+        raise ValueError(f"Status channel key file {authkey_file} is empty")
+    return key.encode('utf-8')
+
+
+class StatusChannelServer:
+    """Serves read-only scheduler state to other processes."""
+
+    METHODS = ('ping', 'snapshot', 'thread_dump', 'trace_summary', 'duration_limits',
+               'run_output', 'last_event_id', 'events_since', 'wait_for_events')
+
+    def __init__(self, scheduler, host: str, port: int, authkey: Optional[str], authkey_file: str = None):
+        self.scheduler = scheduler
+        self.address = (host, port)
+        self.authkey = authkey
+        self.authkey_file = authkey_file
+        self._listener = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Listen for dashboard connections; raises ValueError without a usable authkey."""
+        authkey = load_authkey(self.authkey, self.authkey_file, create=True)
+        self._listener = Listener(self.address, authkey=authkey)
+        threading.Thread(target=self._accept_loop, name='StatusChannel', daemon=True).start()
+        logger.info(f"Status channel listening on {self.address[0]}:{self.address[1]}")
+
+    def stop(self):
+        self._stop.set()
+        if self._listener:
+            try:
+                self._listener.close()
+            except Exception:
+                pass
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break
+            except Exception as e:
+                # Bad authkey or a client that hung up during the handshake
+                logger.warning(f"Status channel connection rejected: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), name='StatusChannelConn', daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    if method not in self.METHODS:
+                        raise ValueError(f"Unknown status channel method: {method}")
+                    conn.send(('ok', getattr(self, f"_{method}")(*args)))
+                except (EOFError, OSError):
+                    break
+                except Exception as e:
+                    conn.send(('error', str(e)))
+
+    def _ping(self) -> Dict:
+        return {'started_at': self.scheduler.started_at, 'boot_id': self.scheduler.event_bus.boot_id}
+
+    def _snapshot(self):
+        return self.scheduler.status_sampler.snapshot
+
+    def _thread_dump(self) -> List[Dict]:
+        return self.scheduler.get_thread_dump()
+
+    def _trace_summary(self, task_id=None) -> Dict:
+        return self.scheduler.tracer.get_summary(task_id)
+
+    def _duration_limits(self, task: Dict):
+        return self.scheduler.resolve_duration_limits(task)
+
+    def _run_output(self, run_id, since=0, limit=None):
+        return self.scheduler.get_run_output(run_id, since, limit)
+
+    def _last_event_id(self) -> str:
+        return self.scheduler.event_bus.last_event_id
+
+    def _events_since(self, last_event_id):
+        return self.scheduler.event_bus.events_since(last_event_id)
+
+    def _wait_for_events(self, last_event_id, timeout):
+        return self.scheduler.event_bus.wait_for_events(last_event_id, timeout)
+
+
+class StatusChannelClient:
+    """Thread-safe client; each thread keeps its own connection."""
+
+    def __init__(self, host: str, port: int, authkey: Optional[str], timeout_seconds: float = 5,
+                 authkey_file: str = None):
+        self.address = (host, port)
+        self.authkey = authkey
+        self.authkey_file = authkey_file
+        self.timeout_seconds = timeout_seconds
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Read on connect: the scheduler may create the key file after the dashboard starts
+            authkey = load_authkey(self.authkey, self.authkey_file)
+            conn = self._local.conn = Client(self.address, authkey=authkey)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def call(self, method: str, *args, wait_seconds: float = 0):
+        """Invoke a channel method; raises ConnectionError if the scheduler is unreachable."""
+        try:
+            conn = self._connection()
+            conn.send((method, args))
+            if not conn.poll(self.timeout_seconds + wait_seconds):
+                raise TimeoutError(f"Status channel call '{method}' timed out")
+            status, result = conn.recv()
+        except (OSError, EOFError, TimeoutError, AuthenticationError, ValueError) as e:
+            # The scheduler may have restarted; reconnect on the next call
+            self._drop_connection()
+            raise ConnectionError(f"Status channel unavailable: {e}") from e
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+
+class RemoteStatusSampler:
+    """Stands in for StatusSampler; reads the snapshot over the channel."""
+
+    def __init__(self, channel: StatusChannelClient):
+        self.channel = channel
+
+    @property
+    def snapshot(self):
+        try:
+            return self.channel.call('snapshot')
+        except ConnectionError as e:
+            logger.warning(f"Snapshot unavailable: {e}")
+            return None
+
+    def request_refresh(self, reload_db: bool = False):
+        # The scheduler's config watcher picks up task changes from the database
+        pass
+
+
+class RemoteEventBus:
+    """Stands in for EventBus; replays and waits on the scheduler's event history."""
+
+    def __init__(self, channel: StatusChannelClient):
+        self.channel = channel
+
+    @property
+    def boot_id(self) -> str:
+        return self.channel.call('ping')['boot_id']
+
+    @property
+    def last_event_id(self) -> str:
+        return self.channel.call('last_event_id')
+
+    def events_since(self, last_event_id: Optional[str]):
+        return self.channel.call('events_since', last_event_id)
+
+    def wait_for_events(self, last_event_id: str, timeout: float):
+        return self.channel.call('wait_for_events', last_event_id, timeout, wait_seconds=timeout)
+
+
+class RemoteTracer:
+    """Stands in for RunTracer in the dashboard process."""
+
+    def __init__(self, channel: StatusChannelClient):
+        self.channel = channel
+
+    def get_summary(self, task_id: int = None) -> Dict:
+        return self.channel.call('trace_summary', task_id)
+
+
+class SchedulerClient:
+    """Dashboard-side view of a scheduler running in another process.
+
+    Reads go to the database, the scheduler's log index file (the dashboard runs
+    on the same host) or over the status channel. Task changes
+    are written to the database; the scheduler notices the bumped config
+    version and reloads. Operations that need the scheduler's own threads,
+    such as manual runs, are not available (read_only is True).
+    """
+
+    read_only = True
+
+    def __init__(self, channel: StatusChannelClient):
+        self.channel = channel
+        self.db = DatabaseManager()
+        self.task_manager = TaskManager(self.db)
+        self.run_manager = RunManager(self.db)
+        self.alert_manager = AlertManager(self.db)
+        self.log_index = LogIndex(LOG_SEARCH_CONFIG['index_path'], max_line_bytes=LOG_SEARCH_CONFIG['max_line_bytes'])
+        self.status_sampler = RemoteStatusSampler(channel)
+        self.event_bus = RemoteEventBus(channel)
+        self.tracer = RemoteTracer(channel)
+
+    def load_tasks_from_db(self):
+        # The bumped config version makes the scheduler reload on its next poll
+        pass
+
+    def get_thread_dump(self) -> List[Dict]:
+        return self.channel.call('thread_dump')
+
+    def resolve_duration_limits(self, task: Dict):
+        return self.channel.call('duration_limits', task)
+
+    def get_run_output(self, run_id: int, since: int = 0, limit: int = None) -> Optional[Dict]:
+        return self.channel.call('run_output', run_id, since, limit)
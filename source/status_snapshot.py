@@ -0,0 +1,246 @@
+# SchedulerService/status_snapshot.py
+"""
+Background-sampled status snapshot for the dashboard APIs.
+A single sampler thread collects job, run and process state on a fixed
+interval and publishes an immutable snapshot; request handlers only read the
+current reference, so they never block on psutil or the database.
+"""
+
+import time
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import psutil
+
+from event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+# Handlers must treat the payloads as read-only; a new snapshot replaces the old one.
+# Each payload carries its own version, bumped only when its content changes, and
+# the time that version was first sampled. run_metrics (run_id -> process CPU,
+# memory and runtime) changes on every sample, so it is kept out of the
+# versioned payloads and carries no version of its own.
+StatusSnapshot = namedtuple('StatusSnapshot', [
+    'taken_at', 'epoch', 'status', 'status_version', 'status_changed_at',
+    'tasks', 'tasks_version', 'tasks_changed_at', 'run_metrics'
+])
+
+
+def format_uptime(started_at: Optional[datetime]) -> str:
+    if not started_at:
+        return "Not started"
+    delta = datetime.now() - started_at
+    hours, remainder = divmod(delta.seconds, 3600)
+    minutes = remainder // 60
+    return f"Running for {delta.days} days, {hours}:{minutes:02d}"
+
+
+class StatusSampler:
+    """Keeps an up-to-date StatusSnapshot of the scheduler."""
+
+    def __init__(self, scheduler, interval_seconds: int = 5, db_refresh_seconds: int = 30):
+        self.scheduler = scheduler
+        self.interval_seconds = interval_seconds
+        self.db_refresh_seconds = db_refresh_seconds
+        # Distinguishes versions across restarts, since the counters start again at 1
+        self.epoch = format(int(time.time()), 'x')
+        self._snapshot = None
+        self._processes = {}      # pid -> psutil.Process, reused so cpu_percent is non-blocking
+        self._task_rows = {}      # task_id -> task row
+        self._last_runs = {}      # task_id -> latest run row
+        self._dependencies = {}   # task_id -> [dependency names]
+        self._db_refreshed_at = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def snapshot(self) -> Optional[StatusSnapshot]:
+        """The latest published snapshot (a single atomic reference read)."""
+        return self._snapshot
+
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name='StatusSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_refresh(self, reload_db: bool = False):
+        """Ask for an early sample, e.g. after tasks were changed."""
+        if reload_db:
+            self._db_refreshed_at = 0
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Status sampler error: {e}")
+
+    def _refresh_db_state(self):
+        """Reload task metadata, last runs and dependencies (one query each)."""
+        tasks = self.scheduler.task_manager.get_active_tasks()
+        self._task_rows = {t['task_id']: t for t in tasks}
+        self._last_runs = {r['task_id']: r for r in self.scheduler.run_manager.get_latest_runs()}
+        dependencies = {}
+        for dep in self.scheduler.task_manager.get_all_dependencies():
+            dependencies.setdefault(dep['task_id'], []).append(dep['depends_on_task_name'])
+        self._dependencies = dependencies
+        self._db_refreshed_at = time.time()
+
+    def _process_info(self, process) -> Optional[Dict]:
+        """CPU/memory of a run's process tree without blocking."""
+        pid = process.pid
+        try:
+            root = self._processes.get(pid)
+            if root is None:
+                root = self._processes[pid] = psutil.Process(pid)
+            tree = [root]
+            for child in root.children(recursive=True):
+                tree.append(self._processes.setdefault(child.pid, child))
+
+            cpu_percent = 0.0
+            memory = 0
+            for proc in tree:
+                try:
+                    # interval=None compares against the previous sample of this object
+                    cpu_percent += proc.cpu_percent(interval=None)
+                    memory += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return {
+                'cpu_percent': round(cpu_percent, 1),
+                'memory_mb': round(memory / (1024 * 1024), 1),
+                'runtime': round(time.time() - root.create_time(), 1)
+            }
+        except psutil.NoSuchProcess:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not get process info for pid {pid}: {e}")
+            return None
+
+    def sample(self):
+        """Build and publish a new snapshot."""
+        if time.time() - self._db_refreshed_at >= self.db_refresh_seconds:
+            try:
+                self._refresh_db_state()
+            except Exception as e:
+                logger.error(f"Status sampler DB refresh failed: {e}")
+
+        # Every run in progress; callable runs have no process of their own
+        with self.scheduler.process_lock:
+            running = {
+                run_id: (run_info, self.scheduler.running_processes.get(run_id))
+                for run_id, run_info in self.scheduler.running_runs.items()
+            }
+
+        running_by_task = {}
+        run_metrics = {}
+        for run_id, (run_info, process) in running.items():
+            if process is not None and process.poll() is not None:
+                continue
+            running_by_task.setdefault(run_info.get('task_id'), []).append(run_id)
+            if process is not None:
+                run_metrics[str(run_id)] = self._process_info(process)
+
+        # Drop cached psutil handles for processes that are gone
+        for pid in list(self._processes):
+            if not self._processes[pid].is_running():
+                del self._processes[pid]
+
+        tasks = self._build_tasks(running_by_task)
+        status = self._build_status(sum(len(v) for v in running_by_task.values()))
+
+        taken_at = datetime.now().isoformat()
+        previous = self._snapshot
+        if previous is None or previous.status != status:
+            status_version = (previous.status_version if previous else 0) + 1
+            status_changed_at = taken_at
+        else:
+            status, status_version, status_changed_at = previous.status, previous.status_version, previous.status_changed_at
+        if previous is None or previous.tasks != tasks:
+            tasks_version = (previous.tasks_version if previous else 0) + 1
+            tasks_changed_at = taken_at
+        else:
+            tasks, tasks_version, tasks_changed_at = previous.tasks, previous.tasks_version, previous.tasks_changed_at
+
+        self._snapshot = StatusSnapshot(
+            taken_at=taken_at,
+            epoch=self.epoch,
+            status=status,
+            status_version=status_version,
+            status_changed_at=status_changed_at,
+            tasks=tasks,
+            tasks_version=tasks_version,
+            tasks_changed_at=tasks_changed_at,
+            run_metrics=run_metrics
+        )
+
+        # Pushed only for real task, schedule or run-state changes; run_metrics
+        # churn on every sample and is polled by clients instead
+        if previous is None or previous.tasks_version != tasks_version:
+            event_bus.publish('tasks_snapshot', {'version': tasks_version})
+
+    def _build_tasks(self, running_by_task: Dict) -> List[Dict]:
+        tasks = []
+        for job in self.scheduler.scheduler.get_jobs():
+            task_id = job.args[0] if job.args else None
+            row = self._task_rows.get(task_id, {})
+            runs = running_by_task.get(task_id, [])
+            last_run = self._last_runs.get(task_id)
+            tasks.append({
+                'id': job.id,
+                'task_id': task_id,
+                'name': job.name,
+                'next_run': job.next_run_time.isoformat() if job.next_run_time else None,
+                'schedule': str(job.trigger),
+                'active': job.next_run_time is not None,
+                'is_running': bool(runs),
+                'run_id': runs[0] if runs else None,
+                'dependencies': self._dependencies.get(task_id, []),
+                'script_path': row.get('script_path', 'N/A'),
+                'python_path': None,
+                'working_directory': None,
+                'arguments': None,
+                'description': row.get('description'),
+                'last_run': {
+                    'run_id': last_run['run_id'],
+                    'status': last_run['status'],
+                    'started_at': last_run['started_at'].isoformat() if last_run['started_at'] else None,
+                    'duration_seconds': float(last_run['duration_seconds'])
+                        if last_run['duration_seconds'] is not None else None
+                } if last_run else None,
+            })
+        return tasks
+
+    def _build_status(self, running_tasks: int) -> Dict:
+        apscheduler = self.scheduler.scheduler
+        return {
+            'status': 'online',
+            'scheduler': {
+                'status': "Running" if apscheduler.running else "Stopped",
+                'uptime': format_uptime(self.scheduler.started_at),
+                'running_tasks': running_tasks,
+                'scheduled_jobs': len(apscheduler.get_jobs())
+            },
+            'system': {
+                # Non-blocking: system CPU since the previous sample. CPU moves a few
+                # percent between samples even when idle, so it is reported in 5%
+                # steps; whole percents keep memory and disk from bumping the version.
+                'cpu_percent': 5 * round(psutil.cpu_percent(interval=None) / 5),
+                'memory_percent': round(psutil.virtual_memory().percent),
+                'disk_percent': round(psutil.disk_usage('/').percent)
+            }
+        }
@@ -5,12 +5,22 @@ Provides easy task creation, modification, and monitoring.
 """
 
 import argparse
+import os
 import sys
 import json
-from datetime import datetime
+import time
+import urllib.request
+from datetime import datetime, timedelta
 from tabulate import tabulate
 
 from db_models import DatabaseManager, TaskManager, RunManager, AlertManager
+from production_config import TRACE_CONFIG, PROFILING_CONFIG, DASHBOARD_CONFIG, ANALYTICS_CONFIG
+from production_config import LOG_SEARCH_CONFIG, BACKFILL_CONFIG
+from run_tracing import summarize_trace_file
+from profile_reports import PROFILE_MODES, top_functions
+from log_reader import tail_lines, follow, decode_log
+from task_operations import validate_operations, check_task_type, check_backfill
+from log_index import LogIndex
 
 class TaskManagementCLI:
     def __init__(self):
@@ -55,12 +65,22 @@ class TaskManagementCLI:
         print(f"\n=== Task Details ===")
         print(f"ID: {task['task_id']}")
         print(f"Name: {task['task_name']}")
-        print(f"Script: {task['script_path']}")
+        if task.get('task_type') == 'callable':
+            print(f"Callable: {task['script_path']}")
+            print(f"Arguments: {json.dumps(task['callable_args']) if task.get('callable_args') is not None else 'none'}")
+        else:
+            print(f"Script: {task['script_path']}")
+        if task.get('task_type') == 'fanout':
+            print(f"Fan-out: {json.dumps(task['fanout_config'])}")
         print(f"Description: {task['description'] or 'N/A'}")
         print(f"Active: {'Yes' if task['is_active'] else 'No'}")
         print(f"Max Retries: {task['max_retries']}")
         print(f"Retry Delay: {task['retry_delay_seconds']}s")
         print(f"Timeout: {task['timeout_seconds']}s")
+        if task.get('adaptive_timeout'):
+            print(f"Adaptive Timeout: {task['adaptive_timeout_factor'] or 'default'} x p99")
+        if task.get('profile_mode'):
+            print(f"Profiling: {task['profile_mode']}")
         print(f"Created: {task['created_at']}")
         print(f"Updated: {task['updated_at']}")
         
@@ -77,6 +97,15 @@ class TaskManagementCLI:
                 print(f"  Config: {json.dumps(sched['schedule_config'], indent=2)}")
                 print(f"  Active: {'Yes' if sched['is_active'] else 'No'}")
         
+        # Show learned duration stats
+        stats = self.run_mgr.duration_stats.get_stats(task_id)
+        if stats:
+            summary = stats.summary()
+            print(f"\n=== Duration Stats ===")
+            print(f"Runs: {summary['run_count']}")
+            print(f"EWMA: {summary['ewma_seconds']}s (stddev {summary['ewm_stddev_seconds']}s)")
+            print(f"p50 / p95 / p99: {summary['p50_seconds']}s / {summary['p95_seconds']}s / {summary['p99_seconds']}s")
+        
         # Show dependencies
         deps = self.task_mgr.get_dependencies(task_id)
         if deps:
@@ -103,15 +132,28 @@ class TaskManagementCLI:
             
             print(tabulate(rows, headers=headers, tablefmt='simple'))
     
-    def create_task(self, name, script, description=None, max_retries=3, timeout=3600):
-        """Create a new task."""
+    def create_task(self, name, script, description=None, max_retries=3, timeout=3600,
+                    is_callable=False, callable_args=None, fanout=None):
+        """Create a new task; a callable task's script is 'package.module:function'."""
         try:
+            task_type, parsed_args, fanout_config = 'script', None, None
+            if is_callable:
+                task_type = 'callable'
+                parsed_args = json.loads(callable_args) if callable_args else None
+                check_task_type({'task_type': task_type, 'script_path': script, 'callable_args': parsed_args})
+            elif fanout:
+                task_type = 'fanout'
+                fanout_config = json.loads(fanout)
+                check_task_type({'task_type': task_type, 'fanout_config': dict(fanout_config)})
             task_id = self.task_mgr.create_task(
                 task_name=name,
                 script_path=script,
                 description=description,
                 max_retries=max_retries,
-                timeout_seconds=timeout
+                timeout_seconds=timeout,
+                task_type=task_type,
+                callable_args=parsed_args,
+                fanout_config=fanout_config
             )
             print(f"✓ Task created successfully with ID: {task_id}")
             return task_id
@@ -168,6 +210,91 @@ class TaskManagementCLI:
         else:
             print(f"✗ Failed to update task status")
     
+    def set_adaptive_timeout(self, task_id, factor=None, disable=False):
+        """Opt a task in or out of the adaptive k x p99 timeout."""
+        if disable:
+            success = self.task_mgr.update_task(task_id, adaptive_timeout=False)
+        else:
+            success = self.task_mgr.update_task(task_id, adaptive_timeout=True,
+                                                adaptive_timeout_factor=factor)
+        
+        if success:
+            print(f"✓ Adaptive timeout {'disabled' if disable else 'enabled'} for task {task_id}")
+        else:
+            print(f"✗ Failed to update task {task_id}")
+    
+    def set_profile_mode(self, task_id, mode):
+        """Enable profiling for every run of a task, or turn it off."""
+        success = self.task_mgr.update_task(task_id, profile_mode=None if mode == 'off' else mode)
+        if success:
+            print(f"✓ Profiling set to '{mode}' for task {task_id}")
+        else:
+            print(f"✗ Failed to update task {task_id}")
+    
+    def show_profile(self, run_id, limit=None, sort='cumulative'):
+        """Show the top functions from a profiled run."""
+        run = self.run_mgr.get_run(run_id)
+        if not run or not run.get('profile_path'):
+            print(f"No profile recorded for run {run_id}.")
+            return
+        
+        try:
+            functions = top_functions(run['profile_path'],
+                                      limit=limit or PROFILING_CONFIG['top_functions'], sort=sort)
+        except Exception as e:
+            print(f"✗ Failed to read profile: {e}")
+            return
+        
+        print(f"\n=== Profile: {run['task_name']} (Run {run_id}) ===")
+        print(f"Artifact: {run['profile_path']}\n")
+        
+        headers = ['Function', 'Location', 'Calls', 'Self', 'Cumulative']
+        rows = []
+        
+        for func in functions:
+            location = f"{func['file']}:{func['line']}" if func['line'] else func['file']
+            rows.append([
+                func['function'][:40],
+                location[-60:],
+                func['ncalls'] if func['ncalls'] is not None else '-',
+                func['tottime'],
+                func['cumtime']
+            ])
+        
+        print(tabulate(rows, headers=headers, tablefmt='simple'))
+    
+    def show_log(self, run_id, lines=50, follow_log=False):
+        """Show the end of a run's log, optionally following it while the run is active."""
+        run = self.run_mgr.get_run(run_id)
+        if not run or not run.get('log_file_path'):
+            print(f"No log recorded for run {run_id}.")
+            return
+        
+        try:
+            tail, _, size = tail_lines(run['log_file_path'], lines)
+        except OSError as e:
+            print(f"✗ Failed to read log: {e}")
+            return
+        
+        print(f"=== {run['task_name']} (Run {run_id}, {run['status']}) ===")
+        for line in tail:
+            print(line)
+        
+        if not follow_log:
+            return
+        
+        def is_running():
+            current = self.run_mgr.get_run(run_id)
+            return bool(current) and current['status'] == 'running'
+        
+        try:
+            for _, data in follow(run['log_file_path'], size, is_running):
+                if data:
+                    print(decode_log(data), end='', flush=True)
+        except KeyboardInterrupt:
+            return
+        print(f"\n=== Run {run_id} finished: {self.run_mgr.get_run(run_id)['status']} ===")
+    
     def show_runs(self, task_id=None, limit=20):
         """Show recent task runs."""
         runs = self.run_mgr.get_recent_runs(task_id=task_id, limit=limit)
@@ -192,6 +319,34 @@ class TaskManagementCLI:
         
         print(tabulate(rows, headers=headers, tablefmt='grid'))
     
+    def show_next_runs(self, task_id=None, limit=20):
+        """Show the soonest upcoming scheduled runs."""
+        runs = self.task_mgr.get_next_runs(limit=limit, task_id=task_id)
+        
+        if not runs:
+            print("No upcoming runs recorded (is the scheduler running?).")
+            return
+        
+        headers = ['Next Run', 'In', 'Task', 'Schedule']
+        rows = []
+        now = datetime.now()
+        
+        for run in runs:
+            seconds = int((run['next_run_time'] - now).total_seconds())
+            config = run['schedule_config'] or {}
+            if run['schedule_type'] == 'cron':
+                schedule = ' '.join(str(config.get(f, '*')) for f in ('minute', 'hour', 'day', 'month', 'day_of_week'))
+            else:
+                schedule = ', '.join(f"{k}={v}" for k, v in config.items())
+            rows.append([
+                run['next_run_time'].strftime('%Y-%m-%d %H:%M:%S'),
+                f"{seconds // 3600}h {seconds % 3600 // 60}m" if seconds > 0 else 'due',
+                run['task_name'][:30],
+                f"{run['schedule_type']}: {schedule}"
+            ])
+        
+        print(tabulate(rows, headers=headers, tablefmt='grid'))
+    
     def show_alerts(self, unack_only=True):
         """Show alerts."""
         if unack_only:
@@ -228,6 +383,265 @@ class TaskManagementCLI:
         else:
             print(f"✗ Failed to acknowledge alert {alert_id}")
 
+    def show_traces(self, task_id=None, hours=24):
+        """Show per-phase run lifecycle durations from the trace file."""
+        since = time.time() - hours * 3600 if hours else None
+        summary = summarize_trace_file(TRACE_CONFIG['trace_file'], task_id=task_id, since=since)
+        
+        if not summary:
+            print("No trace data found.")
+            return
+        
+        headers = ['Task', 'Phase', 'Count', 'Avg (ms)', 'Max (ms)', 'Last (ms)']
+        rows = []
+        
+        for span_task_id, phases in summary.items():
+            for phase, stats in phases.items():
+                rows.append([
+                    span_task_id if span_task_id is not None else '-',
+                    phase,
+                    stats['count'],
+                    f"{stats['avg_ms']:.1f}",
+                    f"{stats['max_ms']:.1f}",
+                    f"{stats['last_ms']:.1f}"
+                ])
+        
+        print(tabulate(rows, headers=headers, tablefmt='grid'))
+
+    def show_threads(self, host='localhost', only_busy=False):
+        """Fetch a live thread dump from the running scheduler's dashboard."""
+        url = f"http://{host}:{DASHBOARD_CONFIG['port']}/api/debug/threads"
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                threads = json.loads(response.read().decode('utf-8'))['threads']
+        except Exception as e:
+            print(f"✗ Could not reach scheduler at {url}: {e}")
+            return
+        
+        for thread in threads:
+            if only_busy and (thread['idle'] or thread['role'] not in ('apscheduler_worker', 'manual_run_worker')):
+                continue
+            header = f"Thread \"{thread['name']}\" role={thread['role']}"
+            if thread['idle']:
+                header += " idle"
+            if thread.get('unchanged_for_seconds') is not None:
+                header += f" unchanged={thread['unchanged_for_seconds']}s"
+            print(header)
+            for frame in thread['stack']:
+                print(f"  File \"{frame['file']}\", line {frame['line']}, in {frame['function']}")
+                if frame.get('code'):
+                    print(f"    {frame['code']}")
+            print()
+
+    def show_stats(self, task_name=None, window=None, rebuild=False):
+        """Show per-task success rate, retries, timeouts and duration percentiles."""
+        if rebuild:
+            print("Rebuilding run rollups...")
+            folded = self.run_mgr.rollups.rebuild()
+            print(f"✓ Rolled up {folded} runs")
+        
+        task_id = None
+        if task_name:
+            task = self.task_mgr.get_task(task_name=task_name)
+            if not task:
+                print(f"✗ Task '{task_name}' not found")
+                return
+            task_id = task['task_id']
+        
+        windows = ANALYTICS_CONFIG['windows']
+        for name in ([window] if window else windows):
+            stats = self.run_mgr.rollups.get_task_analytics(windows[name], task_id=task_id)
+            print(f"\n=== Last {name} ===")
+            if not stats:
+                print("No finished runs.")
+                continue
+            
+            headers = ['Task', 'Runs', 'Success %', 'Failed', 'Timeouts', 'Retries', 'Skipped',
+                       'p50 (s)', 'p95 (s)', 'p99 (s)']
+            rows = []
+            for s in stats:
+                rows.append([
+                    s['task_name'],
+                    s['total_runs'],
+                    f"{s['success_rate'] * 100:.1f}" if s['success_rate'] is not None else '-',
+                    s['failed_count'],
+                    s['timeout_count'],
+                    s['retry_count'],
+                    s['skipped_count'],
+                    f"{s['p50_seconds']:.1f}" if s['p50_seconds'] is not None else '-',
+                    f"{s['p95_seconds']:.1f}" if s['p95_seconds'] is not None else '-',
+                    f"{s['p99_seconds']:.1f}" if s['p99_seconds'] is not None else '-'
+                ])
+            print(tabulate(rows, headers=headers, tablefmt='grid'))
+    
+    def apply_operations(self, path, dry_run=False):
+        """Apply a JSON batch of task operations in one transaction."""
+        try:
+            if path == '-':
+                data = json.load(sys.stdin)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"✗ Could not read operations: {e}")
+            return False
+        
+        # Accept either a bare list or the API body {"operations": [...]}
+        operations = data.get('operations') if isinstance(data, dict) else data
+        operations, errors = validate_operations(
+            operations, self.task_mgr.get_all_tasks(), self.task_mgr.UPDATABLE_FIELDS,
+            self.task_mgr.get_task_ids_with_runs()
+        )
+        if errors:
+            print(f"✗ {len(errors)} operation(s) failed validation; nothing was applied")
+            for error in errors:
+                print(f"  [{error['index']}] {error['message']}")
+            return False
+        if dry_run:
+            print(f"✓ {len(operations)} operation(s) valid (dry run)")
+            return True
+        
+        try:
+            results = self.task_mgr.apply_operations(operations)
+        except Exception as e:
+            print(f"✗ Failed to apply operations, nothing was changed: {e}")
+            return False
+        
+        rows = [[r['index'], r['op'], r['task_name'], r['task_id'], r['result']] for r in results]
+        print(tabulate(rows, headers=['#', 'Op', 'Task', 'ID', 'Result'], tablefmt='simple'))
+        print(f"✓ Applied {len(results)} operation(s); the scheduler reloads on its next config poll")
+        return True
+    
+    def search_logs(self, query, task_name=None, hours=None, since=None, until=None,
+                    kind=None, limit=50):
+        """Search run and scheduler logs through the scheduler's log index."""
+        if not os.path.exists(LOG_SEARCH_CONFIG['index_path']):
+            print(f"✗ No log index at {LOG_SEARCH_CONFIG['index_path']} (run this on the scheduler host)")
+            return
+        try:
+            start = datetime.fromisoformat(since) if since else None
+            end = datetime.fromisoformat(until) if until else None
+        except ValueError as e:
+            print(f"✗ Invalid time: {e}")
+            return
+        if hours and not start:
+            start = datetime.now() - timedelta(hours=hours)
+        
+        task_id = None
+        if task_name:
+            task = self.task_mgr.get_task(task_name=task_name)
+            if not task:
+                print(f"✗ Task '{task_name}' not found")
+                return
+            task_id = task['task_id']
+        
+        index = LogIndex(LOG_SEARCH_CONFIG['index_path'], max_line_bytes=LOG_SEARCH_CONFIG['max_line_bytes'])
+        started = time.time()
+        try:
+            matches, truncated = index.search(query, start=start, end=end, task_id=task_id,
+                                              kind=kind, limit=limit)
+        except ValueError as e:
+            print(f"✗ {e}")
+            return
+        elapsed = (time.time() - started) * 1000
+        
+        if not matches:
+            print(f"No matches ({elapsed:.0f} ms).")
+            return
+        
+        rows = []
+        for match in matches:
+            if match['kind'] == 'run':
+                source = f"run {match['run_id']} {match['task_name'][:25]}"
+            else:
+                source = os.path.basename(match['path'])
+            line = match['line'] if match['line'] is not None else '(log no longer available)'
+            rows.append([(match['time'] or '')[:19].replace('T', ' '), source, line[:120]])
+        print(tabulate(rows, headers=['Time', 'Source', 'Line'], tablefmt='simple'))
+        more = ', more available (narrow the search or raise --limit)' if truncated else ''
+        print(f"{len(matches)} match(es) in {elapsed:.0f} ms{more}")
+    
+    def start_backfill(self, task_name, start_date, end_date, parallel=1, argv=False, force=False):
+        """Queue a backfill; the scheduler starts it on its next poll."""
+        task = self.task_mgr.get_task(task_name=task_name)
+        if not task:
+            print(f"✗ Task '{task_name}' not found")
+            return
+        pass_as = 'argv' if argv else 'env'
+        try:
+            start, end = check_backfill(task, start_date, end_date, parallel, pass_as, BACKFILL_CONFIG['max_dates'])
+        except ValueError as e:
+            print(f"✗ {e}")
+            return
+        
+        backfill_id = self.run_mgr.backfills.create_job(
+            task['task_id'], start, end, max_parallel=parallel, pass_as=pass_as,
+            skip_succeeded=not force, requested_by=os.environ.get('USERNAME', 'cli_user')
+        )
+        job = self.run_mgr.backfills.get_jobs(limit=1, backfill_id=backfill_id)[0]
+        passed = 'as the first argument' if argv else f"in {BACKFILL_CONFIG['env_var']}"
+        print(f"✓ Backfill {backfill_id} queued: {task_name} for {job['total']} dates "
+              f"({job['skipped']} already succeeded), {parallel} at a time, date passed {passed}")
+    
+    def list_backfills(self, limit=20):
+        """Show recent backfills and their progress."""
+        jobs = self.run_mgr.backfills.get_jobs(limit=limit)
+        if not jobs:
+            print("No backfills found.")
+            return
+        
+        rows = []
+        for job in jobs:
+            rows.append([
+                job['backfill_id'],
+                job['task_name'][:30],
+                f"{job['start_date']} .. {job['end_date']}",
+                job['status'],
+                f"{job['succeeded'] + job['skipped'] + job['failed']}/{job['total']}",
+                job['running'],
+                job['failed'],
+                job['created_at'].strftime('%Y-%m-%d %H:%M')
+            ])
+        print(tabulate(rows, headers=['ID', 'Task', 'Dates', 'Status', 'Done', 'Running', 'Failed', 'Created'],
+                       tablefmt='grid'))
+    
+    def show_backfill(self, backfill_id):
+        """Show a backfill and the outcome of each of its dates."""
+        jobs = self.run_mgr.backfills.get_jobs(limit=1, backfill_id=backfill_id)
+        if not jobs:
+            print(f"✗ Backfill {backfill_id} not found")
+            return
+        job = jobs[0]
+        print(f"Backfill {backfill_id}: {job['task_name']} {job['start_date']} .. {job['end_date']} "
+              f"({job['status']}, {job['max_parallel']} at a time)")
+        if job['claimed_by']:
+            print(f"Running on: {job['claimed_by']}")
+        print(f"Succeeded: {job['succeeded']}  Skipped: {job['skipped']}  Failed: {job['failed']}  "
+              f"Running: {job['running']}  Pending: {job['pending']}\n")
+        
+        rows = []
+        for item in self.run_mgr.backfills.get_items(backfill_id):
+            if item['status'] in ('pending', 'skipped') and not item['run_id']:
+                continue
+            rows.append([
+                item['logical_date'],
+                item['status'],
+                item['attempts'],
+                item['run_id'] or '',
+                f"{item['duration_seconds']:.1f}s" if item['duration_seconds'] else '',
+                (item['error_message'] or '')[:60]
+            ])
+        if rows:
+            print(tabulate(rows, headers=['Date', 'Status', 'Attempts', 'Run ID', 'Duration', 'Error'],
+                           tablefmt='simple'))
+    
+    def cancel_backfill(self, backfill_id):
+        """Stop starting new dates of a backfill."""
+        if self.run_mgr.backfills.cancel_job(backfill_id):
+            print(f"✓ Backfill {backfill_id} cancelled; dates already running will finish")
+        else:
+            print(f"✗ Backfill {backfill_id} not found or not active")
+
 def main():
     parser = argparse.ArgumentParser(description='Scheduler Task Management CLI')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
@@ -243,7 +657,11 @@ def main():
     # Create command
     create_parser = subparsers.add_parser('create', help='Create a new task')
     create_parser.add_argument('name', help='Task name')
-    create_parser.add_argument('script', help='Script path')
+    create_parser.add_argument('script', help="Script path, or 'package.module:function' with --callable")
+    create_parser.add_argument('--callable', action='store_true', help='Run a function on the process pool')
+    create_parser.add_argument('--args', help='Callable arguments as a JSON list or object')
+    create_parser.add_argument('--fanout', metavar='CONFIG',
+                               help='Fan-out config as JSON, e.g. {"partitions": ["east", "west"], "max_parallel": 2}')
     create_parser.add_argument('--description', help='Task description')
     create_parser.add_argument('--max-retries', type=int, default=3, help='Max retry attempts')
     create_parser.add_argument('--timeout', type=int, default=3600, help='Timeout in seconds')
@@ -265,11 +683,39 @@ def main():
     toggle_parser = subparsers.add_parser('toggle', help='Enable/disable task')
     toggle_parser.add_argument('task_id', type=int, help='Task ID')
     
+    # Adaptive timeout command
+    adaptive_parser = subparsers.add_parser('adaptive', help='Enable/disable adaptive timeout (k x p99)')
+    adaptive_parser.add_argument('task_id', type=int, help='Task ID')
+    adaptive_parser.add_argument('--factor', type=float, help='Multiplier k applied to p99')
+    adaptive_parser.add_argument('--off', action='store_true', help='Disable adaptive timeout')
+    
+    # Profiling mode command
+    profiling_parser = subparsers.add_parser('profiling', help='Set profiling mode for a task')
+    profiling_parser.add_argument('task_id', type=int, help='Task ID')
+    profiling_parser.add_argument('mode', choices=list(PROFILE_MODES) + ['off'], help='Profiling mode')
+    
+    # Profile report command
+    log_parser = subparsers.add_parser('log', help="Show the end of a run's log")
+    log_parser.add_argument('run_id', type=int, help='Run ID')
+    log_parser.add_argument('-n', '--lines', type=int, default=50, help='Number of lines')
+    log_parser.add_argument('-f', '--follow', action='store_true', help='Keep printing output while the run is active')
+    
+    profile_parser = subparsers.add_parser('profile', help='Show top functions of a profiled run')
+    profile_parser.add_argument('run_id', type=int, help='Run ID')
+    profile_parser.add_argument('--limit', type=int, help='Number of functions to show')
+    profile_parser.add_argument('--sort', choices=['cumulative', 'self', 'calls'],
+                                default='cumulative', help='Sort order')
+    
     # Runs command
     runs_parser = subparsers.add_parser('runs', help='Show recent runs')
     runs_parser.add_argument('--task', type=int, help='Filter by task ID')
     runs_parser.add_argument('--limit', type=int, default=20, help='Number of runs to show')
     
+    # Next runs command
+    next_parser = subparsers.add_parser('next', help='Show upcoming scheduled runs')
+    next_parser.add_argument('--task', type=int, help='Filter by task ID')
+    next_parser.add_argument('-n', '--limit', type=int, default=20, help='Number of runs to show')
+    
     # Alerts command
     alerts_parser = subparsers.add_parser('alerts', help='Show alerts')
     alerts_parser.add_argument('--all', action='store_true', help='Show all alerts')
@@ -278,6 +724,56 @@ def main():
     ack_parser = subparsers.add_parser('ack', help='Acknowledge alert')
     ack_parser.add_argument('alert_id', type=int, help='Alert ID')
     
+    # Threads command
+    threads_parser = subparsers.add_parser('threads', help='Dump stacks of the running scheduler threads')
+    threads_parser.add_argument('--host', default='localhost', help='Scheduler host')
+    threads_parser.add_argument('--busy', action='store_true', help='Only show busy worker threads')
+    
+    # Traces command
+    traces_parser = subparsers.add_parser('traces', help='Show run lifecycle phase timings')
+    traces_parser.add_argument('--task', type=int, help='Filter by task ID')
+    traces_parser.add_argument('--hours', type=int, default=24, help='Look back this many hours (0 = all)')
+    
+    # Stats command
+    stats_parser = subparsers.add_parser('stats', help='Show per-task run analytics')
+    stats_parser.add_argument('--task', help='Task name')
+    stats_parser.add_argument('--window', choices=list(ANALYTICS_CONFIG['windows']), help='Only this window')
+    stats_parser.add_argument('--rebuild', action='store_true', help='Recompute rollups from run history first')
+    
+    # Apply command
+    apply_parser = subparsers.add_parser('apply', help='Apply a JSON batch of task operations atomically')
+    apply_parser.add_argument('file', help="JSON file of operations ('-' for stdin)")
+    apply_parser.add_argument('--dry-run', action='store_true', help='Validate only')
+    
+    # Logs command
+    logs_parser = subparsers.add_parser('logs', help='Search run and scheduler logs')
+    logs_subparsers = logs_parser.add_subparsers(dest='logs_command', help='Log commands')
+    search_parser = logs_subparsers.add_parser('search', help='Find log lines containing all the given words')
+    search_parser.add_argument('query', help='Words to find (each matches as a word prefix)')
+    search_parser.add_argument('--task', help='Task name')
+    search_parser.add_argument('--hours', type=float, help='Only the last N hours')
+    search_parser.add_argument('--since', help='From this time (ISO)')
+    search_parser.add_argument('--until', help='Up to this time (ISO)')
+    search_parser.add_argument('--kind', choices=['run', 'scheduler'], help='Only run logs or the scheduler log')
+    search_parser.add_argument('-n', '--limit', type=int, default=50, help='Number of matches to show')
+    
+    # Backfill command
+    backfill_parser = subparsers.add_parser('backfill', help='Run a task once per date in a range')
+    backfill_subparsers = backfill_parser.add_subparsers(dest='backfill_command', help='Backfill commands')
+    bf_start_parser = backfill_subparsers.add_parser('start', help='Queue a backfill')
+    bf_start_parser.add_argument('task', help='Task name')
+    bf_start_parser.add_argument('start_date', help='First date (YYYY-MM-DD)')
+    bf_start_parser.add_argument('end_date', help='Last date, inclusive (YYYY-MM-DD)')
+    bf_start_parser.add_argument('--parallel', type=int, default=1, help='Dates run at a time')
+    bf_start_parser.add_argument('--argv', action='store_true', help='Pass the date as the first argument')
+    bf_start_parser.add_argument('--force', action='store_true', help='Also rerun dates that already succeeded')
+    bf_list_parser = backfill_subparsers.add_parser('list', help='Show recent backfills')
+    bf_list_parser.add_argument('--limit', type=int, default=20, help='Number of backfills to show')
+    bf_show_parser = backfill_subparsers.add_parser('show', help='Show the dates of a backfill')
+    bf_show_parser.add_argument('backfill_id', type=int, help='Backfill ID')
+    bf_cancel_parser = backfill_subparsers.add_parser('cancel', help='Stop starting new dates of a backfill')
+    bf_cancel_parser.add_argument('backfill_id', type=int, help='Backfill ID')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -292,19 +788,55 @@ def main():
         cli.show_task(args.task_id)
     elif args.command == 'create':
         cli.create_task(args.name, args.script, args.description, 
-                       args.max_retries, args.timeout)
+                       args.max_retries, args.timeout, args.callable, args.args, args.fanout)
     elif args.command == 'schedule':
         cli.add_schedule(args.task_id, args.type, args.config)
     elif args.command == 'depend':
         cli.add_dependency(args.task_id, args.depends_on, args.type)
     elif args.command == 'toggle':
         cli.toggle_task(args.task_id)
+    elif args.command == 'adaptive':
+        cli.set_adaptive_timeout(args.task_id, args.factor, args.off)
+    elif args.command == 'profiling':
+        cli.set_profile_mode(args.task_id, args.mode)
+    elif args.command == 'log':
+        cli.show_log(args.run_id, args.lines, args.follow)
+    elif args.command == 'profile':
+        cli.show_profile(args.run_id, args.limit, args.sort)
     elif args.command == 'runs':
         cli.show_runs(args.task, args.limit)
+    elif args.command == 'next':
+        cli.show_next_runs(args.task, args.limit)
     elif args.command == 'alerts':
         cli.show_alerts(not args.all)
     elif args.command == 'ack':
         cli.acknowledge_alert(args.alert_id)
+    elif args.command == 'threads':
+        cli.show_threads(args.host, args.busy)
+    elif args.command == 'traces':
+        cli.show_traces(args.task, args.hours)
+    elif args.command == 'stats':
+        cli.show_stats(args.task, args.window, args.rebuild)
+    elif args.command == 'apply':
+        if not cli.apply_operations(args.file, args.dry_run):
+            sys.exit(1)
+    elif args.command == 'logs':
+        if args.logs_command == 'search':
+            cli.search_logs(args.query, args.task, args.hours, args.since, args.until,
+                            args.kind, args.limit)
+        else:
+            logs_parser.print_help()
+    elif args.command == 'backfill':
+        if args.backfill_command == 'start':
+            cli.start_backfill(args.task, args.start_date, args.end_date, args.parallel, args.argv, args.force)
+        elif args.backfill_command == 'list':
+            cli.list_backfills(args.limit)
+        elif args.backfill_command == 'show':
+            cli.show_backfill(args.backfill_id)
+        elif args.backfill_command == 'cancel':
+            cli.cancel_backfill(args.backfill_id)
+        else:
+            backfill_parser.print_help()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,257 @@
+# SchedulerService/task_operations.py
+"""
+Validation for batches of task operations (create/update/enable/disable/delete).
+Every operation is checked against the current tasks and the earlier
+operations of the same batch before anything is written, so a batch is
+either applied as a whole or rejected with per-operation errors.
+"""
+
+import re
+import json
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+OPERATIONS = ('create', 'update', 'enable', 'disable', 'delete')
+SCHEDULE_TYPES = {'cron': CronTrigger, 'interval': IntervalTrigger, 'date': DateTrigger}
+
+INTEGER_FIELDS = ('max_retries', 'retry_delay_seconds', 'timeout_seconds', 'max_output_mb')
+CREATE_FIELDS = ('task_name', 'script_path', 'description', 'task_type', 'callable_args',
+                 'fanout_config') + INTEGER_FIELDS
+TASK_TYPES = ('script', 'callable', 'fanout')
+TYPE_FIELDS = ('task_type', 'script_path', 'fanout_config')     # must agree with each other
+FANOUT_KEYS = ('partitions', 'generator', 'max_parallel', 'pass_as', 'env_var', 'gather',
+               'gather_on_failure', 'partition_timeout_seconds')
+
+_CRON_RE = re.compile(r'^([\d\*\/\-,]+ ){4}[\d\*\/\-,]+$')
+_CALLABLE_RE = re.compile(r'^[A-Za-z_][\w.]*:[A-Za-z_]\w*$')
+
+
+def check_fanout_config(config):
+    """Validate a fan-out task's partitions, parallelism and gather step."""
+    if not isinstance(config, dict):
+        raise ValueError("'fanout_config' must be an object")
+    unknown = set(config) - set(FANOUT_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown fanout_config key(s): {', '.join(sorted(unknown))}")
+    if bool(config.get('partitions')) == bool(config.get('generator')):
+        raise ValueError("fanout_config needs either 'partitions' (a list) or 'generator' (a script path)")
+    if 'partitions' in config and not isinstance(config['partitions'], list):
+        raise ValueError("'partitions' must be a list")
+    for key in ('max_parallel', 'partition_timeout_seconds'):
+        if key in config and (not isinstance(config[key], int) or config[key] < 1):
+            raise ValueError(f"'{key}' must be a positive integer")
+    if config.get('pass_as', 'env') not in ('env', 'argv'):
+        raise ValueError("'pass_as' must be 'env' or 'argv'")
+
+
+def check_task_type(fields: Dict, current: Dict = None):
+    """Validate task_type and its settings, encoding JSON settings for their JSONB columns.
+
+    For an update, current is the stored task: the type is checked against
+    the task as it will be once fields are applied.
+    """
+    task_type = fields.get('task_type')
+    if task_type is not None and task_type not in TASK_TYPES:
+        raise ValueError(f"'task_type' must be one of {', '.join(TASK_TYPES)}")
+    if any(field in fields for field in TYPE_FIELDS):
+        task = dict(current or {}, **fields)
+        task_type = task.get('task_type') or 'script'
+        if task_type == 'callable' and not _CALLABLE_RE.match(task.get('script_path') or ''):
+            raise ValueError("A callable task's script_path must be 'package.module:function'")
+        if task_type == 'fanout' and not task.get('fanout_config'):
+            raise ValueError("A fanout task needs a 'fanout_config'")
+    if 'callable_args' in fields:
+        args = fields['callable_args']
+        if args is not None and not isinstance(args, (list, dict)):
+            raise ValueError("'callable_args' must be a list or an object")
+        fields['callable_args'] = json.dumps(args) if args is not None else None
+    if fields.get('fanout_config') is not None:
+        check_fanout_config(fields['fanout_config'])
+        fields['fanout_config'] = json.dumps(fields['fanout_config'])
+
+
+def check_backfill(task: Dict, start_date, end_date, max_parallel, pass_as: str,
+                   max_dates: int) -> Tuple[date, date]:
+    """Validate a backfill request for task; returns its start and end dates."""
+    if task.get('task_type', 'script') != 'script':
+        raise ValueError(f"Backfill runs script tasks only; {task['task_name']} is a {task['task_type']} task")
+    try:
+        start = datetime.strptime(str(start_date), '%Y-%m-%d').date()
+        end = datetime.strptime(str(end_date), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError("Backfill dates must be YYYY-MM-DD")
+    if end < start:
+        raise ValueError("The backfill end date is before its start date")
+    if (end - start).days + 1 > max_dates:
+        raise ValueError(f"A backfill covers at most {max_dates} dates")
+    if not isinstance(max_parallel, int) or isinstance(max_parallel, bool) or max_parallel < 1:
+        raise ValueError("'max_parallel' must be a positive integer")
+    if pass_as not in ('env', 'argv'):
+        raise ValueError("'pass_as' must be 'env' or 'argv'")
+    return start, end
+
+
+def parse_schedule(schedule) -> Tuple[str, Dict]:
+    """Normalise a schedule to (schedule_type, schedule_config) and check it builds a trigger.
+
+    Accepts {'type': ..., 'config': {...}}, a 5-field cron string or an ISO
+    datetime for a one-off run.
+    """
+    if isinstance(schedule, dict):
+        schedule_type = schedule.get('type')
+        schedule_config = schedule.get('config') or {}
+    elif isinstance(schedule, str) and _CRON_RE.match(schedule.strip()):
+        minute, hour, day, month, day_of_week = schedule.split()
+        schedule_type = 'cron'
+        schedule_config = {'minute': minute, 'hour': hour, 'day': day,
+                           'month': month, 'day_of_week': day_of_week}
+    elif isinstance(schedule, str):
+        try:
+            datetime.fromisoformat(schedule.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"Invalid or unsupported schedule format: {schedule}")
+        schedule_type, schedule_config = 'date', {'run_date': schedule}
+    else:
+        raise ValueError("Schedule must be a cron string, an ISO datetime or {type, config}")
+
+    if schedule_type not in SCHEDULE_TYPES:
+        raise ValueError(f"Unknown schedule type: {schedule_type}")
+    try:
+        SCHEDULE_TYPES[schedule_type](**schedule_config)
+    except Exception as e:
+        raise ValueError(f"Invalid {schedule_type} schedule {schedule_config}: {e}")
+    return schedule_type, schedule_config
+
+
+def validate_operations(operations: List[Dict], existing_tasks: List[Dict],
+                        updatable_fields: List[str],
+                        task_ids_with_runs=()) -> Tuple[List[Dict], List[Dict]]:
+    """Check a batch against the current tasks.
+
+    Deleting a task with run history only archives it, so its name stays
+    taken; task_ids_with_runs says which tasks those are. Returns
+    (normalised operations, errors). Each error is {'index': i, 'message': ...};
+    the batch must not be applied if any exist.
+    """
+    names_by_id = {t['task_id']: t['task_name'] for t in existing_tasks}
+    rows = {t['task_name']: t for t in existing_tasks}     # tasks as they will be after each operation
+    names = set(names_by_id.values())   # task names as they will be after each operation
+    task_ids_with_runs = set(task_ids_with_runs)
+    names_with_runs = {name for task_id, name in names_by_id.items() if task_id in task_ids_with_runs}
+    deleted = set()
+    released = set()                    # deleted names whose row is gone, free for reuse
+    normalised, errors = [], []
+
+    def archived_in_batch(name: str) -> bool:
+        """Deleted earlier in the batch but kept (archived) for its run history."""
+        return name in deleted and name not in released
+
+    def resolve(ref) -> Optional[str]:
+        """Current name of an existing or earlier-created task."""
+        if isinstance(ref, int) or (isinstance(ref, str) and ref.isdigit()):
+            ref = names_by_id.get(int(ref))
+        return ref if ref in names and ref not in deleted else None
+
+    if not isinstance(operations, list) or not operations:
+        return [], [{'index': None, 'message': 'operations must be a non-empty list'}]
+
+    for index, raw in enumerate(operations):
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("Operation must be an object")
+            op = raw.get('op')
+            if op not in OPERATIONS:
+                raise ValueError(f"Unknown op {op!r}; expected one of {', '.join(OPERATIONS)}")
+            ref = raw.get('task')
+            if ref in (None, ''):
+                raise ValueError("Missing 'task'")
+
+            entry = {'index': index, 'op': op, 'fields': {}, 'schedule': None, 'depends_on': None}
+            if op == 'create':
+                name = str(ref)
+                if archived_in_batch(name):
+                    raise ValueError(f"Task '{name}' has run history, so deleting it keeps its name")
+                if name in names and name not in deleted:
+                    raise ValueError(f"Task '{name}' already exists")
+                if not raw.get('script_path'):
+                    raise ValueError("create needs 'script_path'")
+                if 'schedule' not in raw:
+                    raise ValueError("create needs 'schedule'")
+                unknown = set(raw) - set(CREATE_FIELDS) - {'op', 'task', 'schedule', 'depends_on'}
+                if unknown:
+                    raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+                entry['task_name'] = name
+                entry['fields'] = {f: raw[f] for f in CREATE_FIELDS if f in raw and f != 'task_name'}
+                names.add(name)
+                deleted.discard(name)
+                released.discard(name)
+            else:
+                name = resolve(ref)
+                if name is None:
+                    raise ValueError(f"Task '{ref}' not found")
+                entry['task_name'] = name
+
+            if op == 'update':
+                unknown = set(raw) - set(updatable_fields) - {'op', 'task', 'schedule', 'depends_on'}
+                if unknown:
+                    raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+                entry['fields'] = {f: raw[f] for f in updatable_fields if f in raw}
+                new_name = entry['fields'].get('task_name')
+                if new_name and new_name != name:
+                    if archived_in_batch(new_name):
+                        raise ValueError(f"Cannot rename to '{new_name}': kept by a deleted task with run history")
+                    if new_name in names and new_name not in deleted:
+                        raise ValueError(f"Cannot rename to '{new_name}': name in use")
+                    names.discard(name)
+                    names.add(new_name)
+                    deleted.discard(new_name)
+                    released.discard(new_name)
+                    if name in names_with_runs:
+                        names_with_runs.discard(name)
+                        names_with_runs.add(new_name)
+                    for task_id, current in names_by_id.items():
+                        if current == name:
+                            names_by_id[task_id] = new_name
+                if not any(k in raw for k in list(entry['fields']) + ['schedule', 'depends_on']):
+                    raise ValueError("update has nothing to change")
+
+            for field in INTEGER_FIELDS:
+                if field in entry['fields'] and not isinstance(entry['fields'][field], int):
+                    raise ValueError(f"'{field}' must be an integer")
+            current = rows.get(name) if op == 'update' else None
+            check_task_type(entry['fields'], current)
+
+            if op in ('create', 'update') and 'schedule' in raw:
+                entry['schedule'] = parse_schedule(raw['schedule'])
+
+            if op in ('create', 'update') and 'depends_on' in raw:
+                depends_on = raw['depends_on']
+                if not isinstance(depends_on, list):
+                    raise ValueError("'depends_on' must be a list of task names")
+                entry['depends_on'] = []
+                for dep in depends_on:
+                    dep_name = resolve(dep)
+                    if dep_name is None:
+                        raise ValueError(f"Dependency '{dep}' not found")
+                    if dep_name == entry['task_name'] or dep_name == entry['fields'].get('task_name'):
+                        raise ValueError("A task cannot depend on itself")
+                    entry['depends_on'].append(dep_name)
+
+            if op == 'delete':
+                rows.pop(name, None)
+                deleted.add(name)
+                if name not in names_with_runs:
+                    released.add(name)
+            elif op in ('create', 'update'):
+                rows.pop(name, None)
+                rows[entry['fields'].get('task_name') or name] = dict(current or {}, **entry['fields'])
+
+            normalised.append(entry)
+        except ValueError as e:
+            errors.append({'index': index, 'message': str(e)})
+
+    return normalised, errors
@@ -0,0 +1,217 @@
+# SchedulerService/thread_diagnostics.py
+"""
+Live thread dumps and stuck-worker detection for the scheduler process.
+Stacks are read with sys._current_frames(), so no debugger or restart is needed.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import traceback
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Thread name prefixes and the role reported for them
+THREAD_ROLES = [
+    ('ThreadPoolExecutor', 'apscheduler_worker'),
+    ('ManualRun', 'manual_run_worker'),
+    ('WorkerRun', 'queued_run_worker'),
+    ('FanoutRun', 'fanout_partition_worker'),
+    ('BackfillRun', 'backfill_worker'),
+    ('WorkerHeartbeat', 'worker_heartbeat'),
+    ('APScheduler', 'apscheduler'),
+    ('HealthMonitor', 'health_monitor'),
+    ('StuckWorkerWatchdog', 'watchdog'),
+    ('StatusSampler', 'status_sampler'),
+    ('StatusChannel', 'status_channel'),
+    ('ConfigWatcher', 'config_watcher'),
+    ('ShardCoordinator', 'shard_coordinator'),
+    ('BackfillEngine', 'backfill_engine'),
+    ('RollupBackfill', 'rollup_backfill'),
+    ('ScheduleForecaster', 'schedule_forecaster'),
+    ('NextRunRecorder', 'next_run_recorder'),
+    ('LogShipper', 'log_shipper'),
+    ('LogWriter', 'log_writer'),
+    ('LogIndexer', 'log_indexer'),
+    ('OutputReader', 'output_reader'),
+    ('OutputWriter', 'output_writer'),
+    ('CallablePoolReaper', 'callable_pool_reaper'),
+    ('Dashboard', 'dashboard'),
+    ('MainThread', 'main'),
+]
+
+
+def thread_role(thread_name: str) -> str:
+    """Classify a thread by its name."""
+    for prefix, role in THREAD_ROLES:
+        if thread_name.startswith(prefix):
+            return role
+    if 'process_request_thread' in thread_name:
+        return 'flask_request'
+    return 'other'
+
+
+def _stack_frames(frame) -> List[Dict]:
+    return [
+        {
+            'file': entry.filename,
+            'line': entry.lineno,
+            'function': entry.name,
+            'code': entry.line,
+        }
+        for entry in traceback.extract_stack(frame)
+    ]
+
+
+def is_idle_worker(stack: List[Dict]) -> bool:
+    """True if a pool worker is parked waiting for work rather than running a job."""
+    for index, frame in enumerate(stack):
+        if frame['function'] == '_worker' and frame['file'].endswith(os.path.join('futures', 'thread.py')):
+            # SimpleQueue.get is implemented in C, so an idle worker's stack ends here
+            following = stack[index + 1:index + 2]
+            return not following or following[0]['function'] == 'get'
+    return False
+
+
+def dump_threads(stuck_since: Dict[int, float] = None) -> List[Dict]:
+    """Capture the current stack of every live thread in this process."""
+    frames = sys._current_frames()
+    now = time.time()
+    dump = []
+
+    for thread in threading.enumerate():
+        frame = frames.get(thread.ident)
+        stack = _stack_frames(frame) if frame is not None else []
+        entry = {
+            'name': thread.name,
+            'ident': thread.ident,
+            'native_id': getattr(thread, 'native_id', None),
+            'daemon': thread.daemon,
+            'role': thread_role(thread.name),
+            'idle': is_idle_worker(stack),
+            'stack': stack,
+        }
+        if stuck_since and thread.ident in stuck_since:
+            entry['unchanged_for_seconds'] = round(now - stuck_since[thread.ident], 1)
+        dump.append(entry)
+
+    dump.sort(key=lambda t: (t['role'], t['name']))
+    return dump
+
+
+def format_thread_dump(dump: List[Dict]) -> str:
+    """Render a thread dump as plain text, similar to faulthandler output."""
+    lines = [f"Thread dump at {time.strftime('%Y-%m-%d %H:%M:%S')} ({len(dump)} threads)", ""]
+    for thread in dump:
+        header = f'Thread "{thread["name"]}" ident={thread["ident"]} role={thread["role"]}'
+        if thread.get('daemon'):
+            header += ' daemon'
+        if thread.get('idle'):
+            header += ' idle'
+        if thread.get('unchanged_for_seconds') is not None:
+            header += f' unchanged={thread["unchanged_for_seconds"]}s'
+        lines.append(header)
+        for frame in thread['stack']:
+            lines.append(f'  File "{frame["file"]}", line {frame["line"]}, in {frame["function"]}')
+            if frame.get('code'):
+                lines.append(f'    {frame["code"]}')
+        lines.append("")
+    return "\n".join(lines)
+
+
+class StuckWorkerWatchdog:
+    """Samples worker stacks and alerts when one stays in the same frame too long."""
+
+    def __init__(self, alert_manager, interval_seconds: int = 15, threshold_seconds: int = 300,
+                 worker_roles: List[str] = None, expected_wait_functions: List[str] = None):
+        self.alert_manager = alert_manager
+        self.interval_seconds = interval_seconds
+        self.threshold_seconds = threshold_seconds
+        self.worker_roles = set(worker_roles or ['apscheduler_worker', 'manual_run_worker'])
+        # Frames where a long wait is governed by the task's own timeout
+        self.expected_wait_functions = set(expected_wait_functions or [])
+        self._signatures = {}   # ident -> stack signature
+        self._since = {}        # ident -> time the signature was first seen
+        self._alerted = set()   # idents alerted for their current signature
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='StuckWorkerWatchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def unchanged_since(self) -> Dict[int, float]:
+        """Time each tracked worker first showed its current stack."""
+        return dict(self._since)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Watchdog error: {e}")
+
+    def check(self) -> List[Dict]:
+        """Take one sample and alert on any worker stuck past the threshold."""
+        now = time.time()
+        stuck = []
+        live_idents = set()
+
+        for thread in dump_threads():
+            if thread['role'] not in self.worker_roles:
+                continue
+            ident = thread['ident']
+            live_idents.add(ident)
+
+            if thread['idle'] or any(f['function'] in self.expected_wait_functions for f in thread['stack']):
+                self._forget(ident)
+                continue
+
+            signature = tuple((f['file'], f['line'], f['function']) for f in thread['stack'])
+            if self._signatures.get(ident) != signature:
+                self._signatures[ident] = signature
+                self._since[ident] = now
+                self._alerted.discard(ident)
+                continue
+
+            stuck_for = now - self._since[ident]
+            if stuck_for >= self.threshold_seconds and ident not in self._alerted:
+                self._alerted.add(ident)
+                thread['unchanged_for_seconds'] = round(stuck_for, 1)
+                stuck.append(thread)
+                self._raise_alert(thread, stuck_for)
+
+        # Drop state for threads that have exited
+        for ident in set(self._signatures) - live_idents:
+            self._forget(ident)
+
+        return stuck
+
+    def _forget(self, ident: int):
+        self._signatures.pop(ident, None)
+        self._since.pop(ident, None)
+        self._alerted.discard(ident)
+
+    def _raise_alert(self, thread: Dict, stuck_for: float):
+        top = thread['stack'][-1] if thread['stack'] else {}
+        location = f"{top.get('function')} ({os.path.basename(top.get('file', ''))}:{top.get('line')})"
+        logger.error(f"Worker {thread['name']} stuck for {stuck_for:.0f}s in {location}")
+        try:
+            self.alert_manager.create_alert(
+                'worker_stuck', 'critical',
+                f"Worker thread {thread['name']} has been stuck for {stuck_for:.0f}s in {location}",
+                details={
+                    'thread': thread['name'],
+                    'role': thread['role'],
+                    'stuck_seconds': round(stuck_for, 1),
+                    'stack': format_thread_dump([thread]),
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to raise stuck worker alert: {e}")
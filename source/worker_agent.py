@@ -0,0 +1,140 @@
+# worker_agent.py
+"""
+Worker agent for DISPATCH_CONFIG['enabled'] = True.
+Claims queued runs from the run_queue table (SELECT ... FOR UPDATE SKIP
+LOCKED, so any number of agents can share the queue) and executes them with
+the scheduler's own execute_task: same logs, spool, timeouts, retries and
+alerts. Claimed runs are heartbeated; if an agent dies the scheduler fails
+its runs and retries them on another agent. Task scripts must be reachable
+at the same path from every agent host.
+
+    python worker_agent.py                     # one agent, DISPATCH_CONFIG['worker_slots'] runs at a time
+    python worker_agent.py --name w2 --slots 8 # another agent on the same host
+"""
+import os
+import sys
+import socket
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Setup local paths
+LOCAL_ROOT = Path(r"C:\SchedulerService")
+sys.path.insert(0, str(LOCAL_ROOT / "source"))
+
+# Import local config and components
+import production_config_local as production_config
+sys.modules['production_config'] = production_config
+
+from production_config import DISPATCH_CONFIG, LOG_SPOOL_CONFIG
+from production_scheduler_core import ProductionScheduler
+
+
+class WorkerAgent(ProductionScheduler):
+    """A ProductionScheduler that runs queued tasks instead of scheduling them."""
+
+    def __init__(self, name: str = None, slots: int = None):
+        name = name or str(os.getpid())
+        host = os.environ.get('COMPUTERNAME') or socket.gethostname()
+        self.worker_name = f"{host}:{name}"
+        super().__init__(log_prefix=f'worker_{name}', service_name='PythonSchedulerWorker',
+                         node_name=self.worker_name)
+
+        # Retries go back on the queue, to whichever agent is free
+        self.dispatch_mode = True
+        self.slots = slots or DISPATCH_CONFIG['worker_slots']
+        self.executor = ThreadPoolExecutor(max_workers=self.slots, thread_name_prefix='WorkerRun')
+        self.claimed = {}  # queue_id -> queue item being run here
+        self.claimed_lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def start(self):
+        """Claim and run queued tasks until interrupted."""
+        try:
+            if LOG_SPOOL_CONFIG['enabled']:
+                self.log_shipper.start()
+            threading.Thread(target=self.heartbeat_claims, name='WorkerHeartbeat', daemon=True).start()
+            self.started_at = datetime.now()
+            self.logger.info(f"Worker agent {self.worker_name} started with {self.slots} slots")
+            self.claim_loop()
+        except KeyboardInterrupt:
+            self.logger.info("Worker agent interrupted by user")
+        except Exception as e:
+            self.logger.error(f"Worker agent error: {e}")
+            self.alert_manager.create_alert(
+                'worker_crash', 'critical',
+                f"Worker agent {self.worker_name} crashed: {e}"
+            )
+        finally:
+            self.shutdown()
+
+    def claim_loop(self):
+        """Keep every slot busy with a claimed run, polling while the queue is empty."""
+        while not self._stop_event.is_set():
+            with self.claimed_lock:
+                free = self.slots - len(self.claimed)
+            items = []
+            if free > 0:
+                try:
+                    items = self.run_manager.queue.claim(self.worker_name, free)
+                except Exception as e:
+                    self.logger.error(f"Failed to claim queued runs: {e}")
+
+            for item in items:
+                with self.claimed_lock:
+                    self.claimed[item['queue_id']] = item
+                self.logger.info(f"Claimed task {item['task_id']} (queue ID: {item['queue_id']})")
+                self.executor.submit(self.run_claimed, item)
+
+            if not items:
+                # A finishing run wakes the loop early to claim its replacement
+                self._wake.wait(DISPATCH_CONFIG['poll_seconds'])
+                self._wake.clear()
+
+    def run_claimed(self, item):
+        """Execute one claimed item, then remove it from the queue."""
+        try:
+            self.execute_task(item['task_id'], item['retry_count'], item['profile_mode'],
+                              item['triggered_by'], queue_id=item['queue_id'])
+        except Exception as e:
+            self.logger.error(f"Error running queued task {item['task_id']}: {e}")
+        finally:
+            try:
+                self.run_manager.queue.complete(item['queue_id'])
+            except Exception as e:
+                self.logger.error(f"Failed to remove queue item {item['queue_id']}: {e}")
+            with self.claimed_lock:
+                self.claimed.pop(item['queue_id'], None)
+            self._wake.set()
+
+    def heartbeat_claims(self):
+        """Extend the lease of the runs in progress here."""
+        while not self._stop_event.wait(DISPATCH_CONFIG['heartbeat_seconds']):
+            with self.claimed_lock:
+                queue_ids = list(self.claimed)
+            if not queue_ids:
+                continue
+            try:
+                self.run_manager.queue.heartbeat(self.worker_name, queue_ids)
+            except Exception as e:
+                self.logger.error(f"Failed to heartbeat claimed runs: {e}")
+
+    def shutdown(self):
+        """Stop claiming, stop running processes and wait for their runs to be recorded."""
+        self._wake.set()
+        super().shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scheduler worker agent')
+    parser.add_argument('--name', help='Agent name, unique per host (default: process id)')
+    parser.add_argument('--slots', type=int, help='Concurrent runs')
+    args = parser.parse_args()
+
+    WorkerAgent(args.name, args.slots).start()
+
+
+if __name__ == '__main__':
+    main()